@@ -1,11 +1,19 @@
 from django.contrib import admin
-from accounts.models import User, Role, Department, Designation
+from accounts.models import User, Role, Department, Designation, Location, Holiday
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
-    list_display = ("username", "email", "role", "department", "is_active")
+    list_display = ("username", "email", "role", "department", "location", "is_active")
     search_fields = ("username", "email")
 
 admin.site.register(Role)
 admin.site.register(Department)
-admin.site.register(Designation)
\ No newline at end of file
+admin.site.register(Designation)
+admin.site.register(Location)
+
+
+@admin.register(Holiday)
+class HolidayAdmin(admin.ModelAdmin):
+    list_display = ("name", "date", "location")
+    list_filter = ("location",)
+    date_hierarchy = "date"
@@ -1,4 +1,8 @@
+import logging
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class AccountsConfig(AppConfig):
@@ -7,3 +11,8 @@ class AccountsConfig(AppConfig):
 
     def ready(self):
         import accounts.signals
+        if not settings.CLIENT_IP_HEADER:
+            logger.warning(
+                "CLIENT_IP_HEADER is not set; per-IP OTP rate limits use REMOTE_ADDR, "
+                "which behind a reverse proxy is the proxy's address"
+            )
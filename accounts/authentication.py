@@ -0,0 +1,127 @@
+"""
+JWT authentication that builds the request user from access-token claims,
+loading the User only for tokens issued before the user's last change.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts.models import Role, User
+from accounts.revocation import is_token_revoked
+
+AUTH_VERSION_TIMEOUT = 5 * 60
+
+
+def auth_version_key(user_id):
+    return f"auth-version:{user_id}"
+
+
+def current_auth_version(user_id):
+    """
+    The user's auth_version, or 0 for a deleted user.
+    """
+    key = auth_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(id=user_id).values_list('auth_version', flat=True).first() or 0
+        cache.set(key, version, AUTH_VERSION_TIMEOUT)
+    return version
+
+
+def invalidate_auth_versions(user_ids):
+    """
+    Drop cached versions once the transaction that bumped them commits, so no
+    request can cache the old value in between.
+    """
+    keys = [auth_version_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def access_token_for(user, exp=None):
+    """
+    Access token carrying the user's current claims. Pass exp to keep the
+    expiry of the token being replaced.
+    """
+    token = AccessToken.for_user(user)
+    if exp is not None:
+        token["exp"] = exp
+    token["role"] = user.role.name if user.role else None
+    token["role_id"] = user.role_id
+    token["department_id"] = user.department_id
+    token["location_id"] = user.location_id
+    token["auth_version"] = user.auth_version
+    return token
+
+
+class LazyUser(SimpleLazyObject):
+    """
+    Stand-in for the request's User with the claim fields filled in. Other
+    attributes load the User on first access. It passes isinstance checks and
+    compares equal to the User with the same pk without loading it.
+    """
+
+    def __init__(self, user_id, claims):
+        super().__init__(lambda: User.objects.get(pk=user_id))
+        role_id = claims.get("role_id")
+        self.__dict__.update(
+            id=user_id,
+            pk=user_id,
+            role_id=role_id,
+            role=Role(id=role_id, name=claims.get("role")) if role_id else None,
+            department_id=claims.get("department_id"),
+            location_id=claims.get("location_id"),
+            is_active=True,
+            is_authenticated=True,
+            is_anonymous=False,
+            _meta=User._meta,
+        )
+
+    @property
+    def __class__(self):
+        return User
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        return isinstance(other, User) and other.pk == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_token_revoked(token):
+            raise InvalidToken("Token has been revoked")
+        return token
+
+    def get_user(self, validated_token):
+        try:
+            # The claim holds the id as a string
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        version = validated_token.get("auth_version")
+        if version is None or version != current_auth_version(user_id):
+            # Issued before the claims existed or before the user's last change
+            return super().get_user(validated_token)
+        return LazyUser(user_id, validated_token)
+
+
+def user_from_token(raw_token):
+    """
+    The User a raw access token belongs to, for WebSocket connections, or None
+    if the token is invalid, expired or revoked.
+    """
+    try:
+        token = AccessToken(raw_token)
+    except TokenError:
+        return None
+    if is_token_revoked(token):
+        return None
+    return User.objects.filter(id=token[api_settings.USER_ID_CLAIM], is_active=True).first()
@@ -1,8 +1,19 @@
 from django.db import models
+from django.contrib.postgres.fields import ArrayField
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils import timezone
+from core.models import FieldTrackerMixin, ListQuerySet
 
-class UserManager(BaseUserManager):
+
+class UserQuerySet(ListQuerySet):
+    list_select_related = ('role', 'department', 'designation')
+    list_only = (
+        'id', 'email', 'username', 'first_name', 'last_name', 'bio', 'phone', 'address',
+        'role__name', 'department__name', 'designation__name',
+    )
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     def create_user(self, email, username, password=None, **extra_fields):
         email = self.normalize_email(email) if email else email
         user = self.model(email=email, username=username, **extra_fields)
@@ -31,6 +42,39 @@ class Department(models.Model):
         return self.name
 
 
+# Python weekday numbers (Monday is 0) used when a user has no location
+DEFAULT_WEEKEND_DAYS = (5, 6)
+
+
+def default_weekend_days():
+    return list(DEFAULT_WEEKEND_DAYS)
+
+
+class Location(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+    weekend_days = ArrayField(models.PositiveSmallIntegerField(), default=default_weekend_days, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Holiday(models.Model):
+    location = models.ForeignKey(Location, on_delete=models.CASCADE, null=True, blank=True, related_name="holidays")  # empty for every location
+    date = models.DateField()
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'date'], name='unique_holiday_location_date'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='holiday_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.date})"
+
+
 class Designation(models.Model):
     name = models.CharField(max_length=100)
     department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="designations")
@@ -42,7 +86,7 @@ class Designation(models.Model):
         return f"{self.name} ({self.department.name})"
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(FieldTrackerMixin, AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True)
     username = models.CharField(max_length=100, unique=True)
     first_name = models.CharField(max_length=50, blank=True)
@@ -50,17 +94,43 @@ class User(AbstractBaseUser, PermissionsMixin):
     role = models.ForeignKey(Role, on_delete=models.SET_NULL, null=True, blank=True)
     department = models.ForeignKey(Department, on_delete=models.SET_NULL, null=True, blank=True)
     designation = models.ForeignKey(Designation, on_delete=models.SET_NULL, null=True, blank=True)
+    location = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True)
     bio = models.TextField(blank=True, null=True)
     phone = models.CharField(max_length=15, blank=True, null=True)
     address = models.CharField(max_length=255, blank=True, null=True)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
     date_joined = models.DateTimeField(default=timezone.now)
+    # Bumped whenever a field copied into access-token claims changes, so
+    # tokens issued before the change stop being trusted
+    auth_version = models.PositiveIntegerField(default=1)
 
     objects = UserManager()
 
+    tracked_fields = ('role', 'department', 'location', 'is_active')
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    class Meta:
+        indexes = [
+            # Directory pages are read in username order within these filters
+            models.Index(fields=['department', 'username'], name='user_department_username_idx'),
+            models.Index(fields=['role', 'username'], name='user_role_username_idx'),
+            models.Index(fields=['date_joined'], name='user_date_joined_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Only fields that were loaded can be compared; partial loads never bump
+        loaded = getattr(self, '_tracked_initial', {})
+        self.claims_changed = not self._state.adding and any(
+            name in loaded and self.has_changed(name) for name in self.tracked_fields
+        )
+        if self.claims_changed:
+            self.auth_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'auth_version'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.username
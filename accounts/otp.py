@@ -0,0 +1,192 @@
+"""
+Password-reset OTPs and request rate limits, kept in the store chosen by
+settings.OTP_STORE so every worker process shares them.
+"""
+import abc
+import hashlib
+import hmac
+import threading
+import time
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+MAX_VERIFY_ATTEMPTS = 5
+RATE_LIMIT_WINDOW = 15 * 60
+MAX_REQUESTS_PER_EMAIL = 3
+MAX_REQUESTS_PER_IP = 10
+
+# Results of verify() and consume_verified()
+OK = "ok"
+MISSING = "missing"  # never requested, expired or already used
+INVALID = "invalid"
+LOCKED = "locked"
+UNVERIFIED = "unverified"
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def hash_code(email, code):
+    message = f"{normalize_email(email)}:{code}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+class OTPStore(abc.ABC):
+    """
+    Interface of an OTP store. ttl and window are in seconds.
+    """
+
+    @abc.abstractmethod
+    def issue(self, email, code, ttl):
+        """Store a new code for email, replacing any previous one."""
+
+    @abc.abstractmethod
+    def verify(self, email, code, max_attempts=MAX_VERIFY_ATTEMPTS):
+        """Count an attempt and mark the OTP verified if code matches: OK, INVALID, LOCKED or MISSING."""
+
+    @abc.abstractmethod
+    def consume_verified(self, email):
+        """Delete a verified OTP so it can be used once: OK, UNVERIFIED or MISSING."""
+
+    @abc.abstractmethod
+    def hit(self, key, limit, window):
+        """Count a request against key; False once more than limit fall in the current window."""
+
+
+# KEYS[1] = OTP hash; ARGV = code hash, max attempts
+VERIFY_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then return 'missing' end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if attempts > tonumber(ARGV[2]) then return 'locked' end
+if redis.call('HGET', KEYS[1], 'code') ~= ARGV[1] then return 'invalid' end
+redis.call('HSET', KEYS[1], 'verified', '1')
+return 'ok'
+"""
+
+CONSUME_SCRIPT = """
+local verified = redis.call('HGET', KEYS[1], 'verified')
+if not verified then return 'missing' end
+if verified ~= '1' then return 'unverified' end
+redis.call('DEL', KEYS[1])
+return 'ok'
+"""
+
+
+class RedisOTPStore(OTPStore):
+    def __init__(self, location):
+        import redis
+
+        self.client = redis.Redis.from_url(location, decode_responses=True)
+        self._verify = self.client.register_script(VERIFY_SCRIPT)
+        self._consume = self.client.register_script(CONSUME_SCRIPT)
+
+    @staticmethod
+    def key(email):
+        return f"otp:{normalize_email(email)}"
+
+    def issue(self, email, code, ttl):
+        key = self.key(email)
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping={"code": hash_code(email, code), "attempts": 0, "verified": 0})
+            pipe.expire(key, ttl)
+            pipe.execute()
+
+    def verify(self, email, code, max_attempts=MAX_VERIFY_ATTEMPTS):
+        return self._verify(keys=[self.key(email)], args=[hash_code(email, code), max_attempts])
+
+    def consume_verified(self, email):
+        return self._consume(keys=[self.key(email)])
+
+    def hit(self, key, limit, window):
+        key = f"otp-rate:{key}"
+        with self.client.pipeline(transaction=True) as pipe:
+            # The first request of a window creates the counter with its expiry
+            pipe.set(key, 0, ex=window, nx=True)
+            pipe.incr(key)
+            _, count = pipe.execute()
+        return count <= limit
+
+
+class MemoryOTPStore(OTPStore):
+    """
+    Per-process store for tests and development. Expired entries are evicted
+    whenever the store is written.
+    """
+
+    def __init__(self, location=None):
+        self._entries = {}  # {email: {"code", "attempts", "verified", "expires"}}
+        self._counters = {}  # {key: (count, window_ends)}
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        for email in [email for email, entry in self._entries.items() if entry["expires"] <= now]:
+            del self._entries[email]
+        for key in [key for key, (_, ends) in self._counters.items() if ends <= now]:
+            del self._counters[key]
+
+    def _entry(self, email, now):
+        entry = self._entries.get(normalize_email(email))
+        return entry if entry and entry["expires"] > now else None
+
+    def issue(self, email, code, ttl):
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            self._entries[normalize_email(email)] = {
+                "code": hash_code(email, code), "attempts": 0, "verified": False, "expires": now + ttl,
+            }
+
+    def verify(self, email, code, max_attempts=MAX_VERIFY_ATTEMPTS):
+        with self._lock:
+            entry = self._entry(email, time.monotonic())
+            if not entry:
+                return MISSING
+            entry["attempts"] += 1
+            if entry["attempts"] > max_attempts:
+                return LOCKED
+            if not hmac.compare_digest(entry["code"], hash_code(email, code)):
+                return INVALID
+            entry["verified"] = True
+            return OK
+
+    def consume_verified(self, email):
+        with self._lock:
+            entry = self._entry(email, time.monotonic())
+            if not entry:
+                return MISSING
+            if not entry["verified"]:
+                return UNVERIFIED
+            del self._entries[normalize_email(email)]
+            return OK
+
+    def hit(self, key, limit, window):
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            count, ends = self._counters.get(key, (0, now + window))
+            self._counters[key] = (count + 1, ends)
+            return count + 1 <= limit
+
+
+_store = None
+
+
+def get_otp_store():
+    global _store
+    if _store is None:
+        config = settings.OTP_STORE
+        _store = import_string(config["BACKEND"])(config.get("LOCATION"))
+    return _store
+
+
+def allow_otp_request(email, ip):
+    """
+    Count an OTP request against its email and client IP limits.
+    """
+    store = get_otp_store()
+    allowed = store.hit(f"email:{normalize_email(email)}", MAX_REQUESTS_PER_EMAIL, RATE_LIMIT_WINDOW)
+    if ip:
+        allowed = store.hit(f"ip:{ip}", MAX_REQUESTS_PER_IP, RATE_LIMIT_WINDOW) and allowed
+    return allowed
@@ -0,0 +1,167 @@
+"""
+Access-token revocation by jti, checked against a per-process bloom filter of
+the jtis revoked in the store chosen by settings.TOKEN_REVOCATION.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+REFRESH_INTERVAL = 10
+FALSE_POSITIVE_RATE = 0.001
+MIN_CAPACITY = 1024
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    def __init__(self, items, capacity=None, false_positive_rate=FALSE_POSITIVE_RATE):
+        items = list(items)
+        capacity = max(capacity or len(items) * 2, MIN_CAPACITY)
+        self.size = math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        for item in items:
+            self.add(item)
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RedisRevocationStore:
+    VERSION_KEY = "revoked-jtis:version"
+    INDEX_KEY = "revoked-jtis"
+
+    def __init__(self, location):
+        import redis
+
+        self.client = redis.Redis.from_url(location, decode_responses=True)
+        self.errors = (redis.RedisError,)
+
+    @staticmethod
+    def key(jti):
+        return f"revoked-jti:{jti}"
+
+    def revoke(self, jti, expires_at):
+        ttl = max(1, math.ceil(expires_at - time.time()))
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(self.key(jti), 1, ex=ttl)
+            pipe.zadd(self.INDEX_KEY, {jti: expires_at})
+            pipe.zremrangebyscore(self.INDEX_KEY, "-inf", time.time())
+            pipe.incr(self.VERSION_KEY)
+            pipe.execute()
+
+    def is_revoked(self, jti):
+        return bool(self.client.exists(self.key(jti)))
+
+    def version(self):
+        return self.client.get(self.VERSION_KEY)
+
+    def live_jtis(self):
+        """(version, jtis of tokens that have not expired yet)."""
+        with self.client.pipeline(transaction=True) as pipe:
+            pipe.get(self.VERSION_KEY)
+            pipe.zrangebyscore(self.INDEX_KEY, time.time(), "+inf")
+            version, jtis = pipe.execute()
+        return version, jtis
+
+
+class MemoryRevocationStore:
+    """
+    Per-process store for tests and single-process development.
+    """
+
+    errors = ()
+
+    def __init__(self, location=None):
+        self._revoked = {}  # {jti: expires_at}
+        self._version = 0
+
+    def revoke(self, jti, expires_at):
+        now = time.time()
+        self._revoked = {j: exp for j, exp in self._revoked.items() if exp > now}
+        self._revoked[jti] = expires_at
+        self._version += 1
+
+    def is_revoked(self, jti):
+        return self._revoked.get(jti, 0) > time.time()
+
+    def version(self):
+        return self._version
+
+    def live_jtis(self):
+        now = time.time()
+        return self._version, [jti for jti, exp in self._revoked.items() if exp > now]
+
+
+_store = None
+_filter = None
+_filter_version = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_revocation_store():
+    global _store
+    if _store is None:
+        config = settings.TOKEN_REVOCATION
+        _store = import_string(config["BACKEND"])(config.get("LOCATION"))
+    return _store
+
+
+def _current_filter():
+    global _filter, _filter_version, _checked_at
+    now = time.monotonic()
+    if _filter is not None and now - _checked_at < REFRESH_INTERVAL:
+        return _filter
+    with _lock:
+        if _filter is None or now - _checked_at >= REFRESH_INTERVAL:
+            store = get_revocation_store()
+            try:
+                if _filter is None or store.version() != _filter_version:
+                    _filter_version, jtis = store.live_jtis()
+                    _filter = BloomFilter(jtis)
+            except store.errors as e:
+                logger.error(f"Revocation store unavailable, using the last revocation filter: {e}")
+                if _filter is None:
+                    _filter = BloomFilter([])
+            _checked_at = now
+    return _filter
+
+
+def revoke_token(token):
+    """
+    Revoke a validated simplejwt token until it expires.
+    """
+    get_revocation_store().revoke(token["jti"], token["exp"])
+    # This process sees its own revocations without waiting for a refresh
+    _current_filter().add(token["jti"])
+
+
+def is_token_revoked(token):
+    """
+    Only jtis in the filter are looked up in the store. While the store is
+    unreachable they count as revoked.
+    """
+    jti = token.get("jti")
+    if not jti or jti not in _current_filter():
+        return False
+    store = get_revocation_store()
+    try:
+        return store.is_revoked(jti)
+    except store.errors as e:
+        logger.error(f"Revocation store unavailable, rejecting token {jti} found in the filter: {e}")
+        return True
@@ -29,3 +29,10 @@ class UserSerializer(serializers.ModelSerializer):
             'role', 'department', 'designation',
             'bio', 'phone', 'address'
         ]
+
+    def __init__(self, *args, fields=None, **kwargs):
+        # fields: optional subset of Meta.fields to render
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
@@ -1,7 +1,11 @@
 import logging
-from django.db.models.signals import post_save, pre_delete
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.db.models import F
+from accounts.authentication import invalidate_auth_versions
+from accounts.models import Department, Location, Holiday, Role
+from accounts.work_calendar import invalidate_work_calendars
 from notifications.utils import notify_password_reset, notify_user_deleted, notify_profile_updated
 
 logger = logging.getLogger(__name__)
@@ -15,3 +19,40 @@ def notify_before_user_deletion(sender, instance, **kwargs):
         logger.info(f"User deletion signal: {instance.username}")
     except Exception as e:
         logger.exception(f"Error in pre_delete signal: {e}")
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def invalidate_work_calendars_on_edit(sender, instance, **kwargs):
+    invalidate_work_calendars()
+
+
+@receiver(post_save, sender=User)
+def invalidate_auth_version_on_claims_change(sender, instance, created, **kwargs):
+    if getattr(instance, 'claims_changed', False):
+        invalidate_auth_versions([instance.pk])
+
+
+def bump_auth_versions(users):
+    user_ids = list(users.values_list('id', flat=True))
+    if user_ids:
+        User.objects.filter(id__in=user_ids).update(auth_version=F('auth_version') + 1)
+        invalidate_auth_versions(user_ids)
+
+
+@receiver(post_save, sender=Role)
+def bump_auth_versions_on_role_rename(sender, instance, created, **kwargs):
+    # Tokens carry the role name
+    if not created:
+        bump_auth_versions(User.objects.filter(role=instance))
+
+
+@receiver(pre_delete, sender=Role)
+@receiver(pre_delete, sender=Department)
+@receiver(pre_delete, sender=Location)
+def bump_auth_versions_before_claim_delete(sender, instance, **kwargs):
+    # Deleting these nulls users' foreign keys with a plain UPDATE, bypassing save()
+    field = {Role: 'role', Department: 'department', Location: 'location'}[sender]
+    bump_auth_versions(User.objects.filter(**{field: instance}))
@@ -1,3 +1,232 @@
-from django.test import TestCase
+from datetime import date
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from accounts import otp
+from accounts.authentication import user_from_token
+from accounts.models import Department, Designation, Holiday, Location, Role, User
+from accounts.otp import MemoryOTPStore
+from accounts.revocation import BloomFilter, MemoryRevocationStore, RedisRevocationStore
+from accounts.work_calendar import invalidate_work_calendars, working_days
 
-# Create your tests here.
+
+class MemoryOTPStoreTests(TestCase):
+    def setUp(self):
+        self.store = MemoryOTPStore()
+
+    def test_code_is_stored_hashed(self):
+        self.store.issue("dev@example.com", "123456", 300)
+        self.assertNotIn("123456", str(self.store._entries))
+
+    def test_attempts_are_limited(self):
+        self.store.issue("dev@example.com", "123456", 300)
+        for _ in range(otp.MAX_VERIFY_ATTEMPTS):
+            self.assertEqual(self.store.verify("dev@example.com", "000000"), otp.INVALID)
+        self.assertEqual(self.store.verify("dev@example.com", "123456"), otp.LOCKED)
+
+    def test_expired_code_is_missing(self):
+        self.store.issue("dev@example.com", "123456", 0)
+        self.assertEqual(self.store.verify("dev@example.com", "123456"), otp.MISSING)
+
+    def test_requests_are_rate_limited_per_window(self):
+        results = [self.store.hit("email:dev@example.com", 3, 60) for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+
+
+@mock.patch("accounts.otp._store", new_callable=MemoryOTPStore)
+class PasswordResetFlowTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="dev@example.com", username="dev", password="old-pass")
+        self.client = APIClient()
+
+    def request_code(self):
+        with mock.patch("accounts.views.send_otp_email") as send:
+            response = self.client.post("/api/auth/forgot_password/", {"email": "dev@example.com"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return send.call_args.args[1]
+
+    def test_verified_code_resets_password_once(self, store):
+        code = self.request_code()
+        self.assertEqual(self.client.post("/api/auth/verify_otp/", {"email": "dev@example.com", "code": code}, format="json").status_code, 200)
+        reset = {"email": "dev@example.com", "new_password": "new-pass", "confirm_password": "new-pass"}
+        with mock.patch("accounts.views.notify_password_reset"):
+            self.assertEqual(self.client.post("/api/auth/reset_password/", reset, format="json").status_code, 200)
+            self.assertEqual(self.client.post("/api/auth/reset_password/", reset, format="json").status_code, 400)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("new-pass"))
+
+    def test_unverified_code_cannot_reset(self, store):
+        self.request_code()
+        reset = {"email": "dev@example.com", "new_password": "new-pass", "confirm_password": "new-pass"}
+        response = self.client.post("/api/auth/reset_password/", reset, format="json")
+        self.assertEqual(response.data["msg"], "OTP not verified")
+
+    def test_fourth_request_is_throttled(self, store):
+        for _ in range(otp.MAX_REQUESTS_PER_EMAIL):
+            self.request_code()
+        response = self.client.post("/api/auth/forgot_password/", {"email": "dev@example.com"}, format="json")
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(CLIENT_IP_HEADER="HTTP_X_FORWARDED_FOR")
+    def test_ip_limit_uses_the_proxy_reported_client(self, store):
+        def request(i, client_ip):
+            with mock.patch("accounts.views.send_otp_email"):
+                return self.client.post(
+                    "/api/auth/forgot_password/", {"email": f"u{i}@example.com"}, format="json",
+                    HTTP_X_FORWARDED_FOR=f"203.0.113.{i}, {client_ip}",
+                ).status_code
+        # Clients behind the same proxy are limited separately
+        self.assertNotIn(429, [request(i, f"10.0.0.{i}") for i in range(otp.MAX_REQUESTS_PER_IP + 1)])
+        # and a client cannot escape its limit by forging the leading addresses
+        statuses = [request(i, "10.0.1.1") for i in range(otp.MAX_REQUESTS_PER_IP + 1)]
+        self.assertEqual(statuses[-1], 429)
+
+    @override_settings(CLIENT_IP_HEADER=None)
+    def test_ip_limit_falls_back_to_remote_addr(self, store):
+        statuses = []
+        for i in range(otp.MAX_REQUESTS_PER_IP + 1):
+            with mock.patch("accounts.views.send_otp_email"):
+                statuses.append(self.client.post(
+                    "/api/auth/forgot_password/", {"email": f"u{i}@example.com"}, format="json", REMOTE_ADDR="198.51.100.7",
+                ).status_code)
+        self.assertEqual(statuses[-1], 429)
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for target, value in (("accounts.revocation._store", MemoryRevocationStore()), ("accounts.revocation._filter", None)):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.admin_role = Role.objects.create(name="admin")
+        self.user = User.objects.create_user(email="boss@example.com", username="boss", password="pass", role=self.admin_role)
+        self.client = APIClient()
+        response = self.client.post("/api/auth/login/", {"email": "boss@example.com", "password": "pass"}, format="json")
+        self.token = response.data["token"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def test_request_user_comes_from_claims(self):
+        self.client.get("/api/tasks/")  # caches the auth version
+        with self.assertNumQueries(1):
+            # Only the task list itself; no User or Role lookup
+            response = self.client.get("/api/tasks/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_role_change_stops_trusting_old_claims(self):
+        self.client.get("/api/tasks/")
+        self.user.role = Role.objects.create(name="intern")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.client.get("/api/tasks/board/", {"group_by": "department"}).status_code, 403)
+        response = self.client.post("/api/auth/token/refresh/")
+        self.assertEqual(AccessToken(response.data["token"])["role"], "intern")
+
+    def test_refresh_keeps_expiry_and_revokes_presented_token(self):
+        response = self.client.post("/api/auth/token/refresh/")
+        self.assertEqual(AccessToken(response.data["token"])["exp"], AccessToken(self.token)["exp"])
+        self.assertEqual(self.client.get("/api/profile/").status_code, 401)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        self.assertEqual(self.client.get("/api/profile/").status_code, 200)
+
+    def test_invalid_websocket_token_has_no_user(self):
+        self.assertEqual(user_from_token(self.token), self.user)
+        self.assertIsNone(user_from_token("not-a-token"))
+        self.assertIsNone(user_from_token(self.token[:-2]))
+
+    def test_unrelated_profile_edit_keeps_token_valid(self):
+        version = self.user.auth_version
+        self.user.bio = "Hello"
+        self.user.save()
+        self.assertEqual(self.user.auth_version, version)
+
+
+@mock.patch("accounts.revocation._filter", None)
+@mock.patch("accounts.revocation._store", new_callable=MemoryRevocationStore)
+class LogoutRevocationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="dev@example.com", username="dev", password="pass")
+
+    def login(self):
+        client = APIClient()
+        response = client.post("/api/auth/login/", {"email": "dev@example.com", "password": "pass"}, format="json")
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        return client, response.data["token"]
+
+    def test_logout_revokes_only_that_token(self, store):
+        first, token = self.login()
+        second, _ = self.login()
+        self.assertEqual(first.post("/api/auth/logout/").status_code, 200)
+        self.assertEqual(first.get("/api/profile/").status_code, 401)
+        self.assertIsNone(user_from_token(token))
+        self.assertEqual(second.get("/api/profile/").status_code, 200)
+
+    def test_bloom_filter_has_no_false_negatives(self, store):
+        jtis = [f"jti-{i}" for i in range(5000)]
+        bloom = BloomFilter(jtis)
+        self.assertTrue(all(jti in bloom for jti in jtis))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 50)
+
+    def test_unreachable_store_keeps_serving_requests(self, store):
+        client, _ = self.login()
+        with mock.patch("accounts.revocation._store", RedisRevocationStore("redis://127.0.0.1:1/0")), \
+                mock.patch("accounts.revocation._filter", None):
+            self.assertEqual(client.get("/api/profile/").status_code, 200)
+
+
+class UserDirectoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for target, value in (("accounts.revocation._store", MemoryRevocationStore()), ("accounts.revocation._filter", None)):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        admin_role, intern_role = Role.objects.create(name="admin"), Role.objects.create(name="intern")
+        department = Department.objects.create(name="Engineering")
+        designation = Designation.objects.create(name="Developer", department=department)
+        User.objects.create_user(email="admin@example.com", username="admin", password="pass", role=admin_role)
+        for i in range(5):
+            User.objects.create_user(
+                email=f"intern{i}@example.com", username=f"intern{i}", role=intern_role,
+                department=department, designation=designation,
+            )
+        self.client = APIClient()
+        response = self.client.post("/api/auth/login/", {"email": "admin@example.com", "password": "pass"}, format="json")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        self.client.get("/api/users/")  # caches the auth version
+
+    def test_pages_cost_one_query_and_cover_every_user(self):
+        usernames, cursor = [], None
+        while True:
+            with self.assertNumQueries(1):
+                response = self.client.get("/api/users/", {"limit": 2, **({"cursor": cursor} if cursor else {})})
+            usernames += [user["username"] for user in response.data["users"]]
+            cursor = response.data["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(usernames, ["admin"] + [f"intern{i}" for i in range(5)])
+        self.assertEqual(response.data["users"][-1]["designation"], "Developer")
+
+    def test_filters_and_sparse_fields(self):
+        response = self.client.get("/api/users/", {"role": "intern", "fields": "id,username,department"})
+        self.assertEqual(len(response.data["users"]), 5)
+        self.assertEqual(set(response.data["users"][0]), {"id", "username", "department"})
+        self.assertEqual(self.client.get("/api/users/", {"fields": "password"}).status_code, 400)
+
+
+class WorkCalendarTests(TestCase):
+    def setUp(self):
+        # Compiled years outlive the test's transaction
+        self.addCleanup(invalidate_work_calendars)
+
+    def test_working_days_skip_the_locations_weekend_and_holidays(self):
+        dubai = Location.objects.create(name="Dubai", weekend_days=[4, 5])
+        Holiday.objects.create(location=dubai, date=date(2026, 4, 6), name="Eid")
+        Holiday.objects.create(date=date(2026, 4, 9), name="Founders Day")
+        # Sunday April 5th to Saturday April 11th
+        self.assertEqual(working_days(dubai.id, date(2026, 4, 5), date(2026, 4, 11)), 3)
+        self.assertEqual(working_days(None, date(2026, 4, 5), date(2026, 4, 11)), 4)
+        self.assertEqual(working_days(None, date(2026, 12, 31), date(2027, 1, 1)), 2)
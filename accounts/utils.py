@@ -19,3 +19,14 @@ def send_otp_email(email, code):
     message = f"Your OTP for password reset is: {code}. It is valid for a few minutes."
     from_email = getattr(settings, "DEFAULT_FROM_EMAIL", settings.EMAIL_HOST_USER)
     send_mail(subject, message, from_email, [email], fail_silently=False)
+
+def get_client_ip(request):
+    """
+    The client IP from the request header named by settings.CLIENT_IP_HEADER,
+    or REMOTE_ADDR when it is not configured. For X-Forwarded-For the last
+    address is the one the trusted proxy appended; earlier ones are
+    client-supplied.
+    """
+    header = getattr(settings, "CLIENT_IP_HEADER", None) or "REMOTE_ADDR"
+    value = request.META.get(header, "")
+    return value.split(",")[-1].strip() or None
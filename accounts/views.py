@@ -3,20 +3,31 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth import authenticate, get_user_model
-from rest_framework_simplejwt.tokens import AccessToken
 from django.utils import timezone
+from datetime import date, datetime, time, timedelta
 import logging
 from accounts.serializers import UserSerializer
 from accounts.models import Role, Department, Designation
-from accounts.utils import create_otp_payload, send_otp_email
+from accounts import otp
+from accounts.authentication import access_token_for
+from accounts.directory import DEFAULT_PAGE_SIZE, DIRECTORY_FIELDS, MAX_PAGE_SIZE, filter_users, page, select_fields
+from accounts.revocation import revoke_token
+from accounts.otp import allow_otp_request, get_otp_store
+from accounts.utils import create_otp_payload, get_client_ip, send_otp_email
 from notifications.utils import notify_password_reset, notify_user_deleted, notify_profile_updated
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+OTP_MINUTES_VALID = 5
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
 
 def get_access_token_for_user(user):
-    return str(AccessToken.for_user(user))
+    return str(access_token_for(user))
 
 
 class RegisterUserView(APIView):
@@ -95,17 +106,35 @@ class LoginView(APIView):
             return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TokenRefreshView(APIView):
+    """
+    New access token with the user's current role, department and location,
+    for clients holding a token issued before those changed. It expires when
+    the presented token would have, so refreshing cannot extend a session,
+    and the presented token is revoked.
+    """
+    permission_classes = [IsAuthenticated]
+    def post(self, request):
+        try:
+            user = User.objects.select_related('role').get(id=request.user.id)
+            token = str(access_token_for(user, exp=request.auth["exp"]))
+            revoke_token(request.auth)
+            return Response({"msg": "Token refreshed", "token": token}, status=status.HTTP_200_OK)
+        except Exception as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+
 class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
     def post(self, request):
         try:
+            # request.auth is the validated access token
+            revoke_token(request.auth)
             return Response({"msg": "Logged out successfully"}, status=status.HTTP_200_OK)
         except Exception as exc:
             return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
 
-OTP_STORE = {}  # { email: {"code": "123456", "expires_at": datetime} }
-
 class ForgotPasswordView(APIView):
     permission_classes = [AllowAny]
     def post(self, request):
@@ -114,11 +143,13 @@ class ForgotPasswordView(APIView):
             email = data.get("email")
             if not email:
                 return Response({"msg": "Email is required"}, status=status.HTTP_400_BAD_REQUEST)
+            if not allow_otp_request(email, get_client_ip(request)):
+                return Response({"msg": "Too many OTP requests, try again later"}, status=status.HTTP_429_TOO_MANY_REQUESTS)
             user = User.objects.filter(email=email).first()
             if not user:
                 return Response({"msg": "No user with this email"}, status=status.HTTP_404_NOT_FOUND)
-            otp_payload = create_otp_payload(email, minutes_valid=5)
-            OTP_STORE[email] = {"code": otp_payload["code"], "expires_at": otp_payload["expires_at"]}
+            otp_payload = create_otp_payload(email, minutes_valid=OTP_MINUTES_VALID)
+            get_otp_store().issue(email, otp_payload["code"], OTP_MINUTES_VALID * 60)
             try:
                 send_otp_email(email, otp_payload["code"])
             except Exception as mail_exc:
@@ -137,15 +168,13 @@ class VerifyOtpView(APIView):
             code = data.get("code")
             if not email or not code:
                 return Response({"msg": "email and code required"}, status=status.HTTP_400_BAD_REQUEST)
-            stored = OTP_STORE.get(email)
-            if not stored:
-                return Response({"msg": "No OTP requested for this email"}, status=status.HTTP_400_BAD_REQUEST)
-            if timezone.now() > stored["expires_at"]:
-                del OTP_STORE[email]
-                return Response({"msg": "OTP expired"}, status=status.HTTP_400_BAD_REQUEST)
-            if str(stored["code"]) != str(code):
+            result = get_otp_store().verify(email, str(code))
+            if result == otp.MISSING:
+                return Response({"msg": "OTP expired or not requested"}, status=status.HTTP_400_BAD_REQUEST)
+            if result == otp.LOCKED:
+                return Response({"msg": "Too many attempts, request a new OTP"}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            if result == otp.INVALID:
                 return Response({"msg": "Invalid OTP"}, status=status.HTTP_400_BAD_REQUEST)
-            stored["verified"] = True
             return Response({"msg": "OTP verified"}, status=status.HTTP_200_OK)
         except Exception as exc:
             return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
@@ -163,20 +192,18 @@ class ResetPasswordView(APIView):
 
             if not email or not new_password or not confirm_password:
                 return Response({"msg": "email, new-password, confirm-password required"}, status=status.HTTP_400_BAD_REQUEST)
-            stored = OTP_STORE.get(email)
-            if not stored:
-                return Response({"msg": "No OTP requested for this email"}, status=status.HTTP_400_BAD_REQUEST)
-            if not stored.get("verified"):
-                return Response({"msg": "OTP not verified"}, status=status.HTTP_400_BAD_REQUEST)
-            if timezone.now() > stored["expires_at"]:
-                del OTP_STORE[email]
-                return Response({"msg": "OTP expired"}, status=status.HTTP_400_BAD_REQUEST)
             if new_password != confirm_password:
                 return Response({"msg": "Passwords do not match"}, status=status.HTTP_400_BAD_REQUEST)
-            
+
             user = User.objects.filter(email=email).first()
             if not user:
                 return Response({"msg": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+            # Using up the verified OTP is atomic, so it resets the password once
+            result = get_otp_store().consume_verified(email)
+            if result == otp.MISSING:
+                return Response({"msg": "OTP expired or not requested"}, status=status.HTTP_400_BAD_REQUEST)
+            if result == otp.UNVERIFIED:
+                return Response({"msg": "OTP not verified"}, status=status.HTTP_400_BAD_REQUEST)
 
             user.set_password(new_password)
             user.save()
@@ -185,7 +212,6 @@ class ResetPasswordView(APIView):
                 logger.info(f"Password reset notification sent to {user.username}")
             except Exception as notif_error:
                 logger.exception(f"Failed to send notification: {notif_error}")
-            del OTP_STORE[email]
             return Response({"msg": "Password reset successfully"}, status=status.HTTP_200_OK)
         except Exception as exc:
             return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
@@ -193,25 +219,55 @@ class ResetPasswordView(APIView):
 
 
 class UserView(APIView):
+    """
+    User directory in keyset pages by username. Filters: role (name),
+    department (id), active (true/false), joined_from and joined_to
+    (YYYY-MM-DD, inclusive); ?fields= limits the rendered fields.
+    """
     permission_classes = [IsAuthenticated]
     def get(self, request):
         try:
             user = request.user
-            qs = User.objects.none()
-            if user.role and user.role.name == "admin":
-                qs = User.objects.all()
-            elif user.role and user.role.name == "senior":
-                if user.department:
-                    qs = User.objects.filter(department=user.department).exclude(id=user.id)
-                else:
-                    qs = User.objects.none()
-            elif user.role and user.role.name == "junior":
-                if user.department:
-                    qs = User.objects.filter(department=user.department, role__name="intern")
-            elif user.role and user.role.name == "intern":
-                qs = User.objects.filter(id=user.id)
-            data = UserSerializer(qs, many=True).data
-            return Response({"users": data}, status=status.HTTP_200_OK)
+            role = user.role.name if user.role else None
+            users = User.objects.none()
+            if role == "admin":
+                users = User.objects.all()
+            elif role == "senior":
+                if user.department_id:
+                    users = User.objects.filter(department_id=user.department_id).exclude(id=user.id)
+            elif role == "junior":
+                if user.department_id:
+                    users = User.objects.filter(department_id=user.department_id, role__name="intern")
+            elif role == "intern":
+                users = User.objects.filter(id=user.id)
+            params = request.query_params
+            fields = [name for name in params["fields"].split(",") if name] if params.get("fields") else None
+            if fields is not None and (not fields or set(fields) - set(DIRECTORY_FIELDS)):
+                return Response({"msg": f"fields must be among {', '.join(DIRECTORY_FIELDS)}"}, status=status.HTTP_400_BAD_REQUEST)
+            active = params.get("active")
+            if active not in (None, "true", "false"):
+                return Response({"msg": "active must be true or false"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                joined_from = date.fromisoformat(params["joined_from"]) if params.get("joined_from") else None
+                joined_to = date.fromisoformat(params["joined_to"]) + timedelta(days=1) if params.get("joined_to") else None
+                department = int(params["department"]) if params.get("department") else None
+                limit = min(int(params.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+            except ValueError:
+                return Response({"msg": "Invalid filter: dates must be YYYY-MM-DD and department and limit integers"}, status=status.HTTP_400_BAD_REQUEST)
+            if limit < 1:
+                return Response({"msg": "limit must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+            users = filter_users(
+                users, role=params.get("role"), department=department,
+                is_active=None if active is None else active == "true",
+                joined_from=start_of_day(joined_from) if joined_from else None,
+                joined_to=start_of_day(joined_to) if joined_to else None,
+            )
+            try:
+                rows, next_cursor = page(select_fields(users, fields), params.get("cursor"), limit)
+            except ValueError:
+                return Response({"msg": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+            data = UserSerializer(rows, many=True, fields=fields).data
+            return Response({"users": data, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
         except Exception as exc:
             return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
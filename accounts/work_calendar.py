@@ -0,0 +1,119 @@
+"""
+Working-day calendars per location, compiled one year at a time.
+
+A compiled year holds a day map with one byte per day (1 = working day) and a
+prefix-sum array over it, so the number of working days between two dates is
+two array lookups per year spanned instead of a loop over dates.
+
+Compiled years are cached in this process. Holiday and location edits bump a
+shared version in the Django cache; other processes notice it within
+VERSION_CHECK_INTERVAL seconds and drop their compiled years.
+"""
+import time
+from array import array
+from datetime import date
+from django.core.cache import cache
+from django.db.models import Q
+from accounts.models import DEFAULT_WEEKEND_DAYS, Holiday, Location
+
+VERSION_KEY = "work-calendar-version"
+VERSION_CHECK_INTERVAL = 30
+
+_compiled = {}
+_version = None
+_checked_at = 0.0
+
+
+class CompiledYear:
+    __slots__ = ("year", "first_day", "working", "prefix")
+
+    def __init__(self, year, weekend_days, holidays):
+        self.year = year
+        self.first_day = date(year, 1, 1)
+        length = (date(year + 1, 1, 1) - self.first_day).days
+        first_weekday = self.first_day.weekday()
+        self.working = bytearray(
+            0 if (first_weekday + i) % 7 in weekend_days else 1 for i in range(length)
+        )
+        for holiday in holidays:
+            self.working[(holiday - self.first_day).days] = 0
+        # prefix[i] is the number of working days before day i of the year
+        self.prefix = array("H", [0] * (length + 1))
+        for i, flag in enumerate(self.working):
+            self.prefix[i + 1] = self.prefix[i] + flag
+
+    def is_working(self, day):
+        return self.working[(day - self.first_day).days] == 1
+
+    def count(self, start, end):
+        """
+        Working days in [start, end], both inside this year.
+        """
+        return self.prefix[(end - self.first_day).days + 1] - self.prefix[(start - self.first_day).days]
+
+
+def calendar_version():
+    """
+    Shared version of the holiday and weekend setup, for caches derived from it.
+    """
+    return cache.get(VERSION_KEY, 0)
+
+
+def _sync_version():
+    global _version, _checked_at
+    now = time.monotonic()
+    if now - _checked_at < VERSION_CHECK_INTERVAL:
+        return
+    _checked_at = now
+    version = calendar_version()
+    if version != _version:
+        _compiled.clear()
+        _version = version
+
+
+def compile_year(location_id, year):
+    weekend_days = None
+    if location_id:
+        weekend_days = Location.objects.filter(id=location_id).values_list('weekend_days', flat=True).first()
+    holidays = Holiday.objects.filter(
+        Q(location_id=location_id) | Q(location__isnull=True), date__year=year
+    ).values_list('date', flat=True)
+    return CompiledYear(year, set(DEFAULT_WEEKEND_DAYS if weekend_days is None else weekend_days), holidays)
+
+
+def get_compiled_year(location_id, year):
+    """
+    Compiled calendar of a location (None for users without one) for a year.
+    """
+    _sync_version()
+    key = (location_id, year)
+    compiled = _compiled.get(key)
+    if compiled is None:
+        compiled = _compiled[key] = compile_year(location_id, year)
+    return compiled
+
+
+def is_working_day(location_id, day):
+    return get_compiled_year(location_id, day.year).is_working(day)
+
+
+def working_days(location_id, start, end):
+    """
+    Number of working days from start to end inclusive at a location.
+    """
+    if end < start:
+        return 0
+    total = 0
+    for year in range(start.year, end.year + 1):
+        total += get_compiled_year(location_id, year).count(max(start, date(year, 1, 1)), min(end, date(year, 12, 31)))
+    return total
+
+
+def invalidate_work_calendars():
+    global _checked_at
+    _compiled.clear()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+    _checked_at = 0.0
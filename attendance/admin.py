@@ -1,8 +1,92 @@
-from django.contrib import admin
-from attendance.models import Attendance
+import io
+from django import forms
+from django.contrib import admin, messages
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from attendance.models import Attendance, UserMonthlySummary, DepartmentDailySummary, Absence, ShiftTemplate, ShiftAssignment, PayrollHours
+from attendance.punches import import_punches
+
+
+class PunchUploadForm(forms.Form):
+    file = forms.FileField()
+    format = forms.ChoiceField(choices=[("csv", "CSV"), ("ndjson", "NDJSON")])
+
 
 @admin.register(Attendance)
 class AttendanceAdmin(admin.ModelAdmin):
-    list_display = ('user', 'date', 'check_in', 'check_out', 'work_hours')
+    list_display = ('user', 'date', 'check_in', 'check_out', 'work_hours', 'expected_hours')
     search_fields = ('user__username', 'date')
     list_filter = ('date',)
+    change_list_template = "admin/attendance/attendance/change_list.html"
+
+    def get_urls(self):
+        custom = [
+            path("import-punches/", self.admin_site.admin_view(self.import_punches_view), name="attendance_import_punches"),
+        ]
+        return custom + super().get_urls()
+
+    def import_punches_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect("admin:attendance_attendance_changelist")
+        form = PunchUploadForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            stream = io.TextIOWrapper(upload.file, encoding="utf-8", newline="")
+            report = import_punches(stream, form.cleaned_data["format"])
+            for error in report["errors"]:
+                self.message_user(request, error, messages.WARNING)
+            self.message_user(
+                request,
+                f"Imported {report['rows']} punches with {report['upserts']} user-day upserts "
+                f"({report['rows_per_second']:.0f} rows/s), rejected {report['rejected']}",
+                messages.SUCCESS,
+            )
+            return redirect("admin:attendance_attendance_changelist")
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "form": form,
+            "title": "Import punch log",
+        }
+        return TemplateResponse(request, "admin/attendance/attendance/import_punches.html", context)
+
+
+@admin.register(UserMonthlySummary)
+class UserMonthlySummaryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'month', 'total_hours', 'days_present', 'short_shifts', 'late_arrivals', 'overtime_hours')
+    search_fields = ('user__username',)
+    list_filter = ('month',)
+
+
+@admin.register(DepartmentDailySummary)
+class DepartmentDailySummaryAdmin(admin.ModelAdmin):
+    list_display = ('department', 'date', 'total_hours', 'days_present', 'short_shifts', 'late_arrivals', 'overtime_hours')
+    list_filter = ('department', 'date')
+
+
+@admin.register(Absence)
+class AbsenceAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date')
+    search_fields = ('user__username',)
+    list_filter = ('date',)
+
+
+@admin.register(ShiftTemplate)
+class ShiftTemplateAdmin(admin.ModelAdmin):
+    list_display = ('name', 'start_time', 'end_time', 'expected_hours', 'grace_minutes')
+
+
+@admin.register(ShiftAssignment)
+class ShiftAssignmentAdmin(admin.ModelAdmin):
+    list_display = ('user', 'template', 'effective_from', 'effective_to')
+    search_fields = ('user__username',)
+    list_filter = ('template',)
+    autocomplete_fields = ('user',)
+
+
+@admin.register(PayrollHours)
+class PayrollHoursAdmin(admin.ModelAdmin):
+    list_display = ('user', 'month', 'days_worked', 'regular_hours', 'overtime_hours', 'night_hours', 'computed_at')
+    search_fields = ('user__username',)
+    list_filter = ('month',)
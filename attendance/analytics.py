@@ -0,0 +1,129 @@
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, FloatField, Func, Value
+from django.utils import timezone
+from attendance.models import Attendance, EXPECTED_HOURS, LATE_AFTER
+from attendance.summaries import month_bounds
+
+CACHE_TIMEOUT_CURRENT_MONTH = 15 * 60
+CACHE_TIMEOUT_PAST_MONTH = 24 * 60 * 60
+PERCENTILES = [10, 25, 50, 75, 90]
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+SECONDS_PER_DAY = 86400
+LATE_AFTER_SECONDS = LATE_AFTER.hour * 3600 + LATE_AFTER.minute * 60 + LATE_AFTER.second
+
+
+class LocalEpoch(Func):
+    """
+    Seconds since 1970-01-01 of the wall-clock time in settings.TIME_ZONE, so the
+    time of day and weekday can be derived with plain integer arithmetic.
+    """
+    template = "EXTRACT(EPOCH FROM (%(expressions)s))"
+    arg_joiner = " AT TIME ZONE "
+    output_field = FloatField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, Value(settings.TIME_ZONE), **extra)
+
+
+def load_month_arrays(department_id, month):
+    """
+    Pull one department-month of attendance as parallel NumPy arrays:
+    user ids, local check-in epoch, local check-out epoch (NaN when open),
+    and the shift's local late-after epoch and expected hours (NaN for rows
+    recorded before shifts were resolved).
+    """
+    start, end = month_bounds(month, month)
+    rows = (
+        Attendance.objects
+        .filter(user__department_id=department_id, date__range=(start, end), check_in__isnull=False)
+        .annotate(
+            check_in_epoch=LocalEpoch(F('check_in')),
+            check_out_epoch=LocalEpoch(F('check_out')),
+            late_after_epoch=LocalEpoch(F('late_after')),
+        )
+        .values_list('user_id', 'check_in_epoch', 'check_out_epoch', 'late_after_epoch', 'expected_hours')
+    )
+    data = np.array(list(rows), dtype=np.float64).reshape(-1, 5)
+    return data[:, 0].astype(np.int64), data[:, 1], data[:, 2], data[:, 3], data[:, 4]
+
+
+def _rounded(values, digits=2):
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+def compute_analytics(user_ids, check_in, check_out, late_after, expected_hours):
+    """
+    Vectorized punctuality and hours statistics over one month of shifts.
+    """
+    count = len(check_in)
+    if count == 0:
+        return {"shifts": 0, "employees": 0}
+
+    check_in_day = np.floor(check_in / SECONDS_PER_DAY)
+    weekday = ((check_in_day.astype(np.int64) + 3) % 7)  # 1970-01-01 was a Thursday
+    seconds_of_day = check_in - check_in_day * SECONDS_PER_DAY
+    hour = (seconds_of_day // 3600).astype(np.int64)
+    late = np.where(np.isnan(late_after), seconds_of_day > LATE_AFTER_SECONDS, check_in > late_after)
+    expected_hours = np.where(np.isnan(expected_hours), EXPECTED_HOURS, expected_hours)
+    work_hours = (check_out - check_in) / 3600
+    closed = ~np.isnan(work_hours)
+
+    heatmap = np.bincount(weekday * 24 + hour, minlength=7 * 24).reshape(7, 24)
+    shifts_by_weekday = np.bincount(weekday, minlength=7)
+    late_by_weekday = np.bincount(weekday, weights=late, minlength=7)
+    closed_by_weekday = np.bincount(weekday[closed], minlength=7)
+    hours_by_weekday = np.bincount(weekday[closed], weights=work_hours[closed], minlength=7)
+
+    day_index = (check_in_day - check_in_day.min()).astype(np.int64)
+    first_day = check_in_day.min()
+    shifts_by_day = np.bincount(day_index)
+    late_by_day = np.bincount(day_index, weights=late)
+    closed_by_day = np.bincount(day_index[closed], minlength=len(shifts_by_day))
+    hours_by_day = np.bincount(day_index[closed], weights=work_hours[closed], minlength=len(shifts_by_day))
+    active_days = np.nonzero(shifts_by_day)[0]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "shifts": int(count),
+            "employees": int(len(np.unique(user_ids))),
+            "lateness_rate": round(float(late.mean()), 4),
+            "short_shift_rate": round(float((work_hours[closed] < expected_hours[closed]).mean()), 4) if closed.any() else None,
+            "overtime_hours": round(float(np.maximum(work_hours[closed] - expected_hours[closed], 0).sum()), 2),
+            "check_in_hour_percentiles": dict(zip(PERCENTILES, _rounded(np.percentile(seconds_of_day / 3600, PERCENTILES)))),
+            "work_hours_percentiles": dict(zip(PERCENTILES, _rounded(np.percentile(work_hours[closed], PERCENTILES)))) if closed.any() else None,
+            "check_in_heatmap": {"weekdays": WEEKDAYS, "hours": list(range(24)), "counts": heatmap.tolist()},
+            "by_weekday": {
+                WEEKDAYS[d]: {
+                    "shifts": int(shifts_by_weekday[d]),
+                    "lateness_rate": _rounded([late_by_weekday[d] / shifts_by_weekday[d]], 4)[0],
+                    "avg_work_hours": _rounded([hours_by_weekday[d] / closed_by_weekday[d]])[0],
+                }
+                for d in range(7)
+            },
+            "trend": [
+                {
+                    "date": str(np.datetime64(int(first_day + i), "D")),
+                    "shifts": int(shifts_by_day[i]),
+                    "lateness_rate": round(float(late_by_day[i] / shifts_by_day[i]), 4),
+                    "avg_work_hours": _rounded([hours_by_day[i] / closed_by_day[i]])[0],
+                }
+                for i in active_days
+            ],
+        }
+
+
+def get_department_analytics(department_id, month):
+    """
+    Analytics for a department-month, cached per (department, month).
+    Closed months are cached for a day, the running month for a few minutes.
+    """
+    month = month.replace(day=1)
+    key = f"attendance-analytics:{department_id}:{month:%Y-%m}"
+    result = cache.get(key)
+    if result is None:
+        result = compute_analytics(*load_month_arrays(department_id, month))
+        current = month == timezone.now().date().replace(day=1)
+        cache.set(key, result, CACHE_TIMEOUT_CURRENT_MONTH if current else CACHE_TIMEOUT_PAST_MONTH)
+    return result
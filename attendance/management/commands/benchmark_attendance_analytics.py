@@ -0,0 +1,63 @@
+import time
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from attendance.analytics import compute_analytics, load_month_arrays, LATE_AFTER
+from attendance.models import Attendance
+from attendance.summaries import month_bounds
+
+
+def naive_analytics(department_id, month):
+    """
+    The per-instance ORM loop the vectorized engine replaces, kept for comparison.
+    """
+    start, end = month_bounds(month, month)
+    heatmap = [[0] * 24 for _ in range(7)]
+    late = shifts = 0
+    hours = []
+    records = Attendance.objects.filter(user__department_id=department_id, date__range=(start, end), check_in__isnull=False)
+    for record in records:
+        check_in = timezone.localtime(record.check_in)
+        heatmap[check_in.weekday()][check_in.hour] += 1
+        shifts += 1
+        if (record.check_in > record.late_after) if record.late_after else (check_in.time() > LATE_AFTER):
+            late += 1
+        if record.check_out:
+            hours.append((record.check_out - record.check_in).total_seconds() / 3600)
+    hours.sort()
+    median = hours[len(hours) // 2] if hours else None
+    return {"shifts": shifts, "lateness_rate": late / shifts if shifts else None, "median_hours": median, "heatmap": heatmap}
+
+
+class Command(BaseCommand):
+    help = "Compare the vectorized attendance analytics against a naive ORM loop for one department-month."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--department", type=int, required=True)
+        parser.add_argument("--month", required=True, help="YYYY-MM")
+        parser.add_argument("--runs", type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            month = datetime.strptime(options["month"], "%Y-%m").date()
+        except ValueError:
+            raise CommandError("--month must be in YYYY-MM format")
+        department = options["department"]
+
+        def best_of(fn):
+            timings = []
+            for _ in range(options["runs"]):
+                started = time.perf_counter()
+                result = fn()
+                timings.append(time.perf_counter() - started)
+            return min(timings), result
+
+        naive_time, naive = best_of(lambda: naive_analytics(department, month))
+        vector_time, vector = best_of(lambda: compute_analytics(*load_month_arrays(department, month)))
+        if naive["shifts"] and (naive["shifts"] != vector["shifts"] or naive["heatmap"] != vector["check_in_heatmap"]["counts"]):
+            self.stderr.write("Warning: vectorized results differ from the naive loop")
+        self.stdout.write(f"Shifts analysed: {naive['shifts']}")
+        self.stdout.write(f"Naive ORM loop: {naive_time * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"Vectorized:     {vector_time * 1000:.1f} ms ({naive_time / vector_time:.1f}x faster)"
+        ))
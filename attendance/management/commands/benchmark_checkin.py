@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count
+from django.utils import timezone
+from accounts.models import User
+from attendance.models import Attendance
+
+
+class Command(BaseCommand):
+    help = "Simulate the shift-start check-in rush and report how many check-ins per second are processed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=2000, help="Number of benchmark employees")
+        parser.add_argument("--workers", type=int, default=16, help="Concurrent workers hitting check-in")
+        parser.add_argument("--repeat", type=int, default=2, help="Check-in attempts per employee (duplicates must be rejected)")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark users and rows afterwards")
+
+    def handle(self, *args, **options):
+        n_users = options["users"]
+        prefix = f"bench-checkin-{int(time.time())}"
+        users = User.objects.bulk_create([
+            User(email=f"{prefix}-{i}@example.com", username=f"{prefix}-{i}")
+            for i in range(n_users)
+        ])
+        attempts = [u for u in users for _ in range(options["repeat"])]
+        self.stdout.write(f"Created {len(users)} benchmark users, running {len(attempts)} check-ins with {options['workers']} workers")
+
+        def check_in(user):
+            try:
+                return Attendance.objects.check_in(user) is not None
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            accepted = sum(pool.map(check_in, attempts))
+        elapsed = time.perf_counter() - start
+
+        today = timezone.now().date()
+        duplicates = (
+            Attendance.objects.filter(user__in=users, date=today)
+            .values("user").annotate(n=Count("id")).filter(n__gt=1).count()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(attempts)} check-ins in {elapsed:.2f}s ({len(attempts) / elapsed:.0f}/s), "
+            f"accepted={accepted} rejected={len(attempts) - accepted} duplicate_rows={duplicates}"
+        ))
+
+        if not options["keep"]:
+            User.objects.filter(username__startswith=prefix).delete()
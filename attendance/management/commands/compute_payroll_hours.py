@@ -0,0 +1,40 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from attendance.payroll import compute_department_payroll, payroll_departments
+
+
+def init_worker():
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = "Compute monthly regular, overtime and night hours per employee, one department per worker process."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", required=True, help="YYYY-MM")
+        parser.add_argument("--department", type=int, help="Only this department")
+        parser.add_argument("--workers", type=int, default=4, help="Parallel worker processes")
+
+    def handle(self, *args, **options):
+        try:
+            month = datetime.strptime(options["month"], "%Y-%m").date()
+        except ValueError:
+            raise CommandError("--month must be in YYYY-MM format")
+        departments = [options["department"]] if options["department"] else payroll_departments()
+
+        started = time.perf_counter()
+        if options["workers"] <= 1 or len(departments) == 1:
+            written = sum(compute_department_payroll(department, month) for department in departments)
+        else:
+            # Workers open their own connections; none may be shared across the fork
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options["workers"], initializer=init_worker) as pool:
+                written = sum(pool.map(compute_department_payroll, departments, [month] * len(departments)))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote payroll hours for {written} employees in {len(departments)} departments in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,20 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from attendance.partitions import drop_partitions_before, is_partitioned
+
+
+class Command(BaseCommand):
+    help = "Drop monthly attendance partitions older than a month, instead of deleting rows one by one."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", required=True, help="YYYY-MM; partitions for earlier months are dropped")
+
+    def handle(self, *args, **options):
+        try:
+            cutoff = datetime.strptime(options["before"], "%Y-%m").date()
+        except ValueError:
+            raise CommandError("--before must be in YYYY-MM format")
+        if not is_partitioned():
+            raise CommandError("Attendance is not partitioned; run partition_attendance first")
+        dropped = drop_partitions_before(cutoff)
+        self.stdout.write(self.style.SUCCESS(f"Dropped {len(dropped)} partitions: {', '.join(dropped) or 'none'}"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from attendance.punches import import_punches, DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Stream a turnstile punch export (CSV or NDJSON) into Attendance, pairing punches per user per day."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Punch file with user_id or email and an ISO 8601 timestamp per row")
+        parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="User-days buffered per upsert")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+        try:
+            with open(path, newline="", encoding="utf-8") as stream:
+                report = import_punches(stream, fmt, batch_size=options["batch_size"])
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+        for error in report["errors"]:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['rows']} punches with {report['upserts']} user-day upserts in "
+            f"{report['elapsed']:.2f}s ({report['rows_per_second']:.0f} rows/s), rejected {report['rejected']}"
+        ))
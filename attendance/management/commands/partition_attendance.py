@@ -0,0 +1,37 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from attendance.models import Attendance
+from attendance.partitions import (
+    convert_to_partitioned, is_partitioned, list_partitions, scanned_partitions, add_months, DEFAULT_MONTHS_AHEAD
+)
+
+
+class Command(BaseCommand):
+    help = "Convert the attendance table to monthly range partitions on date, then verify date-range pruning."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--months-ahead", type=int, default=DEFAULT_MONTHS_AHEAD, help="Future monthly partitions to pre-create")
+        parser.add_argument("--keep-legacy", action="store_true", help="Keep the old table as <table>_legacy")
+        parser.add_argument("--verify-month", help="YYYY-MM to check partition pruning for (defaults to the newest partition)")
+
+    def handle(self, *args, **options):
+        if is_partitioned():
+            self.stdout.write("Attendance is already partitioned")
+        else:
+            self.stdout.write("Converting attendance to monthly partitions; the table is locked until this finishes")
+            copied = convert_to_partitioned(months_ahead=options["months_ahead"], keep_legacy=options["keep_legacy"])
+            self.stdout.write(self.style.SUCCESS(f"Copied {copied} rows into {len(list_partitions())} monthly partitions"))
+
+        if options["verify_month"]:
+            try:
+                month = datetime.strptime(options["verify_month"], "%Y-%m").date()
+            except ValueError:
+                raise CommandError("--verify-month must be in YYYY-MM format")
+        else:
+            month = list_partitions()[-1][1]
+        queryset = Attendance.objects.filter(date__gte=month, date__lt=add_months(month, 1)).order_by('-date')
+        scanned = scanned_partitions(queryset)
+        if len(scanned) == 1:
+            self.stdout.write(self.style.SUCCESS(f"Query for {month:%Y-%m} prunes to {scanned[0]}"))
+        else:
+            self.stderr.write(f"Query for {month:%Y-%m} scans {len(scanned)} partitions: {', '.join(scanned)}")
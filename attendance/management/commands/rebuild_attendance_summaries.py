@@ -0,0 +1,26 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from attendance.summaries import rebuild_summaries, month_bounds
+
+
+class Command(BaseCommand):
+    help = "Recompute the monthly user and daily department attendance summaries for a date range."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", required=True, help="First date to rebuild (YYYY-MM-DD)")
+        parser.add_argument("--end", required=True, help="Last date to rebuild (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options["start"])
+            end = date.fromisoformat(options["end"])
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+        if start > end:
+            raise CommandError("--start must not be after --end")
+        monthly_rows, daily_rows = rebuild_summaries(start, end)
+        month_start, month_end = month_bounds(start, end)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {monthly_rows} monthly rows ({month_start} to {month_end}) "
+            f"and {daily_rows} department-day rows ({start} to {end})"
+        ))
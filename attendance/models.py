@@ -1,20 +1,340 @@
-from django.db import models
+from datetime import time, timedelta
+from django.conf import settings
+from django.db import models, connections
 from django.utils import timezone
-from accounts.models import User
+from accounts.models import User, Department, Location, Holiday, DEFAULT_WEEKEND_DAYS
+from core.models import FieldTrackerMixin, ListQuerySet
+from core.utils import status_forms
+from leaves.models import Leave
 
+# Shift for users without a ShiftAssignment; LATE_AFTER also applies to rows
+# recorded before shifts were resolved at check-in.
+EXPECTED_HOURS = 8
+SHIFT_START = time(9, 0)
+SHIFT_END = time(17, 0)
+GRACE_MINUTES = 30
+LATE_AFTER = time(9, 30)
+# How far back the short-shift job looks for shifts closed since its last run
+SHORTFALL_LOOKBACK_DAYS = 7
 
-class Attendance(models.Model):
+# Per-row shortfall, lateness and overtime against the shift stored on the row `c`,
+# falling back to the default shift for rows recorded before shifts were resolved.
+# Expects the "expected", "tz" and "late_after" query parameters.
+SHIFT_FACTS = """
+    (c.work_hours < COALESCE(c.expected_hours, %(expected)s))::int AS short_shift,
+    COALESCE(c.check_in > c.late_after, (c.check_in AT TIME ZONE %(tz)s)::time > %(late_after)s)::int AS late,
+    GREATEST(c.work_hours - COALESCE(c.expected_hours, %(expected)s), 0) AS overtime
+"""
+
+
+class AttendanceQuerySet(ListQuerySet):
+    # What AttendanceSerializer renders
+    list_select_related = ('user',)
+    list_only = (
+        'id', 'date', 'check_in', 'check_out', 'work_hours', 'expected_hours', 'late_after', 'shift_end',
+        'user__username',
+    )
+
+
+class AttendanceManager(models.Manager.from_queryset(AttendanceQuerySet)):
+    def check_in(self, user, when=None):
+        """
+        Insert the user's row for today in a single statement, with the shift
+        they are expected to work resolved from cache.
+        Returns the new row's date, or None if the user already checked in today.
+        """
+        from attendance.shifts import resolve_shift
+        when = when or timezone.now()
+        day = timezone.localtime(when).date()
+        shift = resolve_shift(user.pk, day)
+        table = self.model._meta.db_table
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (user_id, date, check_in, expected_hours, late_after, shift_end) "
+                f"VALUES (%s, %s, %s, %s, %s, %s) ON CONFLICT (user_id, date) DO NOTHING RETURNING date",
+                [user.pk, day, when, shift.expected_hours, shift.late_after, shift.end],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    def check_out(self, user, when=None):
+        """
+        Close the user's open row for the shift `when` belongs to (yesterday's
+        for a night shift) in a single conditional UPDATE, computing work_hours
+        in SQL. The same statement folds the closed shift into the (user, month)
+        and (department, day) summaries, judging shortfall, overtime and
+        lateness against the shift stored at check-in.
+        Returns (work_hours, date) for the shift's date; work_hours is None if
+        there was no open check-in to close on it.
+        """
+        from attendance.shifts import shift_day
+        when = when or timezone.now()
+        day = shift_day(user.pk, when)
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH closed AS (
+                    UPDATE {self.model._meta.db_table} SET check_out = %(when)s,
+                        work_hours = ROUND((EXTRACT(EPOCH FROM (%(when)s - check_in)) / 3600)::numeric, 2)
+                    WHERE user_id = %(user_id)s AND date = %(date)s
+                        AND check_in IS NOT NULL AND check_out IS NULL
+                    RETURNING user_id, date, check_in, work_hours, expected_hours, late_after
+                ), facts AS (
+                    SELECT c.user_id, u.department_id, c.date, c.work_hours,
+                        {SHIFT_FACTS}
+                    FROM closed c JOIN {User._meta.db_table} u ON u.id = c.user_id
+                ), monthly AS (
+                    INSERT INTO {UserMonthlySummary._meta.db_table} AS s
+                        (user_id, month, total_hours, days_present, short_shifts, late_arrivals, overtime_hours)
+                    SELECT user_id, date_trunc('month', date)::date, work_hours, 1, short_shift, late, overtime FROM facts
+                    ON CONFLICT (user_id, month) DO UPDATE SET
+                        total_hours = s.total_hours + EXCLUDED.total_hours,
+                        days_present = s.days_present + 1,
+                        short_shifts = s.short_shifts + EXCLUDED.short_shifts,
+                        late_arrivals = s.late_arrivals + EXCLUDED.late_arrivals,
+                        overtime_hours = s.overtime_hours + EXCLUDED.overtime_hours
+                ), daily AS (
+                    INSERT INTO {DepartmentDailySummary._meta.db_table} AS s
+                        (department_id, date, total_hours, days_present, short_shifts, late_arrivals, overtime_hours)
+                    SELECT department_id, date, work_hours, 1, short_shift, late, overtime FROM facts
+                    WHERE department_id IS NOT NULL
+                    ON CONFLICT (department_id, date) DO UPDATE SET
+                        total_hours = s.total_hours + EXCLUDED.total_hours,
+                        days_present = s.days_present + 1,
+                        short_shifts = s.short_shifts + EXCLUDED.short_shifts,
+                        late_arrivals = s.late_arrivals + EXCLUDED.late_arrivals,
+                        overtime_hours = s.overtime_hours + EXCLUDED.overtime_hours
+                )
+                SELECT work_hours FROM closed
+                """,
+                {
+                    "when": when,
+                    "user_id": user.pk,
+                    "date": day,
+                    "expected": EXPECTED_HOURS,
+                    "tz": settings.TIME_ZONE,
+                    "late_after": LATE_AFTER,
+                },
+            )
+            row = cursor.fetchone()
+        return (row[0] if row else None), day
+
+    def claim_short_shifts(self, day):
+        """
+        Mark every closed shift dated up to `day` (within the last
+        SHORTFALL_LOOKBACK_DAYS) shorter than its expected hours as notified
+        and return their (user_id, work_hours, expected_hours) in one
+        statement. Night shifts that were still open at an earlier run, and
+        days a run was missed, are claimed by the next run; rows already
+        claimed are skipped, so the job can safely re-run.
+        """
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {self.model._meta.db_table} SET shortfall_notified = TRUE "
+                f"WHERE date BETWEEN %(since)s AND %(day)s "
+                f"AND work_hours < COALESCE(expected_hours, %(expected)s) AND NOT shortfall_notified "
+                f"RETURNING user_id, work_hours, COALESCE(expected_hours, %(expected)s)",
+                {"since": day - timedelta(days=SHORTFALL_LOOKBACK_DAYS), "day": day, "expected": EXPECTED_HOURS},
+            )
+            return cursor.fetchall()
+
+    def record_absences(self, day):
+        """
+        Record every active user with neither an attendance row nor an approved
+        leave covering `day`, as one anti-join INSERT ... SELECT. Users whose
+        location has `day` as a weekend day or holiday are skipped.
+        Returns the user ids newly marked absent.
+        """
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {Absence._meta.db_table} (user_id, date)
+                SELECT u.id, %(day)s FROM {User._meta.db_table} u
+                LEFT JOIN {Location._meta.db_table} loc ON loc.id = u.location_id
+                WHERE u.is_active AND u.date_joined::date <= %(day)s
+                    AND NOT %(weekday)s = ANY(COALESCE(loc.weekend_days, %(default_weekend)s::smallint[]))
+                    AND NOT EXISTS (
+                        SELECT 1 FROM {Holiday._meta.db_table} h
+                        WHERE h.date = %(day)s AND (h.location_id = u.location_id OR h.location_id IS NULL)
+                    )
+                    AND NOT EXISTS (
+                        SELECT 1 FROM {self.model._meta.db_table} a
+                        WHERE a.user_id = u.id AND a.date = %(day)s
+                    )
+                    AND NOT EXISTS (
+                        SELECT 1 FROM {Leave._meta.db_table} l
+                        WHERE l.user_id = u.id AND l.status = ANY(%(approved)s)
+                            AND l.start_date <= %(day)s AND l.end_date >= %(day)s
+                    )
+                ON CONFLICT (user_id, date) DO NOTHING
+                RETURNING user_id
+                """,
+                {
+                    "day": day, "weekday": day.weekday(), "default_weekend": list(DEFAULT_WEEKEND_DAYS),
+                    "approved": status_forms('approved'),
+                },
+            )
+            return [user_id for user_id, in cursor.fetchall()]
+
+
+class ShiftTemplate(models.Model):
+    """
+    A named working window. An end_time at or before start_time ends the next day.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    expected_hours = models.DecimalField(max_digits=4, decimal_places=2)
+    grace_minutes = models.PositiveSmallIntegerField(default=0)  # check-ins after start + grace are late
+
+    def __str__(self):
+        return f"{self.name} ({self.start_time:%H:%M}-{self.end_time:%H:%M})"
+
+
+class ShiftAssignment(models.Model):
+    """
+    The shift a user works from effective_from until effective_to (inclusive,
+    open-ended when empty). Where assignments overlap the newest one applies,
+    so a rotation is a series of short assignments over a standing one.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='shift_assignments')
+    template = models.ForeignKey(ShiftTemplate, on_delete=models.PROTECT, related_name='assignments')
+    effective_from = models.DateField()
+    effective_to = models.DateField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'effective_from'], name='unique_shift_assignment_user_start'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.template.name} from {self.effective_from}"
+
+
+class Attendance(FieldTrackerMixin, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_records')
     date = models.DateField(default=timezone.now)
     check_in = models.DateTimeField(null=True, blank=True)
     check_out = models.DateTimeField(null=True, blank=True)
     work_hours = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    shortfall_notified = models.BooleanField(db_default=False)
+    # The shift resolved at check-in, so later schedule changes don't rewrite history
+    expected_hours = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
+    late_after = models.DateTimeField(null=True, blank=True)
+    shift_end = models.DateTimeField(null=True, blank=True)
+
+    objects = AttendanceManager()
+
+    # Everything the summaries are computed from
+    tracked_fields = ('user', 'date', 'check_in', 'check_out', 'work_hours', 'expected_hours', 'late_after')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_attendance_user_date'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='attendance_date_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        if self.check_in and self.check_out:
+        if self.check_in and self.expected_hours is None:
+            from attendance.shifts import resolve_shift
+            shift = resolve_shift(self.user_id, self.date)
+            self.expected_hours, self.late_after, self.shift_end = shift.expected_hours, shift.late_after, shift.end
+        if self.check_in and self.check_out and (self.has_changed('check_in') or self.has_changed('check_out')):
             duration = self.check_out - self.check_in
             self.work_hours = round(duration.total_seconds() / 3600, 2)
         super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user.username} - {self.date}"
+
+
+class UserMonthlySummary(models.Model):
+    """
+    Closed shifts rolled up per user per month. Maintained by check-out,
+    refolded when a row is edited or deleted, and recomputed by the
+    rebuild_attendance_summaries command.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_attendance')
+    month = models.DateField()  # first day of the month
+    total_hours = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    days_present = models.PositiveIntegerField(default=0)
+    short_shifts = models.PositiveIntegerField(default=0)
+    late_arrivals = models.PositiveIntegerField(default=0)
+    overtime_hours = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='unique_monthly_summary_user_month'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.month:%Y-%m}"
+
+
+class DepartmentDailySummary(models.Model):
+    """
+    Closed shifts rolled up per department per day.
+    """
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='daily_attendance')
+    date = models.DateField()
+    total_hours = models.DecimalField(max_digits=9, decimal_places=2, default=0)
+    days_present = models.PositiveIntegerField(default=0)
+    short_shifts = models.PositiveIntegerField(default=0)
+    late_arrivals = models.PositiveIntegerField(default=0)
+    overtime_hours = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['department', 'date'], name='unique_daily_summary_department_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.department.name} - {self.date}"
+
+
+class Absence(models.Model):
+    """
+    A working day on which an active employee neither checked in nor had an
+    approved leave. Written by the detect_absences job.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='absences')
+    date = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_absence_user_date'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='absence_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} absent on {self.date}"
+
+
+class PayrollHours(models.Model):
+    """
+    Hours per user per month for payroll, written in bulk by attendance.payroll.
+    Regular plus overtime hours equal the hours worked; night hours are the
+    part of them inside the night window and overlap the other two.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='payroll_hours')
+    month = models.DateField()  # first day of the month
+    days_worked = models.PositiveIntegerField(default=0)
+    regular_hours = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    overtime_hours = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    night_hours = models.DecimalField(max_digits=7, decimal_places=2, default=0)
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='unique_payroll_hours_user_month'),
+        ]
+        indexes = [
+            models.Index(fields=['month'], name='payroll_hours_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.month:%Y-%m}"
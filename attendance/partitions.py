@@ -0,0 +1,206 @@
+"""
+PostgreSQL declarative range partitioning of Attendance by month of `date`.
+
+Django keeps treating `id` as the primary key; in the database the key becomes
+(id, date) because every unique constraint on a partitioned table has to
+include the partition key. The (user, date) constraint already does.
+"""
+import logging
+import re
+from datetime import date
+from django.db import connection, transaction
+from django.utils import timezone
+from attendance.models import Attendance
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MONTHS_AHEAD = 3
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{Attendance._meta.db_table}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [Attendance._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """
+    Return [(partition_name, first_day_of_month)] for the monthly partitions,
+    oldest first. The DEFAULT partition is not included.
+    """
+    table = Attendance._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [table],
+        )
+        names = [name for name, in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        suffix = name[len(table) + 1:]
+        if len(suffix) == 8 and suffix[0] == "y" and suffix[5] == "m":
+            partitions.append((name, date(int(suffix[1:5]), int(suffix[6:8]), 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def default_partition_name():
+    return f"{Attendance._meta.db_table}_default"
+
+
+def create_partitions(first_month, last_month):
+    """
+    Create any missing monthly partitions from first_month to last_month inclusive.
+    Rows the DEFAULT partition already holds for a new month (written while
+    partitions were not created ahead) are moved into it.
+    Returns the names of the partitions created.
+    """
+    table = Attendance._meta.db_table
+    default = default_partition_name()
+    columns = ", ".join(f.column for f in Attendance._meta.concrete_fields)
+    existing = {name for name, _ in list_partitions()}
+    created = []
+    month = first_month.replace(day=1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [default])
+        has_default = cursor.fetchone()[0]
+        while month <= last_month:
+            name = partition_name(month)
+            bounds = [month, add_months(month, 1)]
+            if name not in existing:
+                stranded = False
+                if has_default:
+                    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {default} WHERE date >= %s AND date < %s)", bounds)
+                    stranded = cursor.fetchone()[0]
+                if stranded:
+                    # A partition cannot be created over rows the DEFAULT
+                    # partition holds for its range: build it as a plain table,
+                    # move the rows, then attach it
+                    logger.warning(f"Moving {month:%Y-%m} attendance rows out of {default} into {name}")
+                    cursor.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+                    cursor.execute(
+                        f"WITH moved AS (DELETE FROM {default} WHERE date >= %s AND date < %s RETURNING {columns}) "
+                        f"INSERT INTO {name} ({columns}) SELECT {columns} FROM moved",
+                        bounds,
+                    )
+                    cursor.execute(f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", bounds)
+                else:
+                    cursor.execute(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                        f"FOR VALUES FROM (%s) TO (%s)",
+                        bounds,
+                    )
+                created.append(name)
+            month = add_months(month, 1)
+    return created
+
+
+def ensure_future_partitions(today, months_ahead=DEFAULT_MONTHS_AHEAD):
+    """
+    Pre-create partitions for the current month and the next months_ahead.
+    Does nothing while the table has not been converted.
+    """
+    if not is_partitioned():
+        return []
+    month = today.replace(day=1)
+    return create_partitions(month, add_months(month, months_ahead))
+
+
+def drop_partitions_before(cutoff_month):
+    """
+    Detach and drop every monthly partition that ends on or before cutoff_month,
+    replacing row-by-row deletes of old attendance. Returns the dropped names.
+    """
+    table = Attendance._meta.db_table
+    dropped = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for name, month in list_partitions():
+            if add_months(month, 1) <= cutoff_month:
+                cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+                cursor.execute(f"DROP TABLE {name}")
+                dropped.append(name)
+    return dropped
+
+
+def convert_to_partitioned(months_ahead=DEFAULT_MONTHS_AHEAD, keep_legacy=False, today=None):
+    """
+    Rebuild the plain attendance table as a monthly range-partitioned table in
+    one transaction, keeping Django's column, constraint and index names.
+    Existing rows are copied into their monthly partitions.
+    Returns the number of rows copied.
+    """
+    table = Attendance._meta.db_table
+    legacy = f"{table}_legacy"
+    today = today or timezone.now().date()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass",
+            [table],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            "SELECT c.relname, pg_get_indexdef(c.oid) FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE i.indrelid = %s::regclass AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = c.oid)",
+            [table],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(f"SELECT MIN(date) FROM {table}")
+        first_date = cursor.fetchone()[0] or today
+
+        # Index names are schema-wide, so move the old ones out of the way first.
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        cursor.execute(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE i.indrelid = %s::regclass",
+            [legacy],
+        )
+        for name, in cursor.fetchall():
+            cursor.execute(f'ALTER INDEX "{name}" RENAME TO "{name[:52]}_legacy"')
+
+        cursor.execute(
+            f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING IDENTITY) PARTITION BY RANGE (date)"
+        )
+        for name, kind, definition in constraints:
+            if kind == "p":
+                definition = "PRIMARY KEY (id, date)"
+            cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+        for name, definition in indexes:
+            cursor.execute(definition)
+
+        first_month = first_date.replace(day=1)
+        create_partitions(first_month, add_months(today.replace(day=1), months_ahead))
+        cursor.execute(f"CREATE TABLE {default_partition_name()} PARTITION OF {table} DEFAULT")
+
+        columns = ", ".join(f.column for f in Attendance._meta.concrete_fields)
+        cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {legacy}")
+        copied = cursor.rowcount
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {table}",
+            [table],
+        )
+        if not keep_legacy:
+            cursor.execute(f"DROP TABLE {legacy}")
+    logger.info(f"Partitioned {table}: {copied} rows copied")
+    return copied
+
+
+def scanned_partitions(queryset):
+    """
+    Return the attendance partitions the planner will read for a queryset,
+    to verify that date-range filters prune.
+    """
+    table = Attendance._meta.db_table
+    pattern = re.compile(rf"{table}_(y\d{{4}}m\d{{2}}|default)")
+    return sorted({word for word in queryset.explain().split() if pattern.fullmatch(word)})
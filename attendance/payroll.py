@@ -0,0 +1,131 @@
+"""
+Monthly payroll hours computed over NumPy arrays of attendance intervals.
+
+One department-month is loaded with a single query as parallel arrays, split
+into regular, overtime and night hours with interval arithmetic over the whole
+month at once, and written back with one DELETE and one INSERT. Departments
+are independent, so they can be computed in parallel worker processes.
+"""
+import logging
+from datetime import time
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import F
+from accounts.models import Department, User
+from attendance.analytics import LocalEpoch
+from attendance.models import Attendance, PayrollHours, EXPECTED_HOURS
+from attendance.summaries import month_bounds
+
+logger = logging.getLogger(__name__)
+
+NIGHT_START = time(22, 0)
+NIGHT_END = time(6, 0)
+SECONDS_PER_DAY = 86400
+
+INSERT_SQL = f"""
+    INSERT INTO {PayrollHours._meta.db_table}
+        (user_id, month, days_worked, regular_hours, overtime_hours, night_hours, computed_at)
+    SELECT user_id, %s, days_worked, regular_hours, overtime_hours, night_hours, now()
+    FROM unnest(%s::bigint[], %s::int[], %s::numeric[], %s::numeric[], %s::numeric[])
+        AS p(user_id, days_worked, regular_hours, overtime_hours, night_hours)
+"""
+
+
+def _seconds(value):
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def department_users(department_id):
+    users = User.objects.all()
+    if department_id is None:
+        return users.filter(department__isnull=True)
+    return users.filter(department_id=department_id)
+
+
+def load_month_intervals(department_id, month):
+    """
+    Closed shifts of a department-month as parallel arrays: user ids, local
+    check-in and check-out epochs, and expected hours (NaN where unknown).
+    """
+    start, end = month_bounds(month, month)
+    rows = (
+        Attendance.objects
+        .filter(user__in=department_users(department_id), date__range=(start, end), check_out__isnull=False)
+        .annotate(check_in_epoch=LocalEpoch(F('check_in')), check_out_epoch=LocalEpoch(F('check_out')))
+        .values_list('user_id', 'check_in_epoch', 'check_out_epoch', 'expected_hours')
+    )
+    data = np.array(list(rows), dtype=np.float64).reshape(-1, 4)
+    return data[:, 0].astype(np.int64), data[:, 1], data[:, 2], data[:, 3]
+
+
+def night_overlap(check_in, check_out, night_start=NIGHT_START, night_end=NIGHT_END):
+    """
+    Seconds of each [check_in, check_out] interval that fall inside the nightly
+    window, for local epochs. Windows starting the day before, on and after the
+    check-in day are intersected, which covers shifts of up to a day.
+    """
+    start = _seconds(night_start)
+    length = (_seconds(night_end) - start) % SECONDS_PER_DAY
+    day = np.floor(check_in / SECONDS_PER_DAY) * SECONDS_PER_DAY
+    total = np.zeros_like(check_in)
+    for offset in (-1, 0, 1):
+        window_start = day + offset * SECONDS_PER_DAY + start
+        window_end = window_start + length
+        total += np.clip(np.minimum(check_out, window_end) - np.maximum(check_in, window_start), 0, None)
+    return total
+
+
+def compute_payroll(user_ids, check_in, check_out, expected_hours):
+    """
+    Per-user totals for a month of shifts. Overtime is counted per shift as the
+    hours beyond that shift's expected hours.
+    Returns (user_ids, days_worked, regular_hours, overtime_hours, night_hours).
+    """
+    if len(user_ids) == 0:
+        empty = np.zeros(0)
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), empty, empty, empty
+    worked = (check_out - check_in) / 3600
+    expected = np.where(np.isnan(expected_hours), EXPECTED_HOURS, expected_hours)
+    overtime = np.maximum(worked - expected, 0)
+    night = night_overlap(check_in, check_out) / 3600
+
+    users, index = np.unique(user_ids, return_inverse=True)
+    days_worked = np.bincount(index)
+    return (
+        users,
+        days_worked,
+        np.bincount(index, weights=worked - overtime).round(2),
+        np.bincount(index, weights=overtime).round(2),
+        np.bincount(index, weights=night).round(2),
+    )
+
+
+def write_payroll(department_id, month, results):
+    """
+    Replace the department-month's payroll rows with one DELETE and one INSERT.
+    """
+    users, days_worked, regular, overtime, night = results
+    with transaction.atomic(), connection.cursor() as cursor:
+        PayrollHours.objects.filter(month=month, user__in=department_users(department_id)).delete()
+        cursor.execute(INSERT_SQL, [
+            month, users.tolist(), days_worked.tolist(), regular.tolist(), overtime.tolist(), night.tolist(),
+        ])
+    return len(users)
+
+
+def compute_department_payroll(department_id, month):
+    """
+    Compute and store payroll hours for one department-month (department_id
+    None for users without a department). Returns the number of rows written.
+    """
+    month = month.replace(day=1)
+    written = write_payroll(department_id, month, compute_payroll(*load_month_intervals(department_id, month)))
+    logger.info(f"Payroll hours for department {department_id} {month:%Y-%m}: {written} employees")
+    return written
+
+
+def payroll_departments():
+    """
+    Every unit of payroll work: each department plus users without one.
+    """
+    return list(Department.objects.values_list('id', flat=True)) + [None]
@@ -0,0 +1,177 @@
+import csv
+import json
+import logging
+import time
+from datetime import datetime
+from django.db import connection
+from django.utils import timezone
+from accounts.models import User
+from attendance.models import Attendance
+from attendance.shifts import load_assignments, resolve_shift, shift_day
+from attendance.summaries import rebuild_summaries
+from attendance.team_calendar import invalidate_calendar
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+
+# Each flushed (user, day) is merged with whatever is already stored, so batches
+# can be flushed in any order: check_in is the earliest punch seen so far and
+# check_out the latest, or NULL while only a single punch exists. A shift
+# already stored on the row is kept.
+UPSERT_SQL = """
+    INSERT INTO {table} AS a (user_id, date, check_in, check_out, work_hours, expected_hours, late_after, shift_end)
+    SELECT p.user_id, p.date, p.first_punch, NULLIF(p.last_punch, p.first_punch),
+        ROUND((EXTRACT(EPOCH FROM (NULLIF(p.last_punch, p.first_punch) - p.first_punch)) / 3600)::numeric, 2),
+        p.expected_hours, p.late_after, p.shift_end
+    FROM unnest(
+        %s::bigint[], %s::date[], %s::timestamptz[], %s::timestamptz[],
+        %s::numeric[], %s::timestamptz[], %s::timestamptz[]
+    ) AS p(user_id, date, first_punch, last_punch, expected_hours, late_after, shift_end)
+    ON CONFLICT (user_id, date) DO UPDATE SET
+        expected_hours = COALESCE(a.expected_hours, EXCLUDED.expected_hours),
+        late_after = COALESCE(a.late_after, EXCLUDED.late_after),
+        shift_end = COALESCE(a.shift_end, EXCLUDED.shift_end),
+        check_in = LEAST(a.check_in, EXCLUDED.check_in),
+        check_out = NULLIF(
+            GREATEST(a.check_in, a.check_out, EXCLUDED.check_in, EXCLUDED.check_out),
+            LEAST(a.check_in, EXCLUDED.check_in)
+        ),
+        work_hours = ROUND((EXTRACT(EPOCH FROM (
+            NULLIF(
+                GREATEST(a.check_in, a.check_out, EXCLUDED.check_in, EXCLUDED.check_out),
+                LEAST(a.check_in, EXCLUDED.check_in)
+            ) - LEAST(a.check_in, EXCLUDED.check_in)
+        )) / 3600)::numeric, 2)
+"""
+
+
+def read_punches(stream, fmt):
+    """
+    Yield (line_number, record) from a CSV or NDJSON text stream, one row at a time.
+    """
+    if fmt == "csv":
+        for line_number, row in enumerate(csv.DictReader(stream), start=2):
+            yield line_number, row
+    elif fmt == "ndjson":
+        for line_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError:
+                yield line_number, None
+    else:
+        raise ValueError(f"Unsupported punch format: {fmt}")
+
+
+def parse_timestamp(value):
+    punched_at = datetime.fromisoformat(str(value).strip())
+    if timezone.is_naive(punched_at):
+        punched_at = timezone.make_aware(punched_at)
+    return punched_at
+
+
+class PunchImporter:
+    """
+    Pair raw turnstile punches into one Attendance row per user per day.
+
+    Punches are folded into an in-memory (user, day) -> (first, last) map that is
+    flushed once it holds batch_size days, so memory is bounded by the batch size
+    rather than the file size. Punches are assigned to the day of the shift they
+    belong to, so night shifts stay on one row; shift assignments are loaded
+    once up front.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.user_ids = set(User.objects.values_list('id', flat=True))
+        self.ids_by_email = dict(User.objects.values_list('email', 'id'))
+        self.assignments = load_assignments(self.user_ids)
+        self.pending = {}
+        self.rows = 0
+        self.upserts = 0
+        self.rejected = 0
+        self.errors = []
+        self.first_date = None
+        self.last_date = None
+
+    def reject(self, line_number, reason):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line_number}: {reason}")
+
+    def resolve_user(self, record):
+        user_id = record.get("user_id")
+        if user_id not in (None, ""):
+            user_id = int(user_id)
+            return user_id if user_id in self.user_ids else None
+        return self.ids_by_email.get((record.get("email") or "").strip())
+
+    def add(self, line_number, record):
+        self.rows += 1
+        if not isinstance(record, dict):
+            self.reject(line_number, "malformed row")
+            return
+        try:
+            user_id = self.resolve_user(record)
+        except (TypeError, ValueError):
+            user_id = None
+        if user_id is None:
+            self.reject(line_number, "unknown user")
+            return
+        try:
+            punched_at = parse_timestamp(record.get("timestamp"))
+        except (TypeError, ValueError):
+            self.reject(line_number, f"invalid timestamp {record.get('timestamp')!r}")
+            return
+
+        day = shift_day(user_id, punched_at, self.assignments)
+        key = (user_id, day)
+        first, last = self.pending.get(key, (punched_at, punched_at))
+        self.pending[key] = (min(first, punched_at), max(last, punched_at))
+        self.first_date = min(self.first_date, day) if self.first_date else day
+        self.last_date = max(self.last_date, day) if self.last_date else day
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        columns = [[] for _ in range(7)]
+        for (user_id, day), (first, last) in self.pending.items():
+            shift = resolve_shift(user_id, day, self.assignments)
+            for column, value in zip(columns, (user_id, day, first, last, shift.expected_hours, shift.late_after, shift.end)):
+                column.append(value)
+        with connection.cursor() as cursor:
+            cursor.execute(UPSERT_SQL.format(table=Attendance._meta.db_table), columns)
+        self.upserts += len(self.pending)
+        self.pending = {}
+
+
+def import_punches(stream, fmt, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Stream a punch file into Attendance and refresh the summaries it touched.
+    Returns a dict report with row counts, throughput and the first rejected rows.
+    """
+    started = time.perf_counter()
+    importer = PunchImporter(batch_size=batch_size)
+    for line_number, record in read_punches(stream, fmt):
+        importer.add(line_number, record)
+    importer.flush()
+    if importer.first_date:
+        rebuild_summaries(importer.first_date, importer.last_date)
+        invalidate_calendar(None, importer.first_date, importer.last_date)
+    elapsed = time.perf_counter() - started
+    report = {
+        "rows": importer.rows,
+        "upserts": importer.upserts,
+        "rejected": importer.rejected,
+        "errors": importer.errors,
+        "elapsed": elapsed,
+        "rows_per_second": importer.rows / elapsed if elapsed else 0,
+    }
+    logger.info(f"Punch import finished: {report['rows']} rows, {report['rejected']} rejected in {elapsed:.2f}s")
+    return report
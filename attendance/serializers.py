@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from attendance.models import Attendance
+from attendance.models import Attendance, UserMonthlySummary, DepartmentDailySummary, PayrollHours
 
 
 class AttendanceSerializer(serializers.ModelSerializer):
@@ -7,4 +7,26 @@ class AttendanceSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Attendance
-        fields = ['id', 'user', 'date', 'check_in', 'check_out', 'work_hours']
+        fields = ['id', 'user', 'date', 'check_in', 'check_out', 'work_hours', 'expected_hours', 'late_after', 'shift_end']
+
+
+class UserMonthlySummarySerializer(serializers.ModelSerializer):
+    user = serializers.StringRelatedField(read_only=True)
+
+    class Meta:
+        model = UserMonthlySummary
+        fields = ['user', 'month', 'total_hours', 'days_present', 'short_shifts', 'late_arrivals', 'overtime_hours']
+
+
+class DepartmentDailySummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DepartmentDailySummary
+        fields = ['department', 'date', 'total_hours', 'days_present', 'short_shifts', 'late_arrivals', 'overtime_hours']
+
+
+class PayrollHoursSerializer(serializers.ModelSerializer):
+    user = serializers.StringRelatedField(read_only=True)
+
+    class Meta:
+        model = PayrollHours
+        fields = ['user', 'month', 'days_worked', 'regular_hours', 'overtime_hours', 'night_hours', 'computed_at']
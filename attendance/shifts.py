@@ -0,0 +1,89 @@
+"""
+Resolve the expected working window of a user on a given day.
+
+A user's shift assignments are cached as a short list per user, so resolving
+a shift at check-in or check-out costs one cache read rather than a query.
+Assignment and template edits drop the affected users' entries.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.utils import timezone
+from attendance.models import ShiftAssignment, EXPECTED_HOURS, SHIFT_START, SHIFT_END, GRACE_MINUTES
+
+CACHE_TIMEOUT = 24 * 60 * 60
+
+Shift = namedtuple("Shift", ["start", "end", "late_after", "expected_hours"])
+
+DEFAULT_TEMPLATE = (SHIFT_START, SHIFT_END, Decimal(EXPECTED_HOURS), GRACE_MINUTES)
+
+
+def assignments_cache_key(user_id):
+    return f"shift-assignments:{user_id}"
+
+
+def _assignment_rows(queryset):
+    return queryset.order_by('user_id', '-effective_from').values_list(
+        'user_id', 'effective_from', 'effective_to',
+        'template__start_time', 'template__end_time', 'template__expected_hours', 'template__grace_minutes',
+    )
+
+
+def load_assignments(user_ids):
+    """
+    {user_id: [(effective_from, effective_to, template), ...]} newest first,
+    for resolving many users' shifts from one query, as punch imports do.
+    """
+    assignments = {user_id: [] for user_id in user_ids}
+    for user_id, effective_from, effective_to, *template in _assignment_rows(
+        ShiftAssignment.objects.filter(user_id__in=user_ids)
+    ):
+        assignments[user_id].append((effective_from, effective_to, tuple(template)))
+    return assignments
+
+
+def get_assignments(user_id):
+    key = assignments_cache_key(user_id)
+    rows = cache.get(key)
+    if rows is None:
+        rows = load_assignments([user_id])[user_id]
+        cache.set(key, rows, CACHE_TIMEOUT)
+    return rows
+
+
+def invalidate_assignments(user_ids):
+    cache.delete_many([assignments_cache_key(user_id) for user_id in user_ids])
+
+
+def resolve_shift(user_id, day, assignments=None):
+    """
+    The Shift a user is expected to work on `day`: the newest assignment in
+    effect that day, or the default office shift. A shift whose end time is
+    not after its start time ends on the next day.
+    """
+    rows = get_assignments(user_id) if assignments is None else assignments.get(user_id, [])
+    template = DEFAULT_TEMPLATE
+    for effective_from, effective_to, candidate in rows:
+        if effective_from <= day and (effective_to is None or day <= effective_to):
+            template = candidate
+            break
+    start_time, end_time, expected_hours, grace_minutes = template
+    start = timezone.make_aware(datetime.combine(day, start_time))
+    end = timezone.make_aware(datetime.combine(day if end_time > start_time else day + timedelta(days=1), end_time))
+    return Shift(start, end, start + timedelta(minutes=grace_minutes), expected_hours)
+
+
+def shift_day(user_id, moment, assignments=None):
+    """
+    The day whose shift a punch at `moment` belongs to. A punch after midnight
+    that is nearer the end of the previous day's night shift than the start of
+    today's shift belongs to the previous day.
+    """
+    day = timezone.localtime(moment).date()
+    previous = resolve_shift(user_id, day - timedelta(days=1), assignments)
+    if timezone.localtime(previous.end).date() == day:
+        current = resolve_shift(user_id, day, assignments)
+        if abs(moment - previous.end) < abs(current.start - moment):
+            return day - timedelta(days=1)
+    return day
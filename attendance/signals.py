@@ -1,21 +1,49 @@
-import logging
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from attendance.models import Attendance
-from notifications.utils import notify_incomplete_shift
+from accounts.models import User
+from attendance.models import Attendance, ShiftAssignment, ShiftTemplate
+from attendance.shifts import invalidate_assignments
+from attendance.summaries import refold_summaries
+from attendance.team_calendar import invalidate_calendar
 
-logger = logging.getLogger(__name__)
 
-EXPECTED_HOURS = 8
+def attendance_changed(instance, signal, created):
+    # Saves that change no tracked field leave the calendar and summaries as they are
+    return signal is post_delete or created or bool(instance.changed_fields())
 
 
+# Check-in and check-out write through raw SQL, invalidating in their views and
+# folding summaries in the same statement; these cover ORM writes such as the
+# admin and AttendanceDeleteView, inside the transaction of the write.
 @receiver(post_save, sender=Attendance)
-def check_shift_completion(sender, instance, created, **kwargs):
-    try:
-        if not created and instance.check_out and instance.work_hours:
-            logger.info(f"Shift completed for {instance.user.username}: {instance.work_hours} hours")
-            if instance.work_hours < EXPECTED_HOURS:
-                logger.warning(f"Incomplete shift for {instance.user.username}: {instance.work_hours}h < {EXPECTED_HOURS}h")
-                notify_incomplete_shift(instance.user, instance.work_hours, EXPECTED_HOURS)
-    except Exception as e:
-        logger.exception(f"Error in attendance signal: {e}")
+@receiver(post_delete, sender=Attendance)
+def invalidate_team_calendar_on_attendance(sender, instance, signal, created=False, **kwargs):
+    if attendance_changed(instance, signal, created):
+        department_id = User.objects.filter(pk=instance.user_id).values_list('department_id', flat=True).first()
+        invalidate_calendar([department_id], instance.date)
+
+
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def refold_attendance_summaries(sender, instance, signal, created=False, **kwargs):
+    if not attendance_changed(instance, signal, created) or (created and instance.check_out is None):
+        # Open rows are not counted until check-out
+        return
+    keys = {(instance.user_id, instance.date)}
+    if not created:
+        # An edit may have moved the row to another user or day
+        keys.add((instance.previous('user') or instance.user_id, instance.previous('date') or instance.date))
+    for user_id, day in keys:
+        refold_summaries(user_id, day)
+
+
+@receiver(post_save, sender=ShiftAssignment)
+@receiver(post_delete, sender=ShiftAssignment)
+def invalidate_shift_assignments(sender, instance, **kwargs):
+    invalidate_assignments([instance.user_id])
+
+
+@receiver(post_save, sender=ShiftTemplate)
+@receiver(post_delete, sender=ShiftTemplate)
+def invalidate_shift_template_users(sender, instance, **kwargs):
+    invalidate_assignments(set(ShiftAssignment.objects.filter(template=instance).values_list('user_id', flat=True)))
@@ -0,0 +1,149 @@
+import calendar
+from django.conf import settings
+from django.db import connection, transaction
+from accounts.models import User
+from attendance.models import (
+    Attendance, UserMonthlySummary, DepartmentDailySummary, EXPECTED_HOURS, LATE_AFTER, SHIFT_FACTS
+)
+
+# Aggregates shared by both grains over per-shift facts `f`; only closed shifts
+# count, matching check-out.
+_AGGREGATES = """
+    COALESCE(SUM(f.work_hours), 0),
+    COUNT(*),
+    COALESCE(SUM(f.short_shift), 0),
+    COALESCE(SUM(f.late), 0),
+    COALESCE(SUM(f.overtime), 0)
+"""
+
+
+def month_bounds(start, end):
+    """
+    Widen [start, end] to whole months, since monthly rows cannot be partially rebuilt.
+    """
+    first = start.replace(day=1)
+    last = end.replace(day=calendar.monthrange(end.year, end.month)[1])
+    return first, last
+
+
+def rebuild_summaries(start, end):
+    """
+    Recompute both summary tables for the given date range with set-based SQL.
+    Returns (monthly_rows, daily_rows) written.
+    """
+    month_start, month_end = month_bounds(start, end)
+    params = {
+        "start": start,
+        "end": end,
+        "month_start": month_start,
+        "month_end": month_end,
+        "expected": EXPECTED_HOURS,
+        "tz": settings.TIME_ZONE,
+        "late_after": LATE_AFTER,
+    }
+    attendance = Attendance._meta.db_table
+    monthly = UserMonthlySummary._meta.db_table
+    daily = DepartmentDailySummary._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {monthly} WHERE month BETWEEN %(month_start)s AND %(month_end)s", params
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {monthly} (user_id, month, total_hours, days_present, short_shifts, late_arrivals, overtime_hours)
+            SELECT f.user_id, date_trunc('month', f.date)::date, {_AGGREGATES}
+            FROM (
+                SELECT c.user_id, c.date, c.work_hours, {SHIFT_FACTS} FROM {attendance} c
+                WHERE c.date BETWEEN %(month_start)s AND %(month_end)s AND c.check_out IS NOT NULL
+            ) f
+            GROUP BY 1, 2
+            """,
+            params,
+        )
+        monthly_rows = cursor.rowcount
+        cursor.execute(f"DELETE FROM {daily} WHERE date BETWEEN %(start)s AND %(end)s", params)
+        cursor.execute(
+            f"""
+            INSERT INTO {daily} (department_id, date, total_hours, days_present, short_shifts, late_arrivals, overtime_hours)
+            SELECT f.department_id, f.date, {_AGGREGATES}
+            FROM (
+                SELECT u.department_id, c.date, c.work_hours, {SHIFT_FACTS}
+                FROM {attendance} c JOIN {User._meta.db_table} u ON u.id = c.user_id
+                WHERE c.date BETWEEN %(start)s AND %(end)s AND c.check_out IS NOT NULL
+                    AND u.department_id IS NOT NULL
+            ) f
+            GROUP BY 1, 2
+            """,
+            params,
+        )
+        daily_rows = cursor.rowcount
+    return monthly_rows, daily_rows
+
+
+_REPLACE = """
+    total_hours = EXCLUDED.total_hours,
+    days_present = EXCLUDED.days_present,
+    short_shifts = EXCLUDED.short_shifts,
+    late_arrivals = EXCLUDED.late_arrivals,
+    overtime_hours = EXCLUDED.overtime_hours
+"""
+
+
+def refold_summaries(user_id, day):
+    """
+    Recompute the (user, month) and (department, day) summary rows that a
+    user's attendance on `day` counts towards, after a row was edited or
+    deleted outside check-out. Run it in the transaction that changed the row.
+    """
+    month_start, month_end = month_bounds(day, day)
+    department_id = User.objects.filter(id=user_id).values_list('department_id', flat=True).first()
+    params = {
+        "user_id": user_id,
+        "department_id": department_id,
+        "day": day,
+        "month_start": month_start,
+        "month_end": month_end,
+        "expected": EXPECTED_HOURS,
+        "tz": settings.TIME_ZONE,
+        "late_after": LATE_AFTER,
+    }
+    attendance = Attendance._meta.db_table
+    monthly = UserMonthlySummary._meta.db_table
+    daily = DepartmentDailySummary._meta.db_table
+    with connection.cursor() as cursor:
+        # Upserting the recomputed totals (rather than deleting and
+        # re-inserting) keeps the row locked against a concurrent check-out
+        cursor.execute(
+            f"""
+            INSERT INTO {monthly} (user_id, month, total_hours, days_present, short_shifts, late_arrivals, overtime_hours)
+            SELECT %(user_id)s, %(month_start)s, {_AGGREGATES}
+            FROM (
+                SELECT c.work_hours, {SHIFT_FACTS} FROM {attendance} c
+                WHERE c.user_id = %(user_id)s AND c.date BETWEEN %(month_start)s AND %(month_end)s
+                    AND c.check_out IS NOT NULL
+            ) f
+            ON CONFLICT (user_id, month) DO UPDATE SET {_REPLACE}
+            """,
+            params,
+        )
+        cursor.execute(
+            f"DELETE FROM {monthly} WHERE user_id = %(user_id)s AND month = %(month_start)s AND days_present = 0", params
+        )
+        if department_id is None:
+            return
+        cursor.execute(
+            f"""
+            INSERT INTO {daily} (department_id, date, total_hours, days_present, short_shifts, late_arrivals, overtime_hours)
+            SELECT %(department_id)s, %(day)s, {_AGGREGATES}
+            FROM (
+                SELECT c.work_hours, {SHIFT_FACTS}
+                FROM {attendance} c JOIN {User._meta.db_table} u ON u.id = c.user_id
+                WHERE u.department_id = %(department_id)s AND c.date = %(day)s AND c.check_out IS NOT NULL
+            ) f
+            ON CONFLICT (department_id, date) DO UPDATE SET {_REPLACE}
+            """,
+            params,
+        )
+        cursor.execute(
+            f"DELETE FROM {daily} WHERE department_id = %(department_id)s AND date = %(day)s AND days_present = 0", params
+        )
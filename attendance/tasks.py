@@ -0,0 +1,97 @@
+import logging
+from datetime import date, timedelta
+from celery import group, shared_task
+from django.utils import timezone
+from accounts.models import User
+from attendance.models import Attendance
+from attendance.partitions import ensure_future_partitions
+from attendance.payroll import compute_department_payroll, payroll_departments
+from core.utils import beat_date
+from notifications.utils import notify_incomplete_shifts, notify_department_absences
+
+logger = logging.getLogger(__name__)
+
+# The absence run covers the local day that is ending when beat starts it; a
+# run delayed or retried up to this long past midnight still covers that day
+ABSENCE_RUN_GRACE = timedelta(hours=6)
+
+
+@shared_task
+def notify_short_shifts(day=None):
+    """
+    End-of-day job: claim every short shift closed since the last run (the
+    day's, plus night shifts from earlier days that closed after it) in one
+    statement and send the incomplete-shift notifications as a single batch.
+    """
+    day = date.fromisoformat(day) if day else timezone.localdate()
+    shortfalls = Attendance.objects.claim_short_shifts(day)
+    if not shortfalls:
+        logger.info(f"No short shifts up to {day}")
+        return 0
+    users = User.objects.only('id', 'email', 'username').in_bulk([user_id for user_id, _, _ in shortfalls])
+    notify_incomplete_shifts(
+        [(users[user_id], work_hours, expected_hours) for user_id, work_hours, expected_hours in shortfalls if user_id in users]
+    )
+    logger.info(f"Notified {len(shortfalls)} short shifts up to {day}")
+    return len(shortfalls)
+
+
+@shared_task
+def detect_absences(day=None):
+    """
+    Daily job: mark active employees who neither checked in nor were on approved
+    leave as absent with one anti-join, then send each department senior a
+    single summary.
+    """
+    day = date.fromisoformat(day) if day else timezone.localdate(timezone.now() - ABSENCE_RUN_GRACE)
+    absent_ids = Attendance.objects.record_absences(day)
+    if not absent_ids:
+        logger.info(f"No absences on {day}")
+        return 0
+
+    absentees_by_department = {}
+    for username, department_id in User.objects.filter(id__in=absent_ids, department__isnull=False).values_list('username', 'department_id'):
+        absentees_by_department.setdefault(department_id, []).append(username)
+    seniors_by_department = {}
+    seniors = User.objects.filter(
+        department_id__in=absentees_by_department, role__name="senior", is_active=True
+    ).only('id', 'email', 'username', 'department_id')
+    for senior in seniors:
+        seniors_by_department.setdefault(senior.department_id, []).append(senior)
+    notify_department_absences(absentees_by_department, seniors_by_department, day)
+    logger.info(f"Recorded {len(absent_ids)} absences on {day}")
+    return len(absent_ids)
+
+
+@shared_task
+def ensure_attendance_partitions():
+    """
+    Pre-create the next months' attendance partitions so inserts never land in
+    the DEFAULT partition.
+    """
+    created = ensure_future_partitions(timezone.now().date())
+    if created:
+        logger.info(f"Created attendance partitions: {', '.join(created)}")
+    return created
+
+
+@shared_task
+def compute_department_payroll_hours(department_id, month):
+    return compute_department_payroll(department_id, date.fromisoformat(month))
+
+
+@shared_task
+def compute_monthly_payroll_hours(month=None):
+    """
+    Fan payroll hours for a month (default: the one before the month beat runs
+    it in) out to one task per department, so the Celery worker pool computes
+    them in parallel.
+    """
+    if month:
+        month = date.fromisoformat(month).replace(day=1)
+    else:
+        month = (beat_date().replace(day=1) - timedelta(days=1)).replace(day=1)
+    departments = payroll_departments()
+    group(compute_department_payroll_hours.s(department_id, month.isoformat()) for department_id in departments).apply_async()
+    logger.info(f"Queued payroll hours for {len(departments)} departments for {month:%Y-%m}")
+    return len(departments)
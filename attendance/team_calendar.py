@@ -0,0 +1,115 @@
+from datetime import timedelta
+from django.contrib.postgres.fields.ranges import DateRange
+from django.core.cache import cache
+from django.utils import timezone
+from accounts.models import Department, User
+from accounts.work_calendar import calendar_version, get_compiled_year
+from attendance.models import Attendance
+from attendance.summaries import month_bounds
+from leaves.models import Leave
+
+CACHE_TIMEOUT_CURRENT_MONTH = 15 * 60
+CACHE_TIMEOUT_PAST_MONTH = 24 * 60 * 60
+
+PRESENT = "P"
+LEAVE = "L"
+ABSENT = "A"
+HOLIDAY = "H"
+UNKNOWN = "-"
+LEGEND = {PRESENT: "present", LEAVE: "leave", ABSENT: "absent", HOLIDAY: "holiday", UNKNOWN: "not yet known"}
+
+
+def calendar_cache_key(department_id, month, version):
+    # Versioned by the holiday setup so holiday and weekend edits refresh every calendar
+    return f"team-calendar:{version}:{department_id}:{month:%Y-%m}"
+
+
+def build_calendar(department_id, month):
+    """
+    Per-user, per-day status matrix for a department-month. Each user's row is
+    a string with one LEGEND code per day, so a month of a large department
+    stays small on the wire. Presence wins over leave, leave over holiday.
+    """
+    start, end = month_bounds(month, month)
+    today = timezone.now().date()
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    index = {day: i for i, day in enumerate(days)}
+
+    users = list(
+        User.objects.filter(department_id=department_id, is_active=True)
+        .order_by('username').values_list('id', 'username', 'date_joined', 'location_id')
+    )
+    present = set(
+        Attendance.objects.filter(user__department_id=department_id, date__range=(start, end))
+        .values_list('user_id', 'date')
+    )
+    on_leave = {}
+    leaves = (
+        Leave.objects.filter(user__department_id=department_id, status__iexact='approved',
+                             period__overlap=DateRange(start, end, '[]'))
+        .values_list('user_id', 'start_date', 'end_date')
+    )
+    for user_id, leave_start, leave_end in leaves:
+        first, last = index[max(leave_start, start)], index[min(leave_end, end)]
+        on_leave.setdefault(user_id, set()).update(range(first, last + 1))
+
+    rows = []
+    for user_id, username, date_joined, location_id in users:
+        joined = timezone.localtime(date_joined).date()
+        work_calendar = get_compiled_year(location_id, start.year)
+        leave_days = on_leave.get(user_id, ())
+        codes = []
+        for i, day in enumerate(days):
+            if (user_id, day) in present:
+                codes.append(PRESENT)
+            elif i in leave_days:
+                codes.append(LEAVE)
+            elif not work_calendar.is_working(day):
+                codes.append(HOLIDAY)
+            elif day > today or day < joined:
+                codes.append(UNKNOWN)
+            else:
+                codes.append(ABSENT)
+        rows.append({"id": user_id, "username": username, "days": "".join(codes)})
+
+    return {
+        "department": department_id,
+        "month": f"{start:%Y-%m}",
+        "start": start,
+        "end": end,
+        "legend": LEGEND,
+        "users": rows,
+    }
+
+
+def get_team_calendar(department_id, month):
+    """
+    Calendar for a department-month, cached per (department, month) until a
+    leave or attendance write for that department and month invalidates it.
+    """
+    month = month.replace(day=1)
+    key = calendar_cache_key(department_id, month, calendar_version())
+    result = cache.get(key)
+    if result is None:
+        result = build_calendar(department_id, month)
+        current = month >= timezone.now().date().replace(day=1)
+        cache.set(key, result, CACHE_TIMEOUT_CURRENT_MONTH if current else CACHE_TIMEOUT_PAST_MONTH)
+    return result
+
+
+def invalidate_calendar(department_ids, start, end=None):
+    """
+    Drop cached calendars of the given departments for every month from start
+    to end. Pass department_ids=None to drop them for all departments.
+    """
+    if department_ids is None:
+        department_ids = list(Department.objects.values_list('id', flat=True))
+    month = start.replace(day=1)
+    last = (end or start).replace(day=1)
+    version = calendar_version()
+    keys = []
+    while month <= last:
+        keys.extend(calendar_cache_key(department_id, month, version) for department_id in department_ids if department_id)
+        month = (month + timedelta(days=32)).replace(day=1)
+    if keys:
+        cache.delete_many(keys)
@@ -1,3 +1,332 @@
-from django.test import TestCase
+import io
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+from zoneinfo import ZoneInfo
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import Department, Holiday, Role, User
+from accounts.work_calendar import invalidate_work_calendars
+from attendance.analytics import get_department_analytics
+from attendance.models import Absence, Attendance, DepartmentDailySummary, PayrollHours, ShiftAssignment, ShiftTemplate, UserMonthlySummary
+from attendance.partitions import convert_to_partitioned, create_partitions, partition_name, scanned_partitions
+from attendance.payroll import compute_department_payroll
+from attendance.punches import import_punches
+from attendance.tasks import compute_monthly_payroll_hours, detect_absences
+from attendance.team_calendar import get_team_calendar
+from leaves.models import Leave
 
-# Create your tests here.
+
+class AttendanceListQueryCountTests(TestCase):
+    def setUp(self):
+        department = Department.objects.create(name="Ops")
+        self.senior = User.objects.create_user(
+            email="lead@example.com", username="lead", password="pass",
+            role=Role.objects.create(name="senior"), department=department,
+        )
+        check_in = timezone.now() - timedelta(days=1)
+        for i in range(5):
+            user = User.objects.create_user(email=f"u{i}@example.com", username=f"u{i}", password="pass", department=department)
+            Attendance.objects.create(user=user, date=date(2026, 2, 2), check_in=check_in, check_out=check_in + timedelta(hours=8))
+        self.client = APIClient()
+        self.client.force_authenticate(self.senior)
+
+    def test_list_is_one_query_regardless_of_rows(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/attendance/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["data"]), 5)
+        self.assertEqual(response.data["data"][0]["work_hours"], "8.00")
+
+
+class ShortShiftClaimTests(TestCase):
+    def test_night_shift_closed_after_midnight_is_claimed_next_run(self):
+        user = User.objects.create_user(email="night@example.com", username="night", password="pass")
+        day = date(2026, 2, 2)
+        check_in = timezone.make_aware(datetime.combine(day, time(22, 0)))
+        record = Attendance.objects.create(user=user, date=day, check_in=check_in)
+        # Still open at the 23:30 run on its own day
+        self.assertEqual(Attendance.objects.claim_short_shifts(day), [])
+        record.check_out = check_in + timedelta(hours=3)
+        record.save()
+        claimed = Attendance.objects.claim_short_shifts(day + timedelta(days=1))
+        self.assertEqual([user_id for user_id, _, _ in claimed], [user.id])
+        self.assertEqual(Attendance.objects.claim_short_shifts(day + timedelta(days=1)), [])
+
+
+class SummaryRefoldTests(TestCase):
+    def setUp(self):
+        department = Department.objects.create(name="Support")
+        self.user = User.objects.create_user(email="agent@example.com", username="agent", password="pass", department=department)
+        self.day = date(2026, 3, 2)
+        check_in = timezone.make_aware(datetime.combine(self.day, time(9, 0)))
+        Attendance.objects.check_in(self.user, when=check_in)
+        Attendance.objects.check_out(self.user, when=check_in + timedelta(hours=8))
+        self.record = Attendance.objects.get(user=self.user, date=self.day)
+
+    def test_edit_refolds_the_users_month_and_departments_day(self):
+        self.record.check_out = self.record.check_in + timedelta(hours=6)
+        self.record.save()
+        monthly = UserMonthlySummary.objects.get(user=self.user)
+        self.assertEqual((monthly.total_hours, monthly.short_shifts), (Decimal("6.00"), 1))
+        self.assertEqual(DepartmentDailySummary.objects.get(date=self.day).total_hours, Decimal("6.00"))
+
+    def test_delete_removes_the_rows_contribution(self):
+        self.record.delete()
+        self.assertFalse(UserMonthlySummary.objects.filter(user=self.user).exists())
+        self.assertFalse(DepartmentDailySummary.objects.filter(date=self.day).exists())
+
+
+class AttendanceTrackingTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email="ops@example.com", username="ops", password="pass")
+        check_in = timezone.make_aware(datetime(2026, 2, 3, 9, 0))
+        created = Attendance.objects.create(user=user, date=date(2026, 2, 3), check_in=check_in)
+        self.record = Attendance.objects.get(pk=created.pk)
+
+    def test_loaded_row_tracks_check_out_without_queries(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(self.record.has_changed('check_out'))
+            self.record.check_out = self.record.check_in + timedelta(hours=8)
+            self.assertTrue(self.record.has_changed('check_out'))
+            self.assertIsNone(self.record.previous('check_out'))
+
+    def test_unchanged_save_is_a_single_update(self):
+        with self.assertNumQueries(1):
+            self.record.save()
+
+
+class PartitionTests(TestCase):
+    def test_partition_for_a_month_already_in_default_takes_its_rows(self):
+        convert_to_partitioned(months_ahead=0, today=date(2026, 1, 15))
+        user = User.objects.create_user(email="late@example.com", username="late", password="pass")
+        record = Attendance.objects.create(user=user, date=date(2026, 3, 4))
+        self.assertEqual(scanned_partitions(Attendance.objects.filter(date=record.date)), ["attendance_attendance_default"])
+        with self.assertLogs("attendance.partitions", "WARNING"):
+            created = create_partitions(date(2026, 2, 1), date(2026, 3, 1))
+        self.assertEqual(created, [partition_name(date(2026, 2, 1)), partition_name(date(2026, 3, 1))])
+        self.assertEqual(scanned_partitions(Attendance.objects.filter(date=record.date)), [partition_name(date(2026, 3, 1))])
+        self.assertTrue(Attendance.objects.filter(pk=record.pk, date=record.date).exists())
+
+
+class PayrollScheduleTests(TestCase):
+    def test_beat_run_on_the_first_computes_the_previous_month(self):
+        department = Department.objects.create(name="Finance")
+        # 03:00 IST on March 1st is still February 28th in UTC
+        beat_run = datetime(2026, 3, 1, 3, 0, tzinfo=ZoneInfo("Asia/Kolkata")).astimezone(ZoneInfo("UTC"))
+        with mock.patch("django.utils.timezone.now", return_value=beat_run), mock.patch("attendance.tasks.group") as group:
+            self.assertEqual(compute_monthly_payroll_hours(), 2)
+        jobs = list(group.call_args.args[0])
+        self.assertEqual([job.args for job in jobs], [(department.id, "2026-02-01"), (None, "2026-02-01")])
+
+
+class NightShiftCheckOutTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name="Security")
+        self.user = User.objects.create_user(email="guard@example.com", username="guard", password="pass", department=self.department)
+        night = ShiftTemplate.objects.create(name="Night", start_time=time(22, 0), end_time=time(6, 0), expected_hours=Decimal("8"))
+        ShiftAssignment.objects.create(user=self.user, template=night, effective_from=date(2026, 1, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def punch(self, path, moment):
+        with mock.patch("django.utils.timezone.now", return_value=timezone.make_aware(moment)):
+            return self.client.post(path)
+
+    def test_check_out_after_midnight_uses_the_shifts_date(self):
+        self.punch("/api/attendance/checkin/", datetime(2026, 1, 31, 22, 0))
+        with mock.patch("attendance.views.invalidate_calendar") as invalidate:
+            response = self.punch("/api/attendance/checkout/", datetime(2026, 2, 1, 6, 0))
+        self.assertEqual(response.status_code, 200)
+        invalidate.assert_called_once_with([self.department.id], date(2026, 1, 31))
+        response = self.punch("/api/attendance/checkout/", datetime(2026, 2, 1, 6, 5))
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(TIME_ZONE="Asia/Kolkata")
+class AbsenceScheduleTests(TestCase):
+    def run_at(self, moment):
+        with mock.patch("django.utils.timezone.now", return_value=moment), \
+                mock.patch("attendance.tasks.notify_department_absences"):
+            detect_absences()
+
+    def test_run_delayed_past_midnight_covers_the_evening_it_was_due(self):
+        user = User.objects.create_user(email="away@example.com", username="away", password="pass")
+        User.objects.filter(pk=user.pk).update(date_joined=datetime(2026, 1, 1, tzinfo=ZoneInfo("UTC")))
+        ist = ZoneInfo("Asia/Kolkata")
+        self.run_at(datetime(2026, 3, 2, 23, 45, tzinfo=ist))
+        self.run_at(datetime(2026, 3, 3, 0, 20, tzinfo=ist))
+        self.assertEqual(list(Absence.objects.filter(user=user).values_list('date', flat=True)), [date(2026, 3, 2)])
+
+
+class CheckInCheckOutTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="clerk@example.com", username="clerk", password="pass")
+        self.check_in = timezone.make_aware(datetime(2026, 2, 2, 9, 0))
+
+    def test_second_check_in_on_the_same_day_is_a_no_op(self):
+        self.assertIsNotNone(Attendance.objects.check_in(self.user, when=self.check_in))
+        self.assertIsNone(Attendance.objects.check_in(self.user, when=self.check_in + timedelta(hours=1)))
+        self.assertEqual(Attendance.objects.get(user=self.user).check_in, self.check_in)
+
+    def test_check_out_closes_the_open_row_once(self):
+        Attendance.objects.check_in(self.user, when=self.check_in)
+        check_out = self.check_in + timedelta(hours=8)
+        Attendance.objects.check_out(self.user, when=check_out)
+        Attendance.objects.check_out(self.user, when=check_out + timedelta(hours=1))
+        record = Attendance.objects.get(user=self.user)
+        self.assertEqual((record.check_out, record.work_hours), (check_out, Decimal("8.00")))
+
+
+class AttendanceSummaryTests(TestCase):
+    def test_check_out_folds_the_shift_into_both_summaries(self):
+        department = Department.objects.create(name="Operations")
+        user = User.objects.create_user(email="operator@example.com", username="operator", password="pass", department=department)
+        # Late (after 09:30) and short of the eight expected hours
+        check_in = timezone.make_aware(datetime(2026, 3, 3, 9, 45))
+        Attendance.objects.check_in(user, when=check_in)
+        Attendance.objects.check_out(user, when=check_in + timedelta(hours=6))
+        monthly = UserMonthlySummary.objects.get(user=user, month=date(2026, 3, 1))
+        self.assertEqual(
+            (monthly.total_hours, monthly.days_present, monthly.short_shifts, monthly.late_arrivals),
+            (Decimal("6.00"), 1, 1, 1),
+        )
+        daily = DepartmentDailySummary.objects.get(department=department, date=date(2026, 3, 3))
+        self.assertEqual((daily.total_hours, daily.short_shifts, daily.late_arrivals), (Decimal("6.00"), 1, 1))
+
+
+class PunchImportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="porter@example.com", username="porter", password="pass")
+
+    def test_punches_pair_into_one_row_per_day_across_batches(self):
+        log = (
+            "email,timestamp\n"
+            "porter@example.com,2026-02-02T09:00:00\n"
+            "porter@example.com,2026-02-02T13:00:00\n"
+            "nobody@example.com,2026-02-02T09:10:00\n"
+            "porter@example.com,2026-02-02T17:30:00\n"
+        )
+        report = import_punches(io.StringIO(log), "csv", batch_size=1)
+        self.assertEqual((report["rows"], report["rejected"]), (4, 1))
+        self.assertEqual(Attendance.objects.get(user=self.user).work_hours, Decimal("8.50"))
+
+    def test_reimport_merges_with_the_stored_row(self):
+        import_punches(io.StringIO("email,timestamp\nporter@example.com,2026-02-02T09:00:00\n"), "csv")
+        self.assertIsNone(Attendance.objects.get(user=self.user).check_out)
+        import_punches(io.StringIO("email,timestamp\nporter@example.com,2026-02-02T18:00:00\n"), "csv")
+        self.assertEqual(Attendance.objects.get(user=self.user).work_hours, Decimal("9.00"))
+
+
+class AbsenceDetectionTests(TestCase):
+    def employee(self, name, joined=datetime(2026, 1, 1, tzinfo=ZoneInfo("UTC")), **fields):
+        return User.objects.create_user(email=f"{name}@example.com", username=name, password="pass", date_joined=joined, **fields)
+
+    def test_only_unexplained_absences_are_recorded_once(self):
+        day = date(2026, 2, 3)
+        absent = self.employee("truant")
+        present = self.employee("punctual")
+        Attendance.objects.create(user=present, date=day, check_in=timezone.make_aware(datetime(2026, 2, 3, 9, 0)))
+        on_leave = self.employee("traveller")
+        with mock.patch("leaves.signals.notify_leave_created"):
+            # Stored as the display label, as older approvals were
+            Leave.objects.create(user=on_leave, start_date=date(2026, 2, 2), end_date=date(2026, 2, 4), reason="Trip", status="Approved")
+        self.employee("former", is_active=False)
+        self.employee("newcomer", joined=datetime(2026, 2, 10, tzinfo=ZoneInfo("UTC")))
+        self.assertEqual(Attendance.objects.record_absences(day), [absent.id])
+        self.assertEqual(Attendance.objects.record_absences(day), [])
+
+
+class DepartmentAnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_month_statistics(self):
+        department = Department.objects.create(name="Sales")
+        first = User.objects.create_user(email="rep1@example.com", username="rep1", password="pass", department=department)
+        second = User.objects.create_user(email="rep2@example.com", username="rep2", password="pass", department=department)
+        for user, day, start, hours in [
+            (first, date(2026, 2, 2), time(9, 0), 8),
+            (first, date(2026, 2, 3), time(9, 45), 6),
+            (second, date(2026, 2, 2), time(9, 15), 9),
+        ]:
+            check_in = timezone.make_aware(datetime.combine(day, start))
+            Attendance.objects.create(user=user, date=day, check_in=check_in, check_out=check_in + timedelta(hours=hours))
+        stats = get_department_analytics(department.id, date(2026, 2, 1))
+        self.assertEqual((stats["shifts"], stats["employees"]), (3, 2))
+        self.assertEqual((stats["lateness_rate"], stats["short_shift_rate"]), (0.3333, 0.3333))
+        self.assertEqual(stats["by_weekday"]["Mon"], {"shifts": 2, "lateness_rate": 0.0, "avg_work_hours": 8.5})
+        self.assertEqual([day["date"] for day in stats["trend"]], ["2026-02-02", "2026-02-03"])
+
+
+class TeamCalendarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name="Design")
+        self.user = User.objects.create_user(
+            email="artist@example.com", username="artist", password="pass", department=self.department,
+            date_joined=datetime(2026, 1, 1, tzinfo=ZoneInfo("UTC")),
+        )
+
+    def first_week(self):
+        return get_team_calendar(self.department.id, date(2026, 2, 1))["users"][0]["days"][:7]
+
+    def test_attendance_and_leave_writes_refresh_the_cached_calendar(self):
+        # February 1st 2026 is a Sunday
+        self.assertEqual(self.first_week(), "HAAAAAH")
+        Attendance.objects.create(user=self.user, date=date(2026, 2, 2), check_in=timezone.make_aware(datetime(2026, 2, 2, 9, 0)))
+        self.assertEqual(self.first_week(), "HPAAAAH")
+        with mock.patch("leaves.signals.notify_leave_created"):
+            Leave.objects.create(user=self.user, start_date=date(2026, 2, 3), end_date=date(2026, 2, 4), reason="Errand", status="approved")
+        self.assertEqual(self.first_week(), "HPLLAAH")
+
+
+class AbsenceCalendarTests(TestCase):
+    def setUp(self):
+        self.addCleanup(invalidate_work_calendars)
+
+    def test_no_absences_on_weekends_or_holidays(self):
+        user = User.objects.create_user(
+            email="idle@example.com", username="idle", password="pass", date_joined=datetime(2026, 1, 1, tzinfo=ZoneInfo("UTC"))
+        )
+        Holiday.objects.create(date=date(2026, 5, 1), name="Labour Day")
+        self.assertEqual(Attendance.objects.record_absences(date(2026, 5, 1)), [])
+        self.assertEqual(Attendance.objects.record_absences(date(2026, 5, 2)), [])
+        self.assertEqual(Attendance.objects.record_absences(date(2026, 5, 4)), [user.id])
+
+
+class ShiftResolutionTests(TestCase):
+    def test_check_in_stores_the_assigned_shift(self):
+        part_timer = User.objects.create_user(email="part@example.com", username="part", password="pass")
+        regular = User.objects.create_user(email="full@example.com", username="full", password="pass")
+        half_day = ShiftTemplate.objects.create(
+            name="Half day", start_time=time(9, 0), end_time=time(13, 0), expected_hours=Decimal("4"), grace_minutes=10
+        )
+        ShiftAssignment.objects.create(user=part_timer, template=half_day, effective_from=date(2026, 2, 1))
+        check_in = timezone.make_aware(datetime(2026, 2, 4, 9, 5))
+        for user in (part_timer, regular):
+            Attendance.objects.check_in(user, when=check_in)
+            Attendance.objects.check_out(user, when=check_in + timedelta(hours=4))
+        record = Attendance.objects.get(user=part_timer)
+        self.assertEqual(record.expected_hours, Decimal("4.00"))
+        self.assertEqual(record.late_after, timezone.make_aware(datetime(2026, 2, 4, 9, 10)))
+        # Four hours fall short of the default eight-hour shift only
+        claimed = Attendance.objects.claim_short_shifts(date(2026, 2, 4))
+        self.assertEqual([user_id for user_id, _, _ in claimed], [regular.id])
+
+
+class PayrollHoursTests(TestCase):
+    def test_overtime_and_night_hours_are_split_per_shift(self):
+        department = Department.objects.create(name="Warehouse")
+        user = User.objects.create_user(email="picker@example.com", username="picker", password="pass", department=department)
+        for start, hours in [(datetime(2026, 2, 2, 9, 0), 10), (datetime(2026, 2, 3, 20, 0), 8)]:
+            check_in = timezone.make_aware(start)
+            Attendance.objects.create(user=user, date=start.date(), check_in=check_in, check_out=check_in + timedelta(hours=hours))
+        self.assertEqual(compute_department_payroll(department.id, date(2026, 2, 1)), 1)
+        payroll = PayrollHours.objects.get(user=user, month=date(2026, 2, 1))
+        self.assertEqual(
+            (payroll.days_worked, payroll.regular_hours, payroll.overtime_hours, payroll.night_hours),
+            (2, Decimal("16.00"), Decimal("2.00"), Decimal("6.00")),
+        )
@@ -1,9 +1,18 @@
 from django.urls import path
-from attendance.views import CheckInView, CheckOutView, AttendanceListView, AttendanceDeleteView
+from attendance.views import (
+    CheckInView, CheckOutView, AttendanceListView, AttendanceDeleteView,
+    AttendanceMonthlySummaryView, DepartmentDailySummaryView, AttendanceAnalyticsView, TeamCalendarView, ShiftView, PayrollHoursView
+)
 
 urlpatterns = [
     path("attendance/checkin/", CheckInView.as_view(), name="checkin"),
     path("attendance/checkout/", CheckOutView.as_view(), name="checkout"),
     path("attendance/", AttendanceListView.as_view(), name="attendance-list"),
     path("attendance/delete/<int:id>/", AttendanceDeleteView.as_view(), name="attendance-delete"),
+    path("attendance/summary/monthly/", AttendanceMonthlySummaryView.as_view(), name="attendance-monthly-summary"),
+    path("attendance/summary/department/", DepartmentDailySummaryView.as_view(), name="attendance-department-summary"),
+    path("attendance/analytics/", AttendanceAnalyticsView.as_view(), name="attendance-analytics"),
+    path("attendance/shift/", ShiftView.as_view(), name="attendance-shift"),
+    path("attendance/payroll/", PayrollHoursView.as_view(), name="attendance-payroll-hours"),
+    path("calendar/", TeamCalendarView.as_view(), name="team-calendar"),
 ]
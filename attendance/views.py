@@ -1,10 +1,15 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from attendance.models import Attendance
-from attendance.serializers import AttendanceSerializer
+from attendance.models import Attendance, UserMonthlySummary, DepartmentDailySummary, PayrollHours
+from attendance.serializers import AttendanceSerializer, UserMonthlySummarySerializer, DepartmentDailySummarySerializer, PayrollHoursSerializer
+from attendance.summaries import month_bounds
+from attendance.analytics import get_department_analytics
+from attendance.team_calendar import get_team_calendar, invalidate_calendar
+from attendance.shifts import resolve_shift
 from accounts.models import User
 from django.utils import timezone
+from datetime import date, datetime
 
 
 def get_user_role(user):
@@ -14,12 +19,10 @@ def get_user_role(user):
 class CheckInView(APIView):
     def post(self, request):
         try:
-            user = request.user
-            today = timezone.now().date()
-            existing = Attendance.objects.filter(user=user, date=today).first()
-            if existing:
+            day = Attendance.objects.check_in(request.user)
+            if day is None:
                 return Response({"msg": "Already checked in today"}, status=status.HTTP_400_BAD_REQUEST)
-            Attendance.objects.create(user=user, check_in=timezone.now(), date=today)
+            invalidate_calendar([request.user.department_id], day)
             return Response({"msg": "Checked in successfully"}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"msg": f"Error during check-in: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
@@ -29,15 +32,14 @@ class CheckOutView(APIView):
     def post(self, request):
         try:
             user = request.user
-            today = timezone.now().date()
-            record = Attendance.objects.filter(user=user, date=today).first()
-            if not record:
-                return Response({"msg": "No check-in record found for today"}, status=status.HTTP_404_NOT_FOUND)
-            if record.check_out:
+            # day is the shift's date, yesterday's for a night shift
+            work_hours, day = Attendance.objects.check_out(user)
+            if work_hours is None:
+                if not Attendance.objects.filter(user=user, date=day).exists():
+                    return Response({"msg": "No check-in record found for today"}, status=status.HTTP_404_NOT_FOUND)
                 return Response({"msg": "Already checked out today"}, status=status.HTTP_400_BAD_REQUEST)
-            record.check_out = timezone.now()
-            record.save()
-            return Response({"msg": "Checked out successfully", "hours": record.work_hours}, status=status.HTTP_200_OK)
+            invalidate_calendar([user.department_id], day)
+            return Response({"msg": "Checked out successfully", "hours": work_hours}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"msg": f"Error during check-out: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -48,14 +50,21 @@ class AttendanceListView(APIView):
             user = request.user
             role = get_user_role(user)
             if role == "admin":
-                records = Attendance.objects.all().order_by('-date')
+                records = Attendance.objects.for_list().order_by('-date')
             elif role == "senior":
-                dept_users = User.objects.filter(department=user.department)
-                records = Attendance.objects.filter(user__in=dept_users)
+                records = Attendance.objects.for_list().filter(user__department_id=user.department_id)
             elif role in ["junior", "intern"]:
-                records = Attendance.objects.filter(user=user)
+                records = Attendance.objects.for_list().filter(user=user)
             else:
                 return Response({"msg": "Unauthorized role"}, status=status.HTTP_403_FORBIDDEN)
+            # A date range lets PostgreSQL prune to the matching monthly partitions
+            try:
+                if request.query_params.get("start"):
+                    records = records.filter(date__gte=date.fromisoformat(request.query_params["start"]))
+                if request.query_params.get("end"):
+                    records = records.filter(date__lte=date.fromisoformat(request.query_params["end"]))
+            except ValueError:
+                return Response({"msg": "start and end must be in YYYY-MM-DD format"}, status=status.HTTP_400_BAD_REQUEST)
             serializer = AttendanceSerializer(records, many=True)
             return Response({"msg": "Attendance fetched successfully", "data": serializer.data}, status=status.HTTP_200_OK)
         except Exception as e:
@@ -75,3 +84,156 @@ class AttendanceDeleteView(APIView):
             return Response({"msg": "Attendance record deleted successfully"}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"msg": f"Error deleting attendance: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AttendanceMonthlySummaryView(APIView):
+    def get(self, request):
+        try:
+            user = request.user
+            role = get_user_role(user)
+            month_param = request.query_params.get("month")
+            try:
+                month = datetime.strptime(month_param, "%Y-%m").date() if month_param else timezone.now().date().replace(day=1)
+            except ValueError:
+                return Response({"msg": "month must be in YYYY-MM format"}, status=status.HTTP_400_BAD_REQUEST)
+            summaries = UserMonthlySummary.objects.select_related('user').filter(month=month)
+            if role == "admin":
+                department = request.query_params.get("department")
+                if department:
+                    summaries = summaries.filter(user__department_id=department)
+            elif role == "senior":
+                summaries = summaries.filter(user__department_id=user.department_id)
+            elif role in ["junior", "intern"]:
+                summaries = summaries.filter(user=user)
+            else:
+                return Response({"msg": "Unauthorized role"}, status=status.HTTP_403_FORBIDDEN)
+            serializer = UserMonthlySummarySerializer(summaries.order_by('user__username'), many=True)
+            return Response({"msg": "Monthly summary fetched successfully", "data": serializer.data}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"msg": f"Error fetching monthly summary: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class DepartmentDailySummaryView(APIView):
+    def get(self, request):
+        try:
+            user = request.user
+            role = get_user_role(user)
+            if role == "admin":
+                department = request.query_params.get("department") or user.department_id
+            elif role == "senior":
+                department = user.department_id
+            else:
+                return Response({"msg": "Only admin or senior can view department summaries"}, status=status.HTTP_403_FORBIDDEN)
+            if not department:
+                return Response({"msg": "department is required"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                default_start, default_end = month_bounds(timezone.now().date(), timezone.now().date())
+                start = date.fromisoformat(request.query_params["start"]) if request.query_params.get("start") else default_start
+                end = date.fromisoformat(request.query_params["end"]) if request.query_params.get("end") else default_end
+            except ValueError:
+                return Response({"msg": "start and end must be in YYYY-MM-DD format"}, status=status.HTTP_400_BAD_REQUEST)
+            summaries = DepartmentDailySummary.objects.filter(department_id=department, date__range=(start, end)).order_by('date')
+            serializer = DepartmentDailySummarySerializer(summaries, many=True)
+            return Response({"msg": "Department summary fetched successfully", "data": serializer.data}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"msg": f"Error fetching department summary: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AttendanceAnalyticsView(APIView):
+    def get(self, request):
+        try:
+            user = request.user
+            role = get_user_role(user)
+            if role == "admin":
+                department = request.query_params.get("department") or user.department_id
+            elif role == "senior":
+                department = user.department_id
+            else:
+                return Response({"msg": "Only admin or senior can view attendance analytics"}, status=status.HTTP_403_FORBIDDEN)
+            if not department:
+                return Response({"msg": "department is required"}, status=status.HTTP_400_BAD_REQUEST)
+            month_param = request.query_params.get("month")
+            try:
+                month = datetime.strptime(month_param, "%Y-%m").date() if month_param else timezone.now().date()
+            except ValueError:
+                return Response({"msg": "month must be in YYYY-MM format"}, status=status.HTTP_400_BAD_REQUEST)
+            data = get_department_analytics(int(department), month)
+            return Response({"msg": "Attendance analytics fetched successfully", "data": data}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"msg": f"Error fetching attendance analytics: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class TeamCalendarView(APIView):
+    def get(self, request):
+        try:
+            user = request.user
+            role = get_user_role(user)
+            if role == "admin":
+                department = request.query_params.get("department") or user.department_id
+            elif role in ["senior", "junior", "intern"]:
+                department = user.department_id
+            else:
+                return Response({"msg": "Unauthorized role"}, status=status.HTTP_403_FORBIDDEN)
+            if not department:
+                return Response({"msg": "department is required"}, status=status.HTTP_400_BAD_REQUEST)
+            month_param = request.query_params.get("month")
+            try:
+                month = datetime.strptime(month_param, "%Y-%m").date() if month_param else timezone.now().date()
+            except ValueError:
+                return Response({"msg": "month must be in YYYY-MM format"}, status=status.HTTP_400_BAD_REQUEST)
+            data = get_team_calendar(int(department), month)
+            return Response({"msg": "Team calendar fetched successfully", "data": data}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"msg": f"Error fetching team calendar: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ShiftView(APIView):
+    def get(self, request):
+        try:
+            user = request.user
+            role = get_user_role(user)
+            target = user
+            user_id = request.query_params.get("user")
+            if user_id and str(user_id) != str(user.id):
+                if role not in ["admin", "senior"]:
+                    return Response({"msg": "You can only view your own shift"}, status=status.HTTP_403_FORBIDDEN)
+                target = User.objects.filter(id=user_id).first()
+                if not target:
+                    return Response({"msg": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+                if role == "senior" and target.department_id != user.department_id:
+                    return Response({"msg": "You can only view shifts in your department"}, status=status.HTTP_403_FORBIDDEN)
+            try:
+                day = date.fromisoformat(request.query_params["date"]) if request.query_params.get("date") else timezone.localtime().date()
+            except ValueError:
+                return Response({"msg": "date must be in YYYY-MM-DD format"}, status=status.HTTP_400_BAD_REQUEST)
+            shift = resolve_shift(target.id, day)
+            return Response({"msg": "Shift fetched successfully", "data": {"user": target.username, "date": day, **shift._asdict()}}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"msg": f"Error fetching shift: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class PayrollHoursView(APIView):
+    def get(self, request):
+        try:
+            user = request.user
+            role = get_user_role(user)
+            month_param = request.query_params.get("month")
+            try:
+                month = datetime.strptime(month_param, "%Y-%m").date() if month_param else timezone.now().date().replace(day=1)
+            except ValueError:
+                return Response({"msg": "month must be in YYYY-MM format"}, status=status.HTTP_400_BAD_REQUEST)
+            rows = PayrollHours.objects.select_related('user').filter(month=month)
+            if role == "admin":
+                department = request.query_params.get("department")
+                if department:
+                    rows = rows.filter(user__department_id=department)
+            elif role == "senior":
+                rows = rows.filter(user__department_id=user.department_id)
+            elif role in ["junior", "intern"]:
+                rows = rows.filter(user=user)
+            else:
+                return Response({"msg": "Unauthorized role"}, status=status.HTTP_403_FORBIDDEN)
+            serializer = PayrollHoursSerializer(rows.order_by('user__username'), many=True)
+            return Response({"msg": "Payroll hours fetched successfully", "data": serializer.data}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"msg": f"Error fetching payroll hours: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
@@ -4,13 +4,11 @@ import asyncio
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from urllib.parse import parse_qs
-from rest_framework_simplejwt.tokens import AccessToken
-from django.contrib.auth import get_user_model
+from accounts.authentication import user_from_token
 from chat.models import ChatRoom, Message
 
 logger = logging.getLogger(__name__)
 
-User = get_user_model()
 
 class ChatConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -113,12 +111,8 @@ class ChatConsumer(AsyncWebsocketConsumer):
             logger.debug("DEBUG: No token found in query string")
             return None
         try:
-            logger.debug("DEBUG: About to parse AccessToken")
-            access = AccessToken(token)
-            logger.debug(f"DEBUG: AccessToken parsed, user_id={access.get('user_id')}")
-            logger.debug("DEBUG: About to query User from DB")
-            user = User.objects.get(id=access["user_id"])
-            logger.debug(f"DEBUG: User found: {user.id}")
+            user = user_from_token(token)
+            logger.debug(f"DEBUG: User found: {user.id if user else None}")
             return user
         except Exception as e:
             logger.exception(f"DEBUG: Exception in get_user_from_query: {e}")
@@ -1,3 +1,70 @@
 from django.db import models
 
-# Create your models here.
+
+class FieldTrackerMixin:
+    """
+    Snapshot selected fields when a model instance is loaded from the database,
+    so signals and save() can ask what changed without re-reading the row.
+
+    Set `tracked_fields` to field names on the model. The snapshot is refreshed
+    after every successful save, so post_save receivers still see the values
+    the row had before the save.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def _snapshot_tracked_fields(self):
+        self._tracked_initial = {
+            name: self.__dict__[self._meta.get_field(name).attname]
+            for name in self.tracked_fields
+            if self._meta.get_field(name).attname in self.__dict__
+        }
+
+    def previous(self, name):
+        """
+        The value `name` had when the instance was loaded or last saved,
+        or None for a new instance.
+        """
+        return getattr(self, "_tracked_initial", {}).get(name)
+
+    def has_changed(self, name):
+        """
+        True if `name` differs from the loaded value. New instances and fields
+        that were deferred at load time always count as changed.
+        """
+        initial = getattr(self, "_tracked_initial", {})
+        if name not in initial:
+            return True
+        return initial[name] != getattr(self, self._meta.get_field(name).attname)
+
+    def changed_fields(self):
+        return [name for name in self.tracked_fields if self.has_changed(name)]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_tracked_fields()
+
+
+class ListQuerySet(models.QuerySet):
+    """
+    QuerySet with a for_list() that applies the joins and column subset the
+    model's list serializer reads, so list endpoints cost a constant number of
+    queries however many rows they return.
+
+    Subclasses declare `list_select_related` (relations the serializer
+    follows) and `list_only` (columns it renders, including the foreign keys
+    and related fields reached through them).
+    """
+    list_select_related = ()
+    list_only = ()
+
+    def for_list(self):
+        queryset = self.select_related(*self.list_select_related)
+        if self.list_only:
+            queryset = queryset.only(*self.list_only)
+        return queryset
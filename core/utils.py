@@ -0,0 +1,40 @@
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.db.models import F, Func, Value
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+
+def beat_date():
+    """
+    Today's date in CELERY_TIMEZONE, the zone beat's crontab schedules run in,
+    which need not be TIME_ZONE.
+    """
+    return timezone.now().astimezone(ZoneInfo(settings.CELERY_TIMEZONE)).date()
+
+
+# Statuses used to be saved as their display labels ("In Progress" rather than
+# "in_progress") and those rows were never rewritten, so code comparing stored
+# statuses goes through the helpers below.
+
+def normalize_status(status):
+    """
+    The choice value of a stored status, whichever form it is in.
+    """
+    return (status or "").lower().replace(" ", "_")
+
+
+def status_forms(*statuses):
+    """
+    Every form the given status values may be stored in, for lookups that
+    should still use an index on the column.
+    """
+    return list(statuses) + [status.replace("_", " ").title() for status in statuses]
+
+
+def normalized_status_sql(column):
+    return f"replace(lower({column}), ' ', '_')"
+
+
+def normalized_status_expression(field='status'):
+    return Func(Lower(F(field)), Value(' '), Value('_'), function='replace')
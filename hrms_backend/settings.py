@@ -14,6 +14,7 @@ from pathlib import Path
 from dotenv import load_dotenv
 import os
 from datetime import timedelta
+from celery.schedules import crontab
 
 import django
 
@@ -43,6 +44,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Third-party
     'rest_framework',
     'rest_framework_simplejwt',
@@ -111,6 +113,40 @@ DATABASES = {
 REDIS_HOST = os.getenv('REDIS_HOST')
 REDIS_PORT = os.getenv('REDIS_PORT')
 
+# Cache shared by all workers; falls back to per-process memory without Redis
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'redis://{REDIS_HOST}:{REDIS_PORT}/1',
+    }
+} if REDIS_HOST else {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Password-reset OTPs must be visible to every worker, so they live in Redis
+OTP_STORE = {
+    'BACKEND': 'accounts.otp.RedisOTPStore',
+    'LOCATION': f'redis://{REDIS_HOST}:{REDIS_PORT}/2',
+} if REDIS_HOST else {
+    'BACKEND': 'accounts.otp.MemoryOTPStore',
+}
+
+# request.META key holding the real client IP for per-IP OTP rate limits:
+# the header the reverse proxy sets (e.g. HTTP_X_REAL_IP or
+# HTTP_X_FORWARDED_FOR). Unset, REMOTE_ADDR is used and a warning is logged at
+# startup, since behind a proxy it is the proxy's address shared by every client.
+CLIENT_IP_HEADER = os.getenv('CLIENT_IP_HEADER')
+
+# Revoked access tokens must be visible to every worker as well
+TOKEN_REVOCATION = {
+    'BACKEND': 'accounts.revocation.RedisRevocationStore',
+    'LOCATION': f'redis://{REDIS_HOST}:{REDIS_PORT}/2',
+} if REDIS_HOST else {
+    'BACKEND': 'accounts.revocation.MemoryRevocationStore',
+}
+
 # Celery Configuration
 CELERY_BROKER_URL = f'redis://{REDIS_HOST}:{REDIS_PORT}/0'
 CELERY_RESULT_BACKEND = 'django-db'
@@ -118,6 +154,32 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Asia/Kolkata'
+CELERY_BEAT_SCHEDULE = {
+    'attendance-notify-short-shifts': {
+        'task': 'attendance.tasks.notify_short_shifts',
+        'schedule': crontab(hour=23, minute=30),
+    },
+    'attendance-detect-absences': {
+        'task': 'attendance.tasks.detect_absences',
+        'schedule': crontab(hour=23, minute=45),
+    },
+    'attendance-ensure-partitions': {
+        'task': 'attendance.tasks.ensure_attendance_partitions',
+        'schedule': crontab(hour=1, minute=0),
+    },
+    'leaves-accrue-monthly': {
+        'task': 'leaves.tasks.accrue_monthly_leave',
+        'schedule': crontab(hour=2, minute=0, day_of_month=1),
+    },
+    'attendance-payroll-hours': {
+        'task': 'attendance.tasks.compute_monthly_payroll_hours',
+        'schedule': crontab(hour=3, minute=0, day_of_month=1),
+    },
+    'tasks-flag-overdue': {
+        'task': 'tasks.tasks.flag_overdue_tasks',
+        'schedule': crontab(minute='*/15'),
+    },
+}
 
 ASGI_APPLICATION = "hrms_backend.asgi.application"
 
@@ -155,7 +217,9 @@ AUTH_PASSWORD_VALIDATORS = [
 
 LANGUAGE_CODE = 'en-us'
 
-TIME_ZONE = 'UTC'
+# The deployment's local zone (e.g. "Asia/Kolkata"): attendance days, shift
+# times and LATE_AFTER are all wall-clock times in it
+TIME_ZONE = os.getenv('TIME_ZONE', 'UTC')
 
 USE_I18N = True
 
@@ -185,7 +249,7 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 AUTH_USER_MODEL = 'accounts.User'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
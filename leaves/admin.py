@@ -1,8 +1,37 @@
 from django.contrib import admin
-from leaves.models import Leave
+from leaves.models import Leave, LeaveType, LeaveLedgerEntry, LeaveBalance
 
 @admin.register(Leave)
 class LeaveAdmin(admin.ModelAdmin):
-    list_display = ('user', 'status', 'start_date', 'end_date', 'applied_on')
-    list_filter = ('status',)
+    list_display = ('user', 'leave_type', 'status', 'start_date', 'end_date', 'applied_on')
+    list_filter = ('status', 'leave_type')
     search_fields = ('user__username', 'reason')
+
+
+@admin.register(LeaveType)
+class LeaveTypeAdmin(admin.ModelAdmin):
+    list_display = ('name', 'monthly_accrual', 'max_balance')
+
+
+@admin.register(LeaveLedgerEntry)
+class LeaveLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'leave_type', 'kind', 'days', 'period', 'created_at')
+    list_filter = ('kind', 'leave_type')
+    search_fields = ('user__username',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(LeaveBalance)
+class LeaveBalanceAdmin(admin.ModelAdmin):
+    list_display = ('user', 'leave_type', 'balance', 'updated_at')
+    list_filter = ('leave_type',)
+    search_fields = ('user__username',)
+    readonly_fields = ('balance',)
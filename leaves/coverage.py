@@ -0,0 +1,60 @@
+from django.db import connection
+from accounts.models import User
+from core.utils import normalized_status_sql
+from leaves.models import Leave
+
+# Warn when approving or applying would leave this share of a department off on some day
+COVERAGE_WARNING_RATIO = 0.5
+
+# Leaves overlapping the range are found through the GiST index on period and
+# joined to the department's members, then each leave is spread over the days
+# of the requested range it covers.
+COVERAGE_SQL = """
+    SELECT d.day::date,
+        COUNT(l.id) FILTER (WHERE {status} = 'approved'),
+        COUNT(l.id) FILTER (WHERE {status} = 'pending')
+    FROM generate_series(%(start)s::date, %(end)s::date, interval '1 day') AS d(day)
+    LEFT JOIN (
+        SELECT l.id, l.status, l.period
+        FROM {users} u
+        JOIN {leaves} l ON l.user_id = u.id
+        WHERE u.department_id = %(department)s
+            AND l.period && daterange(%(start)s::date, %(end)s::date, '[]')
+            AND {status} <> 'rejected'
+    ) l ON l.period @> d.day::date
+    GROUP BY d.day
+    ORDER BY d.day
+"""
+
+
+def get_department_coverage(department_id, start, end):
+    """
+    Return [{"date", "approved", "pending"}] for every day from start to end:
+    how many people in the department are off that day. Active leaves of one
+    user never overlap, so each leave counts one person.
+    """
+    sql = COVERAGE_SQL.format(users=User._meta.db_table, leaves=Leave._meta.db_table, status=normalized_status_sql('l.status'))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {"department": department_id, "start": start, "end": end})
+        return [
+            {"date": day, "approved": approved, "pending": pending}
+            for day, approved, pending in cursor.fetchall()
+        ]
+
+
+def coverage_warning(user, start, end):
+    """
+    Message for a leave request that would put at least COVERAGE_WARNING_RATIO
+    of the user's department off on some day in [start, end], else None.
+    """
+    if not user.department_id:
+        return None
+    headcount = User.objects.filter(department_id=user.department_id, is_active=True).count()
+    if not headcount:
+        return None
+    days = get_department_coverage(user.department_id, start, end)
+    peak = max(days, key=lambda d: d["approved"] + d["pending"])
+    off = peak["approved"] + peak["pending"] + 1
+    if off / headcount >= COVERAGE_WARNING_RATIO:
+        return f"{off} of {headcount} people in {user.department.name} would be off on {peak['date']}"
+    return None
@@ -0,0 +1,180 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection
+from accounts.models import User
+from accounts.work_calendar import working_days
+from core.utils import normalize_status, status_forms
+from leaves.models import Leave, LeaveType, LeaveLedgerEntry, LeaveBalance
+
+BALANCE_UPSERT_SQL = f"""
+    INSERT INTO {LeaveBalance._meta.db_table} AS b (user_id, leave_type_id, balance, updated_at)
+    VALUES (%s, %s, %s, now())
+    ON CONFLICT (user_id, leave_type_id) DO UPDATE SET
+        balance = b.balance + EXCLUDED.balance, updated_at = EXCLUDED.updated_at
+"""
+
+BALANCE_BULK_UPSERT_SQL = f"""
+    INSERT INTO {LeaveBalance._meta.db_table} AS b (user_id, leave_type_id, balance, updated_at)
+    SELECT user_id, leave_type_id, SUM(days), now()
+    FROM unnest(%s::bigint[], %s::bigint[], %s::numeric[]) AS e(user_id, leave_type_id, days)
+    GROUP BY user_id, leave_type_id
+    ON CONFLICT (user_id, leave_type_id) DO UPDATE SET
+        balance = b.balance + EXCLUDED.balance, updated_at = EXCLUDED.updated_at
+"""
+
+
+class InsufficientBalance(Exception):
+    """
+    Raised when posting debits would take a balance below zero. args[0] lists
+    the (user_id, leave_type_id) pairs that are short.
+    """
+
+
+def get_balance(user, leave_type):
+    """
+    Current balance from the snapshot table, in one indexed lookup.
+    """
+    balance = LeaveBalance.objects.filter(user=user, leave_type=leave_type).values_list('balance', flat=True).first()
+    return balance if balance is not None else Decimal("0")
+
+
+def get_available_balance(user, leave_type):
+    """
+    Balance less the working days of the user's pending leaves of the type,
+    which approving them will debit.
+    """
+    pending = Leave.objects.filter(
+        user=user, leave_type=leave_type, status__in=status_forms('pending'),
+    ).values_list('start_date', 'end_date')
+    return get_balance(user, leave_type) - sum(working_days(user.location_id, start, end) for start, end in pending)
+
+
+def lock_debits(debits):
+    """
+    Lock the balance rows that (user_id, leave_type_id, days) debits draw on
+    and raise InsufficientBalance if any would go below zero. Call inside the
+    transaction that posts them, so concurrent approvals are checked in turn.
+    """
+    totals = {}
+    for user_id, leave_type_id, days in debits:
+        totals[user_id, leave_type_id] = totals.get((user_id, leave_type_id), 0) + days
+    if not totals:
+        return
+    balances = {
+        (user_id, leave_type_id): balance
+        for user_id, leave_type_id, balance in LeaveBalance.objects.select_for_update()
+        .filter(user_id__in={user_id for user_id, _ in totals}, leave_type_id__in={type_id for _, type_id in totals})
+        .order_by('user_id', 'leave_type_id').values_list('user_id', 'leave_type_id', 'balance')
+    }
+    short = sorted(key for key, days in totals.items() if balances.get(key, 0) + days < 0)
+    if short:
+        raise InsufficientBalance(short)
+
+
+def post_entry(user, leave_type, kind, days, leave=None, period=None):
+    """
+    Append a ledger entry and move the balance snapshot by the same amount.
+    Call inside transaction.atomic() so both land together.
+    """
+    entry = LeaveLedgerEntry.objects.create(
+        user=user, leave_type=leave_type, kind=kind, days=days, leave=leave, period=period
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(BALANCE_UPSERT_SQL, [user.pk, leave_type.pk, days])
+    return entry
+
+
+def decision_entry(leave, old_status, new_status):
+    """
+    (kind, days) of the ledger entry implied by moving a leave from old_status
+    to new_status: approving debits its days, leaving approved credits them back.
+    """
+    if not leave.leave_type_id:
+        return None
+    was_approved = normalize_status(old_status) == 'approved'
+    is_approved = normalize_status(new_status) == 'approved'
+    if is_approved and not was_approved:
+        return 'debit', -Decimal(leave.days)
+    if was_approved and not is_approved:
+        return 'credit', Decimal(leave.days)
+    return None
+
+
+def apply_leave_decision(leave):
+    """
+    Post the ledger entry implied by a leave's pending status change. Call
+    before leave.save(), which resets the tracked previous status. Raises
+    InsufficientBalance if the balance cannot cover an approval.
+    """
+    if not leave.has_changed('status'):
+        return None
+    entry = decision_entry(leave, leave.previous('status'), leave.status)
+    if entry is None:
+        return None
+    kind, days = entry
+    if kind == 'debit':
+        lock_debits([(leave.user_id, leave.leave_type_id, days)])
+    return post_entry(leave.user, leave.leave_type, kind, days, leave=leave)
+
+
+def apply_leave_decisions(leaves, new_status):
+    """
+    Batch version of apply_leave_decision for leaves about to be moved to
+    new_status by a bulk UPDATE: one INSERT for the ledger entries and one
+    upsert for the balances. Call inside the same transaction as the UPDATE.
+    Raises InsufficientBalance if any balance cannot cover the approvals.
+    """
+    entries = []
+    for leave in leaves:
+        entry = decision_entry(leave, leave.status, new_status)
+        if entry:
+            kind, days = entry
+            entries.append(LeaveLedgerEntry(
+                user_id=leave.user_id, leave_type_id=leave.leave_type_id, kind=kind, days=days, leave=leave,
+            ))
+    if not entries:
+        return []
+    lock_debits([(e.user_id, e.leave_type_id, e.days) for e in entries if e.kind == 'debit'])
+    LeaveLedgerEntry.objects.bulk_create(entries)
+    with connection.cursor() as cursor:
+        cursor.execute(BALANCE_BULK_UPSERT_SQL, [
+            [e.user_id for e in entries], [e.leave_type_id for e in entries], [e.days for e in entries],
+        ])
+    return entries
+
+
+def accrue_month(period):
+    """
+    Credit every active employee's monthly accrual for each leave type in one
+    statement: ledger rows and balance snapshots are written together, accruals
+    are capped at the type's max_balance (balances already at the cap get no
+    entry), and re-running a period is a no-op.
+    Returns the number of balances credited.
+    """
+    period = period.replace(day=1)
+    next_period = (period.replace(day=28) + timedelta(days=4)).replace(day=1)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH accrued AS (
+                INSERT INTO {LeaveLedgerEntry._meta.db_table} (user_id, leave_type_id, kind, days, period, created_at)
+                SELECT u.id, t.id, 'accrual',
+                    CASE WHEN t.max_balance IS NULL THEN t.monthly_accrual
+                        ELSE LEAST(t.monthly_accrual, t.max_balance - COALESCE(b.balance, 0)) END,
+                    %(period)s, now()
+                FROM {User._meta.db_table} u
+                CROSS JOIN {LeaveType._meta.db_table} t
+                LEFT JOIN {LeaveBalance._meta.db_table} b ON b.user_id = u.id AND b.leave_type_id = t.id
+                WHERE u.is_active AND t.monthly_accrual > 0 AND u.date_joined < %(next_period)s
+                    AND (t.max_balance IS NULL OR COALESCE(b.balance, 0) < t.max_balance)
+                ON CONFLICT (user_id, leave_type_id, period) WHERE kind = 'accrual' DO NOTHING
+                RETURNING user_id, leave_type_id, days
+            )
+            INSERT INTO {LeaveBalance._meta.db_table} AS b (user_id, leave_type_id, balance, updated_at)
+            SELECT user_id, leave_type_id, days, now() FROM accrued
+            ON CONFLICT (user_id, leave_type_id) DO UPDATE SET
+                balance = b.balance + EXCLUDED.balance, updated_at = EXCLUDED.updated_at
+            """,
+            {"period": period, "next_period": next_period},
+        )
+        return cursor.rowcount
@@ -1,9 +1,32 @@
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, RangeOperators
+from django.contrib.postgres.indexes import GistIndex
 from django.db import models
 from django.utils import timezone
 from accounts.models import User
+from accounts.work_calendar import working_days
+from core.models import FieldTrackerMixin, ListQuerySet
 
 
-class Leave(models.Model):
+class LeaveType(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    monthly_accrual = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    max_balance = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class LeaveQuerySet(ListQuerySet):
+    # What LeaveSerializer renders
+    list_select_related = ('user', 'leave_type')
+    list_only = (
+        'id', 'start_date', 'end_date', 'reason', 'status', 'applied_on', 'updated_on',
+        'user__username', 'leave_type__name',
+    )
+
+
+class Leave(FieldTrackerMixin, models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('approved', 'Approved'),
@@ -11,12 +34,109 @@ class Leave(models.Model):
     ]
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaves')
+    leave_type = models.ForeignKey(LeaveType, on_delete=models.PROTECT, null=True, blank=True, related_name='leaves')
     start_date = models.DateField()
     end_date = models.DateField()
     reason = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    reviewed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='reviewed_leaves')
     applied_on = models.DateTimeField(default=timezone.now)
     updated_on = models.DateTimeField(auto_now=True)
+    # Inclusive [start_date, end_date] range maintained by PostgreSQL for overlap queries
+    period = models.GeneratedField(
+        expression=models.Func(models.F('start_date'), models.F('end_date'), models.Value('[]'), function='daterange'),
+        output_field=DateRangeField(),
+        db_persist=True,
+    )
+
+    objects = LeaveQuerySet.as_manager()
+
+    tracked_fields = ('status', 'start_date', 'end_date')
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(condition=models.Q(end_date__gte=models.F('start_date')), name='leave_end_after_start'),
+            # A user's pending and approved leaves may not overlap. user_id is compared as the
+            # single-value range [user_id, user_id] so plain GiST works without btree_gist.
+            ExclusionConstraint(
+                name='exclude_overlapping_active_leaves',
+                expressions=[
+                    (models.Func(models.F('user'), models.F('user'), models.Value('[]'), function='int8range'), RangeOperators.OVERLAPS),
+                    ('period', RangeOperators.OVERLAPS),
+                ],
+                condition=~models.Q(status__iexact='rejected'),
+            ),
+        ]
+        indexes = [
+            GistIndex(fields=['period'], name='leave_period_gist_idx'),
+        ]
+
+    @property
+    def days(self):
+        """
+        Working days taken, skipping weekends and holidays at the user's location.
+        """
+        return working_days(self.user.location_id, self.start_date, self.end_date)
 
     def __str__(self):
         return f"{self.user.username} - {self.status} ({self.start_date} to {self.end_date})"
+
+
+class LeaveLedgerEntry(models.Model):
+    """
+    Append-only history of every change to a user's leave entitlement.
+    Balances are the running sum of `days` per (user, leave type).
+    """
+    KIND_CHOICES = [
+        ('accrual', 'Accrual'),
+        ('debit', 'Debit'),
+        ('credit', 'Credit'),
+        ('adjustment', 'Adjustment'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leave_ledger')
+    leave_type = models.ForeignKey(LeaveType, on_delete=models.PROTECT, related_name='ledger_entries')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    days = models.DecimalField(max_digits=6, decimal_places=2)  # positive adds, negative uses up
+    leave = models.ForeignKey(Leave, on_delete=models.SET_NULL, null=True, blank=True, related_name='ledger_entries')
+    period = models.DateField(null=True, blank=True)  # first day of the accrual month
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'leave_type', 'period'],
+                condition=models.Q(kind='accrual'),
+                name='unique_leave_accrual_per_period',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'leave_type', 'created_at'], name='leave_ledger_user_type_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Ledger entries are append-only")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.user.username} {self.kind} {self.days} {self.leave_type.name}"
+
+
+class LeaveBalance(models.Model):
+    """
+    Current balance per (user, leave type), kept in step with the ledger in the
+    same transaction as every entry so reads never sum history.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leave_balances')
+    leave_type = models.ForeignKey(LeaveType, on_delete=models.CASCADE, related_name='balances')
+    balance = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'leave_type'], name='unique_leave_balance_user_type'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.leave_type.name}: {self.balance}"
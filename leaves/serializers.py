@@ -1,11 +1,25 @@
 from rest_framework import serializers
-from leaves.models import Leave
+from leaves.models import Leave, LeaveType, LeaveBalance
 
 
 class LeaveSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)
+    leave_type = serializers.SlugRelatedField(slug_field='name', queryset=LeaveType.objects.all(), required=False, allow_null=True)
 
     class Meta:
         model = Leave
-        fields = ['id', 'user', 'start_date', 'end_date', 'reason', 'status', 'applied_on', 'updated_on']
+        fields = ['id', 'user', 'leave_type', 'start_date', 'end_date', 'reason', 'status', 'applied_on', 'updated_on']
         read_only_fields = ['status', 'applied_on', 'updated_on']
+
+    def validate(self, attrs):
+        if attrs["end_date"] < attrs["start_date"]:
+            raise serializers.ValidationError("end_date must be on or after start_date")
+        return attrs
+
+
+class LeaveBalanceSerializer(serializers.ModelSerializer):
+    leave_type = serializers.SlugRelatedField(slug_field='name', read_only=True)
+
+    class Meta:
+        model = LeaveBalance
+        fields = ['leave_type', 'balance', 'updated_at']
@@ -1,23 +1,12 @@
 import logging
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from attendance.team_calendar import invalidate_calendar
 from leaves.models import Leave
 from notifications.utils import notify_leave_created, notify_leave_status
 
 logger = logging.getLogger(__name__)
 
-leave_original_status = {}
-
-
-@receiver(pre_save, sender=Leave)
-def store_leave_status(sender, instance, **kwargs):
-    try:
-        if instance.pk:
-            old_instance = Leave.objects.get(pk=instance.pk)
-            leave_original_status[instance.pk] = old_instance.status
-    except Exception as e:
-        logger.exception(f"Error storing leave status: {e}")
-
 
 @receiver(post_save, sender=Leave)
 def notify_on_leave_events(sender, instance, created, **kwargs):
@@ -26,10 +15,27 @@ def notify_on_leave_events(sender, instance, created, **kwargs):
             logger.info(f"Leave created by {instance.user.username}")
             notify_leave_created(instance.user, instance.start_date, instance.end_date)
         else:
-            old_status = leave_original_status.pop(instance.pk, None)
-            if old_status and old_status != instance.status:
+            old_status = instance.previous('status')
+            if old_status and instance.has_changed('status'):
                 logger.info(f"Leave status changed from {old_status} to {instance.status}")
                 if instance.status in ['approved', 'rejected']:
-                    notify_leave_status(instance.user, instance.status, None)
+                    notify_leave_status(instance.user, instance.status, instance.reviewed_by)
     except Exception as e:
         logger.exception(f"Error in leave signal: {e}")
+
+
+def invalidate_leave_calendar(leave):
+    start = min(leave.start_date, leave.previous('start_date') or leave.start_date)
+    end = max(leave.end_date, leave.previous('end_date') or leave.end_date)
+    invalidate_calendar([leave.user.department_id], start, end)
+
+
+@receiver(post_save, sender=Leave)
+def invalidate_team_calendar_on_leave_save(sender, instance, created, **kwargs):
+    if created or instance.changed_fields():
+        invalidate_leave_calendar(instance)
+
+
+@receiver(post_delete, sender=Leave)
+def invalidate_team_calendar_on_leave_delete(sender, instance, **kwargs):
+    invalidate_leave_calendar(instance)
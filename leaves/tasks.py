@@ -0,0 +1,19 @@
+import logging
+from datetime import date
+from celery import shared_task
+from core.utils import beat_date
+from leaves.ledger import accrue_month
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def accrue_monthly_leave(period=None):
+    """
+    Monthly job: post leave accruals for all employees in bulk. Without a
+    period it accrues the month beat runs it in.
+    """
+    period = date.fromisoformat(period) if period else beat_date()
+    credited = accrue_month(period)
+    logger.info(f"Accrued leave for {credited} balances in {period:%Y-%m}")
+    return credited
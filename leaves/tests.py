@@ -1,3 +1,216 @@
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+from decimal import Decimal
+from unittest import mock
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from accounts.models import Role, User
+from leaves.ledger import accrue_month
+from leaves.models import Leave, LeaveBalance, LeaveLedgerEntry, LeaveType
+from leaves.tasks import accrue_monthly_leave
 
-# Create your tests here.
+
+class LeaveStatusTrackingTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="emp@example.com", username="emp", password="pass")
+        with mock.patch("leaves.signals.notify_leave_created"):
+            created = Leave.objects.create(user=self.user, start_date=date(2026, 1, 5), end_date=date(2026, 1, 6), reason="Trip")
+        self.leave = Leave.objects.get(pk=created.pk)
+
+    def test_loaded_leave_tracks_status_without_queries(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(self.leave.has_changed('status'))
+            self.leave.status = 'approved'
+            self.assertTrue(self.leave.has_changed('status'))
+            self.assertEqual(self.leave.previous('status'), 'pending')
+
+    def test_unchanged_save_is_a_single_update(self):
+        self.leave.reason = "Family trip"
+        with mock.patch("leaves.signals.notify_leave_status") as notify, self.assertNumQueries(1):
+            self.leave.save()
+        notify.assert_not_called()
+
+    def test_status_change_notifies_without_reloading_the_row(self):
+        self.leave.status = 'approved'
+        with mock.patch("leaves.signals.notify_leave_status") as notify, self.assertNumQueries(2):
+            # UPDATE plus loading instance.user for the notification
+            self.leave.save()
+        notify.assert_called_once_with(self.user, 'approved', None)
+        self.assertFalse(self.leave.has_changed('status'))
+        self.assertEqual(self.leave.previous('status'), 'approved')
+
+
+class LeaveListQueryCountTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@example.com", username="admin", password="pass", role=Role.objects.create(name="admin")
+        )
+        leave_type = LeaveType.objects.create(name="Annual")
+        with mock.patch("leaves.signals.notify_leave_created"):
+            for i in range(5):
+                user = User.objects.create_user(email=f"u{i}@example.com", username=f"u{i}", password="pass")
+                Leave.objects.create(user=user, leave_type=leave_type, start_date=date(2026, 2, 2), end_date=date(2026, 2, 3), reason="Rest")
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_list_is_one_query_regardless_of_rows(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/leaves/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["data"]), 5)
+        self.assertEqual(response.data["data"][0]["leave_type"], "Annual")
+
+
+class LeaveAccrualTests(TestCase):
+    def test_balances_at_the_cap_get_no_accrual_entry(self):
+        leave_type = LeaveType.objects.create(name="Annual", monthly_accrual=Decimal("1.50"), max_balance=Decimal("10"))
+        capped = User.objects.create_user(email="capped@example.com", username="capped", date_joined=datetime(2025, 1, 1, tzinfo=timezone.utc))
+        near = User.objects.create_user(email="near@example.com", username="near", date_joined=datetime(2025, 1, 1, tzinfo=timezone.utc))
+        LeaveBalance.objects.create(user=capped, leave_type=leave_type, balance=Decimal("10"))
+        LeaveBalance.objects.create(user=near, leave_type=leave_type, balance=Decimal("9.50"))
+        self.assertEqual(accrue_month(date(2026, 3, 1)), 1)
+        self.assertFalse(LeaveLedgerEntry.objects.filter(user=capped).exists())
+        self.assertEqual(LeaveBalance.objects.get(user=near).balance, Decimal("10"))
+
+    def test_beat_run_on_the_first_accrues_that_month(self):
+        leave_type = LeaveType.objects.create(name="Sick", monthly_accrual=Decimal("1"))
+        user = User.objects.create_user(email="new@example.com", username="new", date_joined=datetime(2025, 1, 1, tzinfo=timezone.utc))
+        # 02:00 IST on March 1st is still February 28th in UTC
+        beat_run = datetime(2026, 3, 1, 2, 0, tzinfo=ZoneInfo("Asia/Kolkata")).astimezone(timezone.utc)
+        with mock.patch("django.utils.timezone.now", return_value=beat_run):
+            self.assertEqual(accrue_monthly_leave(), 1)
+        self.assertEqual(LeaveLedgerEntry.objects.get(user=user, leave_type=leave_type).period, date(2026, 3, 1))
+
+
+class LeaveBalanceCheckTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="hr@example.com", username="hr", password="pass", role=Role.objects.create(name="admin")
+        )
+        self.user = User.objects.create_user(email="dev@example.com", username="dev", password="pass")
+        self.leave_type = LeaveType.objects.create(name="Annual")
+        LeaveBalance.objects.create(user=self.user, leave_type=self.leave_type, balance=Decimal("3"))
+        self.client = APIClient()
+
+    def pending_leave(self, start, end):
+        with mock.patch("leaves.signals.notify_leave_created"):
+            return Leave.objects.create(user=self.user, leave_type=self.leave_type, start_date=start, end_date=end, reason="Rest")
+
+    def test_apply_counts_pending_leaves_against_the_balance(self):
+        self.pending_leave(date(2026, 2, 2), date(2026, 2, 3))
+        self.client.force_authenticate(self.user)
+        response = self.client.post("/api/leaves/apply/", {
+            "leave_type": "Annual", "start_date": "2026-02-09", "end_date": "2026-02-10", "reason": "Trip",
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("1.00 days available", response.data["msg"])
+
+    def test_approval_beyond_the_balance_is_rejected(self):
+        leave = self.pending_leave(date(2026, 2, 2), date(2026, 2, 5))
+        self.client.force_authenticate(self.admin)
+        response = self.client.put(f"/api/leaves/update/{leave.id}/", {"status": "Approved"})
+        self.assertEqual(response.status_code, 400)
+        leave.refresh_from_db()
+        self.assertEqual(leave.status, "pending")
+        self.assertFalse(LeaveLedgerEntry.objects.exists())
+
+    def test_bulk_approval_beyond_the_balance_changes_nothing(self):
+        leaves = [self.pending_leave(date(2026, 2, 2), date(2026, 2, 3)), self.pending_leave(date(2026, 2, 9), date(2026, 2, 10))]
+        self.client.force_authenticate(self.admin)
+        response = self.client.post("/api/leaves/update/bulk/", {"status": "approved", "ids": [leave.id for leave in leaves]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["ids"], sorted(leave.id for leave in leaves))
+        self.assertEqual(set(Leave.objects.values_list("status", flat=True)), {"pending"})
+        self.assertFalse(LeaveLedgerEntry.objects.exists())
+        self.assertEqual(LeaveBalance.objects.get(user=self.user).balance, Decimal("3"))
+
+
+class LeaveLedgerTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("notifications.utils.create_notification")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        admin = User.objects.create_user(
+            email="manager@example.com", username="manager", password="pass", role=Role.objects.create(name="admin")
+        )
+        self.user = User.objects.create_user(email="staff@example.com", username="staff", password="pass")
+        leave_type = LeaveType.objects.create(name="Casual")
+        LeaveBalance.objects.create(user=self.user, leave_type=leave_type, balance=Decimal("5"))
+        self.leave = Leave.objects.create(
+            user=self.user, leave_type=leave_type, start_date=date(2026, 2, 2), end_date=date(2026, 2, 3), reason="Move"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def decide(self, decision):
+        response = self.client.put(f"/api/leaves/update/{self.leave.id}/", {"status": decision})
+        self.assertEqual(response.status_code, 200)
+        return LeaveBalance.objects.get(user=self.user).balance
+
+    def test_approval_debits_and_reversal_credits_the_balance(self):
+        self.assertEqual(self.decide("Approved"), Decimal("3"))
+        self.assertEqual(self.decide("Rejected"), Decimal("5"))
+        entries = LeaveLedgerEntry.objects.filter(leave=self.leave).order_by("id").values_list("kind", "days")
+        self.assertEqual(list(entries), [("debit", Decimal("-2")), ("credit", Decimal("2"))])
+
+
+class LeaveOverlapTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="tester@example.com", username="tester", password="pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def apply(self, start, end):
+        with mock.patch("leaves.signals.notify_leave_created"):
+            return self.client.post("/api/leaves/apply/", {"start_date": start, "end_date": end, "reason": "Break"})
+
+    def test_overlapping_leave_is_refused_until_the_first_is_rejected(self):
+        self.assertEqual(self.apply("2026-02-02", "2026-02-04").status_code, 201)
+        response = self.apply("2026-02-04", "2026-02-05")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("overlaps", response.data["msg"])
+        Leave.objects.filter(user=self.user).update(status="rejected")
+        self.assertEqual(self.apply("2026-02-04", "2026-02-05").status_code, 201)
+
+
+class LeaveBulkDecisionTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch("notifications.utils.create_notifications_bulk")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.admin = User.objects.create_user(
+            email="director@example.com", username="director", password="pass", role=Role.objects.create(name="admin")
+        )
+        self.leave_type = LeaveType.objects.create(name="Earned")
+        self.client = APIClient()
+        self.created = 0
+
+    def pending_leaves(self, count):
+        leaves = []
+        with mock.patch("leaves.signals.notify_leave_created"):
+            for _ in range(count):
+                self.created += 1
+                user = User.objects.create_user(email=f"e{self.created}@example.com", username=f"e{self.created}", password="pass")
+                LeaveBalance.objects.create(user=user, leave_type=self.leave_type, balance=Decimal("5"))
+                leaves.append(Leave.objects.create(
+                    user=user, leave_type=self.leave_type, start_date=date(2026, 2, 2), end_date=date(2026, 2, 3), reason="Rest"
+                ))
+        return leaves
+
+    def approve(self, leaves):
+        # A fresh reviewer so each request loads its role
+        self.client.force_authenticate(User.objects.get(pk=self.admin.pk))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/leaves/update/bulk/", {"status": "approved", "ids": [leave.id for leave in leaves]}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        self.approve(self.pending_leaves(1))
+        self.assertEqual(self.approve(self.pending_leaves(1)), self.approve(self.pending_leaves(3)))
+        self.assertEqual(LeaveLedgerEntry.objects.filter(kind="debit").count(), 5)
+        self.assertEqual(set(LeaveBalance.objects.values_list("balance", flat=True)), {Decimal("3")})
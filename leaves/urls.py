@@ -1,9 +1,12 @@
 from django.urls import path
-from leaves.views import ApplyLeaveView, LeaveListView, LeaveStatusUpdateView, LeaveDeleteView
+from leaves.views import ApplyLeaveView, LeaveListView, LeaveStatusUpdateView, LeaveBulkStatusUpdateView, LeaveDeleteView, LeaveBalanceView, LeaveCoverageView
 
 urlpatterns = [
     path("leaves/apply/", ApplyLeaveView.as_view(), name="apply-leave"),
     path("leaves/", LeaveListView.as_view(), name="list-leaves"),
     path("leaves/update/<int:id>/", LeaveStatusUpdateView.as_view(), name="update-leave-status"),
+    path("leaves/update/bulk/", LeaveBulkStatusUpdateView.as_view(), name="bulk-update-leave-status"),
     path("leaves/delete/<int:id>/", LeaveDeleteView.as_view(), name="delete-leave"),
+    path("leaves/balance/", LeaveBalanceView.as_view(), name="leave-balance"),
+    path("leaves/coverage/", LeaveCoverageView.as_view(), name="leave-coverage"),
 ]
@@ -1,14 +1,23 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from leaves.models import Leave
-from leaves.serializers import LeaveSerializer
+from datetime import date
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from leaves.models import Leave, LeaveBalance
+from leaves.serializers import LeaveSerializer, LeaveBalanceSerializer
+from leaves.ledger import InsufficientBalance, get_available_balance, apply_leave_decision, apply_leave_decisions
+from leaves.coverage import get_department_coverage, coverage_warning
 from accounts.models import User
-from notifications.utils import notify_leave_status
+from accounts.work_calendar import working_days
+from attendance.team_calendar import invalidate_calendar
+from notifications.utils import notify_leave_statuses
 import logging
 
 logger = logging.getLogger(__name__)
 
+MAX_BULK_DECISIONS = 500
+
 
 def get_user_role(user):
     return user.role.name if user.role else None
@@ -19,8 +28,29 @@ class ApplyLeaveView(APIView):
         try:
             serializer = LeaveSerializer(data=request.data)
             if serializer.is_valid():
-                serializer.save(user=request.user)
-                return Response({"msg": "Leave applied successfully"}, status=status.HTTP_201_CREATED)
+                leave_type = serializer.validated_data.get("leave_type")
+                requested = working_days(request.user.location_id, serializer.validated_data["start_date"], serializer.validated_data["end_date"])
+                if requested == 0:
+                    return Response({"msg": "The requested dates contain no working days"}, status=status.HTTP_400_BAD_REQUEST)
+                if leave_type:
+                    # Pending leaves are debited when approved, so they are spoken for
+                    available = get_available_balance(request.user, leave_type)
+                    if requested > available:
+                        return Response({"msg": f"Insufficient {leave_type.name} balance: {available} days available, {requested} requested"}, status=status.HTTP_400_BAD_REQUEST)
+                start_date = serializer.validated_data["start_date"]
+                end_date = serializer.validated_data["end_date"]
+                warning = coverage_warning(request.user, start_date, end_date)
+                try:
+                    with transaction.atomic():
+                        serializer.save(user=request.user)
+                except IntegrityError as e:
+                    if "exclude_overlapping_active_leaves" not in str(e):
+                        raise
+                    return Response({"msg": "Leave overlaps one of your existing pending or approved leaves"}, status=status.HTTP_400_BAD_REQUEST)
+                response = {"msg": "Leave applied successfully"}
+                if warning:
+                    response["warning"] = warning
+                return Response(response, status=status.HTTP_201_CREATED)
             return Response({"msg": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"msg": f"Error applying for leave: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
@@ -32,12 +62,11 @@ class LeaveListView(APIView):
             user = request.user
             role = get_user_role(user)
             if role == "admin":
-                leaves = Leave.objects.all().order_by('-applied_on')
+                leaves = Leave.objects.for_list().order_by('-applied_on')
             elif role == "senior":
-                dept_users = User.objects.filter(department=user.department)
-                leaves = Leave.objects.filter(user__in=dept_users)
+                leaves = Leave.objects.for_list().filter(user__department_id=user.department_id)
             elif role in ["junior", "intern"]:
-                leaves = Leave.objects.filter(user=user)
+                leaves = Leave.objects.for_list().filter(user=user)
             else:
                 return Response({"msg": "Unauthorized role"}, status=status.HTTP_403_FORBIDDEN)
             serializer = LeaveSerializer(leaves, many=True)
@@ -50,28 +79,93 @@ class LeaveStatusUpdateView(APIView):
         try:
             user = request.user
             role = get_user_role(user)
-            leave = Leave.objects.filter(id=id).first()
-            if not leave:
-                return Response({"msg": "Leave not found"}, status=status.HTTP_404_NOT_FOUND)
             if role not in ["admin", "senior"]:
                 return Response({"msg": "You do not have permission to update leave status"}, status=status.HTTP_403_FORBIDDEN)
-            new_status = request.data.get("status")
-            if new_status not in ["Approved", "Rejected"]:
+            # Accept the "Approved"/"Rejected" labels clients send, store the choice values
+            new_status = str(request.data.get("status") or "").lower()
+            if new_status not in ["approved", "rejected"]:
                 return Response({"msg": "Invalid status"}, status=status.HTTP_400_BAD_REQUEST)
-            leave.status = new_status
-            leave.save()
-            
-            try:
-                notify_leave_status(leave.user, new_status, user)
-                logger.info(f"Leave status notification sent to {leave.user.username} - Status: {new_status}")
-            except Exception as notif_error:
-                logger.exception(f"Failed to send leave status notification: {notif_error}")
-            
-            return Response({"msg": f"Leave {new_status.lower()} successfully"}, status=status.HTTP_200_OK)
+            with transaction.atomic():
+                # Locked so concurrent decisions see each other's status and
+                # only one of them posts the ledger entry
+                leave = Leave.objects.select_for_update().filter(id=id).first()
+                if not leave:
+                    return Response({"msg": "Leave not found"}, status=status.HTTP_404_NOT_FOUND)
+                leave.status = new_status
+                leave.reviewed_by = user
+                apply_leave_decision(leave)
+                leave.save()
+            # The post_save receiver notifies the employee
+            return Response({"msg": f"Leave {new_status} successfully"}, status=status.HTTP_200_OK)
+        except InsufficientBalance:
+            return Response({"msg": "Insufficient leave balance to approve this leave"}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({"msg": f"Error updating leave: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class LeaveBulkStatusUpdateView(APIView):
+    def post(self, request):
+        try:
+            user = request.user
+            role = get_user_role(user)
+            if role not in ["admin", "senior"]:
+                return Response({"msg": "You do not have permission to update leave status"}, status=status.HTTP_403_FORBIDDEN)
+            new_status = str(request.data.get("status") or "").lower()
+            if new_status not in ["approved", "rejected"]:
+                return Response({"msg": "Invalid status"}, status=status.HTTP_400_BAD_REQUEST)
+            ids = request.data.get("ids")
+            if not isinstance(ids, list) or not ids:
+                return Response({"msg": "ids must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                ids = {int(leave_id) for leave_id in ids}
+            except (TypeError, ValueError):
+                return Response({"msg": "ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+            if len(ids) > MAX_BULK_DECISIONS:
+                return Response({"msg": f"At most {MAX_BULK_DECISIONS} leaves can be updated at once"}, status=status.HTTP_400_BAD_REQUEST)
+
+            with transaction.atomic():
+                # One locking query loads the leaves with their owners for the permission check
+                leaves = list(Leave.objects.select_for_update(of=('self',)).select_related('user').filter(id__in=ids))
+                missing = ids - {leave.id for leave in leaves}
+                if missing:
+                    return Response({"msg": "Leaves not found", "ids": sorted(missing)}, status=status.HTTP_404_NOT_FOUND)
+                if role == "senior":
+                    foreign = sorted(leave.id for leave in leaves if leave.user.department_id != user.department_id)
+                    if foreign:
+                        return Response({"msg": "You can only update leaves in your department", "ids": foreign}, status=status.HTTP_403_FORBIDDEN)
+                changing = [leave for leave in leaves if leave.status.lower() != new_status]
+                if changing:
+                    Leave.objects.filter(id__in=[leave.id for leave in changing]).update(
+                        status=new_status, reviewed_by=user, updated_on=timezone.now()
+                    )
+                    apply_leave_decisions(changing, new_status)
+            unchanged_ids = sorted(ids - {leave.id for leave in changing})
+
+            if changing:
+                # The UPDATE skips post_save, so invalidate and notify here in one batch each
+                invalidate_calendar(
+                    {leave.user.department_id for leave in changing},
+                    min(leave.start_date for leave in changing),
+                    max(leave.end_date for leave in changing),
+                )
+                notify_leave_statuses([leave.user for leave in changing], new_status, user)
+            logger.info(f"{user.username} {new_status} {len(changing)} leaves in bulk")
+            return Response({
+                "msg": f"{len(changing)} leaves {new_status} successfully",
+                "data": {"updated": sorted(leave.id for leave in changing), "unchanged": unchanged_ids},
+            }, status=status.HTTP_200_OK)
+        except InsufficientBalance as e:
+            short = set(e.args[0])
+            ids = sorted(leave.id for leave in changing if (leave.user_id, leave.leave_type_id) in short)
+            return Response({"msg": "Insufficient leave balance to approve these leaves", "ids": ids}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError as e:
+            if "exclude_overlapping_active_leaves" not in str(e):
+                return Response({"msg": f"Error updating leaves: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"msg": "Approving these leaves would overlap another active leave of the same employee"}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"msg": f"Error updating leaves: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
 class LeaveDeleteView(APIView):
     def delete(self, request, id):
         try:
@@ -85,3 +179,51 @@ class LeaveDeleteView(APIView):
             return Response({"msg": "Leave deleted successfully"}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"msg": f"Error deleting leave: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class LeaveBalanceView(APIView):
+    def get(self, request):
+        try:
+            user = request.user
+            role = get_user_role(user)
+            target = user
+            user_id = request.query_params.get("user")
+            if user_id and str(user_id) != str(user.id):
+                if role not in ["admin", "senior"]:
+                    return Response({"msg": "You can only view your own leave balance"}, status=status.HTTP_403_FORBIDDEN)
+                target = User.objects.filter(id=user_id).first()
+                if not target:
+                    return Response({"msg": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+                if role == "senior" and target.department_id != user.department_id:
+                    return Response({"msg": "You can only view balances in your department"}, status=status.HTTP_403_FORBIDDEN)
+            balances = LeaveBalance.objects.select_related('leave_type').filter(user=target).order_by('leave_type__name')
+            serializer = LeaveBalanceSerializer(balances, many=True)
+            return Response({"msg": "Leave balance fetched successfully", "data": serializer.data}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"msg": f"Error fetching leave balance: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class LeaveCoverageView(APIView):
+    def get(self, request):
+        try:
+            user = request.user
+            role = get_user_role(user)
+            if role not in ["admin", "senior"]:
+                return Response({"msg": "You do not have permission to view leave coverage"}, status=status.HTTP_403_FORBIDDEN)
+            department_id = request.query_params.get("department") or user.department_id
+            if not department_id:
+                return Response({"msg": "department is required"}, status=status.HTTP_400_BAD_REQUEST)
+            if role == "senior" and str(department_id) != str(user.department_id):
+                return Response({"msg": "You can only view coverage for your department"}, status=status.HTTP_403_FORBIDDEN)
+            try:
+                start = date.fromisoformat(request.query_params["start"])
+                end = date.fromisoformat(request.query_params["end"])
+            except (KeyError, ValueError):
+                return Response({"msg": "start and end are required as YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+            if end < start or (end - start).days > 366:
+                return Response({"msg": "end must be on or after start and within a year of it"}, status=status.HTTP_400_BAD_REQUEST)
+            headcount = User.objects.filter(department_id=department_id, is_active=True).count()
+            days = get_department_coverage(department_id, start, end)
+            return Response({"msg": "Leave coverage fetched successfully", "data": {"headcount": headcount, "days": days}}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"msg": f"Error fetching leave coverage: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
@@ -3,12 +3,10 @@ import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from urllib.parse import parse_qs
-from rest_framework_simplejwt.tokens import AccessToken
-from django.contrib.auth import get_user_model
+from accounts.authentication import user_from_token
 from notifications.models import Notification
 
 logger = logging.getLogger(__name__)
-User = get_user_model()
 
 class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
@@ -94,9 +92,7 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             token = params.get("token", [None])[0]
             if not token:
                 return None
-            access_token = AccessToken(token)
-            user_id = access_token["user_id"]
-            return User.objects.get(id=user_id)
+            return user_from_token(token)
         except Exception as e:
             logger.error(f"Token authentication error: {str(e)}")
             return None
@@ -1,5 +1,5 @@
 import logging
-from django.core.mail import send_mail
+from django.core.mail import send_mail, send_mass_mail
 from django.conf import settings
 from django.utils import timezone
 from asgiref.sync import async_to_sync
@@ -31,6 +31,29 @@ def send_email(subject, message, recipient_email, fail_silently=False):
         logger.exception(f"Failed to send email to {recipient_email}: {e}")
 
 
+def broadcast_notification(notification):
+    """
+    Push a stored notification to the user's WebSocket group
+    """
+    channel_layer = get_channel_layer()
+    async_to_sync(channel_layer.group_send)(
+        f"user_{notification.user_id}",
+        {
+            "type": "notify",
+            "content": {
+                "type": "new_notification",
+                "notification": {
+                    "id": notification.id,
+                    "message": notification.message,
+                    "type": notification.type,
+                    "created_at": notification.created_at.isoformat(),
+                    "is_read": notification.is_read,
+                },
+            },
+        }
+    )
+
+
 def create_notification(user, message, notification_type, related_user=None, send_email_flag=False, email_subject=None, email_message=None):
     """
     Create a notification in DB and broadcast via WebSocket
@@ -80,6 +103,51 @@ def create_notification(user, message, notification_type, related_user=None, sen
         return None
 
 
+def create_notifications_bulk(items, notification_type, related_user=None, send_email_flag=False):
+    """
+    Create many notifications with a single INSERT, broadcast each via WebSocket
+    and send all emails over one SMTP connection
+
+    Args:
+        items: Iterable of (user, message, email_subject, email_message)
+        notification_type: Type of notification (choices from Notification.TYPE_CHOICES)
+        related_user: User who performed the action (optional)
+        send_email_flag: Whether to send the emails
+    """
+    items = list(items)
+    if not items:
+        return []
+    try:
+        notifications = Notification.objects.bulk_create([
+            Notification(user=user, message=message, type=notification_type, related_user=related_user)
+            for user, message, _, _ in items
+        ])
+        logger.info(f"{len(notifications)} {notification_type} notifications created")
+    except Exception as e:
+        logger.exception(f"Error creating notifications in bulk: {e}")
+        return []
+
+    for notification in notifications:
+        try:
+            broadcast_notification(notification)
+        except Exception as ws_error:
+            logger.warning(f"WebSocket broadcast failed: {ws_error}")
+
+    if send_email_flag:
+        from_email = getattr(settings, "DEFAULT_FROM_EMAIL", settings.EMAIL_HOST_USER)
+        messages = [
+            (email_subject, email_message, from_email, [user.email])
+            for user, _, email_subject, email_message in items
+            if user.email and email_subject and email_message
+        ]
+        try:
+            sent = send_mass_mail(messages, fail_silently=False)
+            logger.info(f"{sent} {notification_type} emails sent")
+        except Exception as e:
+            logger.exception(f"Failed to send {notification_type} emails: {e}")
+    return notifications
+
+
 def notify_password_reset(user, admin_user):
     """
     Notify user that their password was reset by admin
@@ -174,6 +242,28 @@ def notify_incomplete_shift(user, work_hours, expected_hours=8):
     )
 
 
+def notify_incomplete_shifts(shortfalls):
+    """
+    Notify many users about incomplete shifts in one batch
+
+    Args:
+        shortfalls: Iterable of (user, work_hours, expected_hours)
+    """
+    create_notifications_bulk(
+        [
+            (
+                user,
+                f"You have completed {work_hours} hours today. Expected shift: {expected_hours} hours.",
+                "Incomplete Shift Notification",
+                f"Your shift for today is incomplete. You worked {work_hours} hours, but the expected shift is {expected_hours} hours. Please contact your supervisor if this is an error.",
+            )
+            for user, work_hours, expected_hours in shortfalls
+        ],
+        notification_type="attendance",
+        send_email_flag=True,
+    )
+
+
 def notify_leave_created(user, leave_start, leave_end):
     """
     Notify user's department seniors and admin about leave request
@@ -231,6 +321,20 @@ def notify_leave_status(user, status, approved_by_user):
     )
 
 
+def notify_leave_statuses(users, status, approved_by_user):
+    """
+    Notify many users about a bulk leave decision in one batch
+    """
+    message = f"Your leave has been {status} by {get_user_display_name(approved_by_user)}"
+    email_message = f"Your leave has been {status} by {get_user_display_name(approved_by_user)}."
+    create_notifications_bulk(
+        [(user, message, f"Leave {status.capitalize()}", email_message) for user in users],
+        notification_type="leave",
+        related_user=approved_by_user,
+        send_email_flag=True,
+    )
+
+
 def notify_task_assigned(user, task_title, assigned_by_user):
     """
     Notify user that a task was assigned to them
@@ -250,6 +354,46 @@ def notify_task_assigned(user, task_title, assigned_by_user):
     )
 
 
+def notify_tasks_assigned(users, task_title, assigned_by_user):
+    """
+    Notify many users about the same task assigned in bulk, in one batch
+    """
+    message = f"Task '{task_title}' has been assigned to you by {get_user_display_name(assigned_by_user)}"
+    email_message = f"Task '{task_title}' has been assigned to you by {get_user_display_name(assigned_by_user)}."
+    create_notifications_bulk(
+        [(user, message, "Task Assigned", email_message) for user in users],
+        notification_type="task",
+        related_user=assigned_by_user,
+        send_email_flag=True,
+    )
+
+
+def notify_tasks_overdue(overdue):
+    """
+    Remind assignees and creators about newly overdue tasks in one batch
+
+    Args:
+        overdue: Iterable of (task_title, due_at, assignee, creator)
+    """
+    items = []
+    for task_title, due_at, assignee, creator in overdue:
+        due = timezone.localtime(due_at).strftime("%Y-%m-%d %H:%M")
+        items.append((
+            assignee,
+            f"Task '{task_title}' was due on {due} and is overdue",
+            "Task Overdue",
+            f"Task '{task_title}' assigned to you was due on {due} and is now overdue. Please complete it or ask for a new due date.",
+        ))
+        if creator and creator != assignee:
+            items.append((
+                creator,
+                f"Task '{task_title}' assigned to {get_user_display_name(assignee)} is overdue",
+                "Task Overdue",
+                f"Task '{task_title}' assigned to {get_user_display_name(assignee)} was due on {due} and is now overdue.",
+            ))
+    create_notifications_bulk(items, notification_type="task", send_email_flag=True)
+
+
 def notify_task_completed(user, task_title, completed_by_user):
     """
     Notify task creator that assigned task is completed
@@ -268,3 +412,22 @@ def notify_task_completed(user, task_title, completed_by_user):
         email_message=email_message
     )
 
+
+def notify_department_absences(absentees_by_department, seniors_by_department, day):
+    """
+    Send each department senior one notification listing that day's absentees
+
+    Args:
+        absentees_by_department: {department_id: [username, ...]}
+        seniors_by_department: {department_id: [senior User, ...]}
+    """
+    items = []
+    for department_id, usernames in absentees_by_department.items():
+        names = ", ".join(sorted(usernames)[:20])
+        if len(usernames) > 20:
+            names += f" and {len(usernames) - 20} more"
+        message = f"{len(usernames)} absent without approved leave on {day}: {names}"
+        email_message = f"The following employees did not check in on {day} and had no approved leave:\n{names}"
+        for senior in seniors_by_department.get(department_id, []):
+            items.append((senior, message, f"Absence Report for {day}", email_message))
+    create_notifications_bulk(items, notification_type="attendance", send_email_flag=True)
@@ -43,7 +43,7 @@ class DeleteNotificationView(APIView):
             notification = Notification.objects.filter(id=id).first()
             if not notification:
                 return Response({"msg": "Notification not found"}, status=status.HTTP_404_NOT_FOUND)
-            if role != "admin" and notification.user != user:
+            if role != "admin" and notification.user_id != user.id:
                 return Response({"msg": "You cannot delete this notification"}, status=status.HTTP_403_FORBIDDEN)
             notification.delete()
             return Response({"msg": "Notification deleted successfully"})
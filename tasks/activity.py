@@ -0,0 +1,122 @@
+"""
+Task status history: writing TaskEvent rows and reading timelines and
+cycle-time metrics from them.
+"""
+from django.db import connection
+from django.utils import timezone
+from accounts.models import User
+from core.utils import normalize_status
+from tasks.models import Task, TaskEvent
+
+CODE_STATUSES = {code: status for status, code in TaskEvent.STATUS_CODES.items()}
+
+
+def status_code(status):
+    return TaskEvent.STATUS_CODES.get(normalize_status(status)) if status else None
+
+
+def record_events(events):
+    """
+    Append many events with one INSERT. Each event is
+    (task_id, actor_id, from_status, to_status) with status values or labels.
+    """
+    now = timezone.now()
+    rows = [
+        TaskEvent(task_id=task_id, actor_id=actor_id, from_status=status_code(old), to_status=status_code(new), at=now)
+        for task_id, actor_id, old, new in events
+        if status_code(new)
+    ]
+    return TaskEvent.objects.bulk_create(rows)
+
+
+def timeline(task_id):
+    """
+    [{"from", "to", "actor", "at"}] for a task, oldest first, read through the
+    (task, at) index.
+    """
+    events = (
+        TaskEvent.objects.filter(task_id=task_id).order_by('at', 'id')
+        .values_list('from_status', 'to_status', 'actor__username', 'at')
+    )
+    return [
+        {"from": CODE_STATUSES.get(old), "to": CODE_STATUSES.get(new), "actor": actor, "at": at}
+        for old, new, actor, at in events
+    ]
+
+
+# Events of the tasks in scope with, per task, when it was opened (only for
+# tasks whose creation was logged), when each status was left, and which
+# occurrence of a status each event is. The tasks in scope are the
+# department's tasks with an event into one of the scope_statuses in
+# [start, end), found through the (to_status, at) index, so the window
+# functions only run over those tasks' events rather than the whole history.
+# The range probe is materialized so the planner cannot start from every task
+# of the department instead.
+EVENTS_CTE = """
+    WITH in_range AS MATERIALIZED (
+        SELECT DISTINCT task_id FROM {events}
+        WHERE to_status = ANY(%(scope_statuses)s) AND at >= %(start)s AND at < %(end)s
+    ), scope AS (
+        SELECT r.task_id
+        FROM in_range r
+        JOIN {tasks} t ON t.id = r.task_id
+        JOIN {users} u ON u.id = t.assigned_to_id
+        WHERE %(department)s::bigint IS NULL OR u.department_id = %(department)s::bigint
+    ), events AS (
+        SELECT e.task_id, e.to_status, e.at,
+            first_value(CASE WHEN e.from_status IS NULL THEN e.at END) OVER w AS opened_at,
+            lead(e.at) OVER w AS left_at,
+            row_number() OVER (PARTITION BY e.task_id, e.to_status ORDER BY e.at, e.id) AS nth
+        FROM {events} e
+        JOIN scope ON scope.task_id = e.task_id
+        WINDOW w AS (PARTITION BY e.task_id ORDER BY e.at, e.id)
+    )
+"""
+
+CYCLE_TIME_SQL = EVENTS_CTE + """
+    SELECT COUNT(*),
+        AVG(hours),
+        percentile_cont(0.5) WITHIN GROUP (ORDER BY hours),
+        percentile_cont(0.9) WITHIN GROUP (ORDER BY hours)
+    FROM (
+        SELECT EXTRACT(EPOCH FROM at - opened_at) / 3600 AS hours
+        FROM events
+        WHERE to_status = %(completed)s AND nth = 1 AND opened_at IS NOT NULL
+            AND at >= %(start)s AND at < %(end)s
+    ) cycles
+"""
+
+TIME_IN_STATUS_SQL = EVENTS_CTE + """
+    SELECT to_status, AVG(EXTRACT(EPOCH FROM left_at - at) / 3600)
+    FROM events
+    WHERE left_at >= %(start)s AND left_at < %(end)s
+    GROUP BY to_status
+"""
+
+
+def _hours(value):
+    return round(float(value), 2) if value is not None else None
+
+
+def cycle_time_metrics(department_id, start, end):
+    """
+    Cycle-time metrics for tasks completed in [start, end), assigned to a
+    department's members (department_id None for the whole company).
+    """
+    tables = {"events": TaskEvent._meta.db_table, "tasks": Task._meta.db_table, "users": User._meta.db_table}
+    completed_code = TaskEvent.STATUS_CODES["completed"]
+    params = {"department": department_id, "start": start, "end": end, "completed": completed_code}
+    with connection.cursor() as cursor:
+        # Tasks completed in the range
+        cursor.execute(CYCLE_TIME_SQL.format(**tables), {**params, "scope_statuses": [completed_code]})
+        completed, average, median, p90 = cursor.fetchone()
+        # Tasks that left a status in the range, i.e. had any later event in it
+        cursor.execute(TIME_IN_STATUS_SQL.format(**tables), {**params, "scope_statuses": list(CODE_STATUSES)})
+        time_in_status = {CODE_STATUSES.get(code): _hours(hours) for code, hours in cursor.fetchall()}
+    return {
+        "completed": completed,
+        "avg_hours": _hours(average),
+        "median_hours": _hours(median),
+        "p90_hours": _hours(p90),
+        "time_in_status": time_in_status,
+    }
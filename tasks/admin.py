@@ -1,8 +1,26 @@
 from django.contrib import admin
-from tasks.models import Task
+from tasks.models import Task, TaskEvent, TaskTemplate
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
-    list_display = ('title', 'status', 'created_by', 'assigned_to', 'created_at')
+    list_display = ('title', 'status', 'created_by', 'assigned_to', 'due_at', 'overdue_at', 'created_at')
     search_fields = ('title', 'created_by__username', 'assigned_to__username')
     list_filter = ('status',)
+
+
+@admin.register(TaskTemplate)
+class TaskTemplateAdmin(admin.ModelAdmin):
+    list_display = ('title', 'created_by', 'created_at')
+    search_fields = ('title',)
+
+
+@admin.register(TaskEvent)
+class TaskEventAdmin(admin.ModelAdmin):
+    list_display = ('task', 'from_status', 'to_status', 'actor', 'at')
+    list_filter = ('to_status',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,131 @@
+"""
+Task status counts per assignee and per department, cached as counters that
+status transitions move with incr/decr.
+"""
+from collections import Counter
+from django.core.cache import cache
+from django.db.models import Count
+from accounts.models import Department, User
+from core.utils import normalize_status, normalized_status_expression
+from tasks.models import Task
+
+CACHE_TIMEOUT = 60 * 60
+STATUSES = [value for value, _ in Task.STATUS_CHOICES]
+
+
+def counter_key(kind, group_id, status):
+    return f"task-board:{kind}:{group_id if group_id is not None else 'none'}:{status}"
+
+
+def ready_key(kind, group_id):
+    return f"task-board:ready:{kind}:{group_id if group_id is not None else 'none'}"
+
+
+def _seed(kind, group_id, counts, group_ids):
+    values = {
+        counter_key(kind, member, status): counts.get((member, status), 0)
+        for member in group_ids for status in STATUSES
+    }
+    values[ready_key(kind, group_id)] = True
+    cache.set_many(values, CACHE_TIMEOUT)
+
+
+def _read(kind, group_id, member_ids):
+    """
+    {member_id: {status: count}} from the cache, or None if the scope is not
+    seeded or any of its counters has been evicted.
+    """
+    keys = [counter_key(kind, member, status) for member in member_ids for status in STATUSES]
+    cached = cache.get_many([ready_key(kind, group_id)] + keys)
+    if ready_key(kind, group_id) not in cached or len(cached) != len(keys) + 1:
+        return None
+    return {
+        member: {status: cached[counter_key(kind, member, status)] for status in STATUSES}
+        for member in member_ids
+    }
+
+
+def assignee_board(department_id):
+    """
+    Status counts for every member of a department (None for users without one).
+    Returns [(user_id, username, {status: count})] ordered by username.
+    """
+    members = User.objects.filter(is_active=True).order_by('username')
+    members = members.filter(department__isnull=True) if department_id is None else members.filter(department_id=department_id)
+    members = list(members.values_list('id', 'username'))
+    member_ids = [user_id for user_id, _ in members]
+    counts = _read("user", f"department-{department_id}", member_ids)
+    if counts is None:
+        rows = (
+            Task.objects.filter(assigned_to_id__in=member_ids)
+            .annotate(normalized=normalized_status_expression())
+            .values_list('assigned_to_id', 'normalized')
+            .annotate(n=Count('id'))
+        )
+        seeded = {(user_id, status): n for user_id, status, n in rows}
+        _seed("user", f"department-{department_id}", seeded, member_ids)
+        counts = {user_id: {status: seeded.get((user_id, status), 0) for status in STATUSES} for user_id in member_ids}
+    return [(user_id, username, counts[user_id]) for user_id, username in members]
+
+
+def department_board():
+    """
+    Status counts per department of the assignee, company-wide.
+    Returns [(department_id, name, {status: count})] with None for no department.
+    """
+    departments = list(Department.objects.order_by('name').values_list('id', 'name')) + [(None, None)]
+    department_ids = [department_id for department_id, _ in departments]
+    counts = _read("department", "all", department_ids)
+    if counts is None:
+        rows = (
+            Task.objects.annotate(normalized=normalized_status_expression())
+            .values_list('assigned_to__department_id', 'normalized')
+            .annotate(n=Count('id'))
+        )
+        seeded = {(department_id, status): n for department_id, status, n in rows}
+        _seed("department", "all", seeded, department_ids)
+        counts = {
+            department_id: {status: seeded.get((department_id, status), 0) for status in STATUSES}
+            for department_id in department_ids
+        }
+    return [(department_id, name, counts[department_id]) for department_id, name in departments]
+
+
+def _move(kind, group_id, status, delta):
+    if status not in STATUSES:
+        return
+    try:
+        cache.incr(counter_key(kind, group_id, status), delta)
+    except ValueError:
+        # Scope not cached; it will be seeded from the database when read
+        pass
+
+
+def record_transition(assignee_id, department_id, old_status=None, new_status=None):
+    """
+    Move one task's count from old_status to new_status for its assignee and
+    the assignee's department. Pass old_status=None for a new task and
+    new_status=None for a deleted one.
+    """
+    for status, delta in ((old_status, -1), (new_status, 1)):
+        if status is None:
+            continue
+        status = normalize_status(status)
+        _move("user", assignee_id, status, delta)
+        _move("department", department_id, status, delta)
+
+
+def record_assignments(assignees, status="pending"):
+    """
+    Count new tasks created without post_save (bulk_create), given the
+    (assignee_id, department_id) of each.
+    """
+    status = normalize_status(status)
+    per_user, per_department = Counter(), Counter()
+    for assignee_id, department_id in assignees:
+        per_user[assignee_id] += 1
+        per_department[department_id] += 1
+    for assignee_id, n in per_user.items():
+        _move("user", assignee_id, status, n)
+    for department_id, n in per_department.items():
+        _move("department", department_id, status, n)
@@ -1,8 +1,58 @@
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connections, models
 from django.utils import timezone
 from accounts.models import User
+from core.models import FieldTrackerMixin, ListQuerySet
+from core.utils import status_forms
 
-class Task(models.Model):
+
+# Statuses in which a task can become overdue
+OPEN_STATUSES = tuple(status_forms("pending", "in_progress"))
+
+
+class TaskQuerySet(ListQuerySet):
+    # What TaskSerializer renders; both users are shown by username
+    list_select_related = ('created_by', 'assigned_to')
+    list_only = (
+        'id', 'title', 'description', 'status', 'created_at', 'updated_at',
+        'created_by__username', 'assigned_to__username', 'due_at', 'overdue_at',
+    )
+
+    def claim_overdue(self, now):
+        """
+        Mark every open task whose due date has passed and that has not been
+        flagged yet as overdue, and return their (id, title, assigned_to_id,
+        created_by_id, due_at) in one statement. The range scan runs on the
+        partial index of open, unflagged tasks, so a run only touches tasks
+        that became overdue since the last one.
+        """
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {self.model._meta.db_table} SET overdue_at = %(now)s "
+                f"WHERE due_at <= %(now)s AND overdue_at IS NULL AND status = ANY(%(open)s) "
+                f"RETURNING id, title, assigned_to_id, created_by_id, due_at",
+                {"now": now, "open": list(OPEN_STATUSES)},
+            )
+            return cursor.fetchall()
+
+
+class TaskTemplate(models.Model):
+    """
+    A reusable task definition, assigned to many people at once through the
+    bulk-assign endpoint.
+    """
+    title = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="task_templates")
+    sla_hours = models.PositiveIntegerField(null=True, blank=True)  # due this long after assignment
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.title
+
+
+class Task(FieldTrackerMixin, models.Model):
     STATUS_CHOICES = [
         ("pending", "Pending"),
         ("in_progress", "In Progress"),
@@ -15,8 +65,77 @@ class Task(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="created_tasks")
     assigned_to = models.ForeignKey(User, on_delete=models.CASCADE, related_name="assigned_tasks")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    template = models.ForeignKey(TaskTemplate, on_delete=models.SET_NULL, null=True, blank=True, related_name="tasks")
+    due_at = models.DateTimeField(null=True, blank=True)
+    overdue_at = models.DateTimeField(null=True, blank=True)  # when the overdue reminder went out
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
+    # Title words rank above description words; maintained by PostgreSQL
+    search_vector = models.GeneratedField(
+        expression=SearchVector('title', weight='A', config='english') + SearchVector('description', weight='B', config='english'),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = TaskQuerySet.as_manager()
+
+    tracked_fields = ('status', 'assigned_to', 'due_at')
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='task_search_gin_idx'),
+            # Keyset pages are read newest first, overall and within each facet
+            models.Index(fields=['-created_at', '-id'], name='task_created_keyset_idx'),
+            models.Index(fields=['assigned_to', '-created_at', '-id'], name='task_assignee_keyset_idx'),
+            models.Index(fields=['created_by', '-created_at', '-id'], name='task_creator_keyset_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='task_status_keyset_idx'),
+            models.Index(
+                fields=['due_at'],
+                condition=models.Q(overdue_at__isnull=True, due_at__isnull=False, status__in=OPEN_STATUSES),
+                name='task_open_due_idx',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # A new due date gets its own overdue reminder
+        if not self._state.adding and self.overdue_at and self.has_changed('due_at'):
+            self.overdue_at = None
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.title} ({self.status})"
+
+
+class TaskEvent(models.Model):
+    """
+    Append-only history of task status changes. Statuses are stored as small
+    integer codes; from_status is null for the event that creates the task.
+    """
+    # Codes are stored, so never renumber; add new statuses with new codes
+    STATUS_CODES = {
+        "pending": 1,
+        "in_progress": 2,
+        "completed": 3,
+        "reviewed": 4,
+    }
+    CODE_CHOICES = [(code, status) for status, code in STATUS_CODES.items()]
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="events")
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    from_status = models.PositiveSmallIntegerField(choices=CODE_CHOICES, null=True, blank=True)
+    to_status = models.PositiveSmallIntegerField(choices=CODE_CHOICES)
+    at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', 'at'], name='task_event_timeline_idx'),
+            models.Index(fields=['to_status', 'at'], name='task_event_status_at_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Task events are append-only")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Task {self.task_id}: {self.get_from_status_display()} -> {self.get_to_status_display()}"
@@ -0,0 +1,111 @@
+"""
+Task search: full-text matching, facet filters and counts, and keyset
+pagination newest first.
+"""
+import base64
+from collections import Counter
+from datetime import datetime
+from django.contrib.postgres.search import SearchQuery
+from django.db import models
+from django.db.models import F, Func, Value
+from accounts.models import User
+from core.utils import normalized_status_expression
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+FACET_LIMIT = 20
+FACET_SAMPLE_SIZE = 10000
+SPARSE_MATCH_LIMIT = 1000
+
+
+class Row(Func):
+    function = 'ROW'
+    output_field = models.Field()
+
+
+def encode_cursor(task):
+    raw = f"{task.created_at.isoformat()}|{task.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    (created_at, id) from a cursor. Raises ValueError for a malformed one.
+    """
+    try:
+        created_at, task_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(task_id)
+    except (TypeError, UnicodeDecodeError, base64.binascii.Error) as e:
+        raise ValueError(str(e))
+
+
+def filter_tasks(tasks, q=None, statuses=None, assigned_to=None, created_by=None, created_from=None, created_to=None,
+                 per_user=False):
+    """
+    Apply the text query and facet filters. statuses holds stored forms (see
+    core.utils.status_forms). per_user marks a queryset already limited to one
+    user's tasks. A text query over many users' tasks runs the match probe here.
+    """
+    if statuses:
+        tasks = tasks.filter(status__in=statuses)
+    if assigned_to:
+        tasks = tasks.filter(assigned_to_id=assigned_to)
+    if created_by:
+        tasks = tasks.filter(created_by_id=created_by)
+    if created_from:
+        tasks = tasks.filter(created_at__gte=created_from)
+    if created_to:
+        tasks = tasks.filter(created_at__lt=created_to)
+    if q:
+        tasks = tasks.filter(search_vector=SearchQuery(q, search_type='websearch', config='english'))
+        if not (per_user or assigned_to or created_by):
+            # The planner underestimates rare terms and would walk the recency
+            # index filtering almost every row; read a sparse match set by id
+            matches = list(tasks.order_by().values_list('id', flat=True)[:SPARSE_MATCH_LIMIT + 1])
+            if len(matches) <= SPARSE_MATCH_LIMIT:
+                tasks = tasks.filter(id__in=matches)
+    return tasks
+
+
+def page(tasks, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of tasks newest first, after the cursor if given.
+    Returns (tasks, next_cursor), next_cursor being None on the last page.
+    """
+    if cursor:
+        created_at, task_id = decode_cursor(cursor)
+        # A row comparison keeps the keyset condition a single index range
+        tasks = tasks.alias(position=Row(F('created_at'), F('id'))).filter(
+            position__lt=Row(Value(created_at, models.DateTimeField()), Value(task_id))
+        )
+    rows = list(tasks.order_by('-created_at', '-id')[:limit + 1])
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
+
+
+def facet_counts(tasks, facets):
+    """
+    Counts of matching tasks per status, assignee and/or creator, the largest
+    FACET_LIMIT values of each. Only the FACET_SAMPLE_SIZE newest matches are
+    counted, read in one pass like a page through the keyset indexes, so the
+    counts are approximate when more tasks match. Returns (counts, approximate).
+    """
+    fields = {"status": 'normalized_status', "assignee": 'assigned_to_id', "creator": 'created_by_id'}
+    rows = list(
+        tasks.order_by('-created_at', '-id')
+        .annotate(normalized_status=normalized_status_expression())
+        .values_list(*(fields[facet] for facet in facets))[:FACET_SAMPLE_SIZE + 1]
+    )
+    approximate = len(rows) > FACET_SAMPLE_SIZE
+    rows = rows[:FACET_SAMPLE_SIZE]
+    top = {facet: Counter(row[i] for row in rows).most_common(FACET_LIMIT) for i, facet in enumerate(facets)}
+    user_ids = {value for facet in facets if facet != "status" for value, _ in top[facet] if value is not None}
+    usernames = dict(User.objects.filter(id__in=user_ids).values_list('id', 'username')) if user_ids else {}
+    counts = {}
+    for facet in facets:
+        counts[facet] = [
+            {"value": value, **({} if facet == "status" else {"label": usernames.get(value)}), "count": n}
+            for value, n in top[facet]
+        ]
+    return counts, approximate
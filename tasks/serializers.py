@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from tasks.models import Task
+from tasks.models import Task, TaskTemplate
 from accounts.models import User
 
 class TaskSerializer(serializers.ModelSerializer):
@@ -10,4 +10,13 @@ class TaskSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Task
-        fields = ['id', 'title', 'description', 'status', 'created_by', 'assigned_to', 'created_at', 'updated_at']
+        fields = ['id', 'title', 'description', 'status', 'created_by', 'assigned_to', 'due_at', 'overdue_at', 'created_at', 'updated_at']
+        read_only_fields = ['overdue_at']
+
+
+class TaskTemplateSerializer(serializers.ModelSerializer):
+    created_by = serializers.StringRelatedField(read_only=True)
+
+    class Meta:
+        model = TaskTemplate
+        fields = ['id', 'title', 'description', 'sla_hours', 'created_by', 'created_at']
@@ -1,23 +1,14 @@
 import logging
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from accounts.models import User
+from tasks.activity import record_events
+from tasks.board import record_transition
 from tasks.models import Task
 from notifications.utils import notify_task_assigned, notify_task_completed
 
 logger = logging.getLogger(__name__)
 
-task_original_status = {}
-
-
-@receiver(pre_save, sender=Task)
-def store_task_status(sender, instance, **kwargs):
-    try:
-        if instance.pk:
-            old_instance = Task.objects.get(pk=instance.pk)
-            task_original_status[instance.pk] = old_instance.status
-    except Exception as e:
-        logger.exception(f"Error storing task status: {e}")
-
 
 @receiver(post_save, sender=Task)
 def notify_on_task_events(sender, instance, created, **kwargs):
@@ -26,10 +17,52 @@ def notify_on_task_events(sender, instance, created, **kwargs):
             logger.info(f"Task created by {instance.created_by.username} and assigned to {instance.assigned_to.username}")
             notify_task_assigned(instance.assigned_to, instance.title, instance.created_by)
         else:
-            old_status = task_original_status.pop(instance.pk, None)
-            if old_status and old_status != instance.status:
+            old_status = instance.previous('status')
+            if old_status and instance.has_changed('status'):
                 logger.info(f"Task status changed from {old_status} to {instance.status}")
                 if instance.status == 'completed':
                     notify_task_completed(instance.created_by, instance.title, instance.assigned_to)
     except Exception as e:
         logger.exception(f"Error in task signal: {e}")
+
+
+@receiver(post_save, sender=Task)
+def log_task_event(sender, instance, created, **kwargs):
+    try:
+        if created:
+            record_events([(instance.id, instance.created_by_id, None, instance.status)])
+        elif instance.previous('status') and instance.has_changed('status'):
+            # Views set changed_by on the instance before saving
+            actor = getattr(instance, 'changed_by', None)
+            record_events([(instance.id, actor.id if actor else None, instance.previous('status'), instance.status)])
+    except Exception as e:
+        logger.exception(f"Error logging task event: {e}")
+
+
+@receiver(post_save, sender=Task)
+def update_task_board(sender, instance, created, **kwargs):
+    try:
+        if created:
+            record_transition(instance.assigned_to_id, instance.assigned_to.department_id, None, instance.status)
+            return
+        old_status = instance.previous('status')
+        old_assignee = instance.previous('assigned_to')
+        if old_status is None or old_assignee is None:
+            # Saved from a partial load; the board catches up when its keys expire
+            return
+        if old_assignee != instance.assigned_to_id:
+            old_department = User.objects.filter(id=old_assignee).values_list('department_id', flat=True).first()
+            record_transition(old_assignee, old_department, old_status, None)
+            record_transition(instance.assigned_to_id, instance.assigned_to.department_id, None, instance.status)
+        elif old_status != instance.status:
+            record_transition(instance.assigned_to_id, instance.assigned_to.department_id, old_status, instance.status)
+    except Exception as e:
+        logger.exception(f"Error updating task board: {e}")
+
+
+@receiver(post_delete, sender=Task)
+def remove_from_task_board(sender, instance, **kwargs):
+    try:
+        record_transition(instance.assigned_to_id, instance.assigned_to.department_id, instance.previous('status') or instance.status, None)
+    except Exception as e:
+        logger.exception(f"Error updating task board: {e}")
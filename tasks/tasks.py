@@ -0,0 +1,42 @@
+import logging
+from celery import shared_task
+from django.utils import timezone
+from accounts.models import User
+from tasks.models import Task
+from notifications.utils import notify_tasks_assigned, notify_tasks_overdue
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def notify_bulk_assignment(user_ids, task_title, assigned_by_id):
+    """
+    Send the notifications for a bulk assignment as one batch: one INSERT and
+    one SMTP connection for all assignees.
+    """
+    users = User.objects.only('id', 'email', 'username').filter(id__in=user_ids)
+    assigned_by = User.objects.filter(id=assigned_by_id).first()
+    notify_tasks_assigned(list(users), task_title, assigned_by)
+    logger.info(f"Notified {len(user_ids)} assignees of task '{task_title}'")
+    return len(user_ids)
+
+
+@shared_task
+def flag_overdue_tasks():
+    """
+    Periodic job: mark open tasks that passed their due date since the last
+    run in one UPDATE and remind their assignees and creators in one batch.
+    """
+    overdue = Task.objects.claim_overdue(timezone.now())
+    if not overdue:
+        return 0
+    users = User.objects.in_bulk(
+        {assigned_to_id for _, _, assigned_to_id, _, _ in overdue} | {created_by_id for _, _, _, created_by_id, _ in overdue}
+    )
+    notify_tasks_overdue(
+        (title, due_at, users[assigned_to_id], users.get(created_by_id))
+        for _, title, assigned_to_id, created_by_id, due_at in overdue
+        if assigned_to_id in users
+    )
+    logger.info(f"Flagged {len(overdue)} overdue tasks")
+    return len(overdue)
@@ -1,3 +1,207 @@
+from datetime import timedelta
+from unittest import mock
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import Department, Role, User
+from tasks.board import assignee_board, department_board
+from tasks.models import Task, TaskEvent, TaskTemplate
 
-# Create your tests here.
+
+class TaskStatusTrackingTests(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(email="lead@example.com", username="lead", password="pass")
+        self.assignee = User.objects.create_user(email="dev@example.com", username="dev", password="pass")
+        with mock.patch("tasks.signals.notify_task_assigned"):
+            created = Task.objects.create(title="Report", created_by=self.creator, assigned_to=self.assignee)
+        self.task = Task.objects.get(pk=created.pk)
+
+    def test_unchanged_save_is_a_single_update(self):
+        self.task.title = "Quarterly report"
+        with mock.patch("tasks.signals.notify_task_completed") as notify, self.assertNumQueries(1):
+            self.task.save()
+        notify.assert_not_called()
+
+    def test_completion_notifies_creator_without_reloading_the_row(self):
+        self.task.status = 'completed'
+        with mock.patch("tasks.signals.notify_task_completed") as notify, self.assertNumQueries(4):
+            # UPDATE, the event INSERT, and loading created_by and assigned_to for the notification
+            self.task.save()
+        notify.assert_called_once_with(self.creator, "Report", self.assignee)
+
+    def test_failed_save_keeps_previous_status(self):
+        self.task.status = 'in_progress'
+        with mock.patch("django.db.models.Model.save", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.task.save()
+        self.assertEqual(self.task.previous('status'), 'pending')
+        self.assertTrue(self.task.has_changed('status'))
+
+
+class TaskStatusUpdateViewTests(TestCase):
+    def setUp(self):
+        junior = Role.objects.create(name="junior")
+        self.creator = User.objects.create_user(email="lead@example.com", username="lead", password="pass")
+        self.assignee = User.objects.create_user(email="dev@example.com", username="dev", password="pass", role=junior)
+        with mock.patch("tasks.signals.notify_task_assigned"):
+            self.task = Task.objects.create(title="Report", created_by=self.creator, assigned_to=self.assignee)
+        self.client = APIClient()
+        self.client.force_authenticate(self.assignee)
+
+    def test_label_is_stored_as_value_and_completion_notifies_once(self):
+        with mock.patch("tasks.signals.notify_task_completed") as notify:
+            response = self.client.patch(f"/api/tasks/status/{self.task.id}/", {"status": "Completed"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, "completed")
+        notify.assert_called_once_with(self.creator, "Report", self.assignee)
+        events = list(TaskEvent.objects.filter(task=self.task).order_by('at', 'id').values_list('from_status', 'to_status', 'actor'))
+        codes = TaskEvent.STATUS_CODES
+        self.assertEqual(events, [(None, codes["pending"], self.creator.id), (codes["pending"], codes["completed"], self.assignee.id)])
+
+
+class TaskListQueryCountTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@example.com", username="admin", password="pass", role=Role.objects.create(name="admin")
+        )
+        users = [User.objects.create_user(email=f"u{i}@example.com", username=f"u{i}", password="pass") for i in range(5)]
+        with mock.patch("tasks.signals.notify_task_assigned"):
+            for i, user in enumerate(users):
+                Task.objects.create(title=f"Task {i}", created_by=users[i - 1], assigned_to=user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_list_is_one_query_regardless_of_rows(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/tasks/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["data"]), 5)
+        pairs = {(task["created_by"], task["assigned_to"]) for task in response.data["data"]}
+        self.assertIn(("u4", "u0"), pairs)
+
+
+class TaskBulkAssignViewTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email="admin@example.com", username="admin", password="pass", role=Role.objects.create(name="admin")
+        )
+        self.users = [User.objects.create_user(email=f"u{i}@example.com", username=f"u{i}", password="pass") for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_broker_failure_after_commit_still_reports_created_tasks(self):
+        with mock.patch("tasks.views.notify_bulk_assignment.delay", side_effect=ConnectionError("broker down")), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/tasks/bulk-assign/", {"title": "Training", "user_ids": [u.id for u in self.users]}, format="json"
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Task.objects.filter(title="Training").count(), 3)
+
+
+class TaskBoardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.department = Department.objects.create(name="Platform")
+        self.lead = User.objects.create_user(email="pm@example.com", username="pm", password="pass")
+        self.dev = User.objects.create_user(email="eng@example.com", username="eng", password="pass", department=self.department)
+
+    def create_task(self, title):
+        with mock.patch("tasks.signals.notify_task_assigned"):
+            return Task.objects.create(title=title, created_by=self.lead, assigned_to=self.dev)
+
+    def test_seeded_board_follows_task_transitions(self):
+        legacy = self.create_task("Legacy")
+        Task.objects.filter(pk=legacy.pk).update(status="In Progress")
+        [(user_id, _, counts)] = assignee_board(self.department.id)
+        self.assertEqual((user_id, counts["pending"], counts["in_progress"]), (self.dev.id, 0, 1))
+        task = self.create_task("Fix login")
+        task.status = "completed"
+        with mock.patch("tasks.signals.notify_task_completed"):
+            task.save()
+        counts = assignee_board(self.department.id)[0][2]
+        self.assertEqual((counts["pending"], counts["in_progress"], counts["completed"]), (0, 1, 1))
+        departments = {department_id: counts for department_id, _, counts in department_board()}
+        self.assertEqual(departments[self.department.id]["completed"], 1)
+
+
+class TaskTemplateAssignTests(TestCase):
+    def setUp(self):
+        self.department = Department.objects.create(name="Compliance")
+        self.senior = User.objects.create_user(
+            email="officer@example.com", username="officer", password="pass",
+            role=Role.objects.create(name="senior"), department=self.department,
+        )
+        self.members = [
+            User.objects.create_user(email=f"analyst{i}@example.com", username=f"analyst{i}", password="pass", department=self.department)
+            for i in range(2)
+        ]
+        User.objects.create_user(email="outsider@example.com", username="outsider", password="pass")
+        self.template = TaskTemplate.objects.create(title="Policy review", description="Read and sign", created_by=self.senior)
+        self.client = APIClient()
+        self.client.force_authenticate(self.senior)
+
+    def test_template_is_assigned_to_the_department_with_one_notification_job(self):
+        with mock.patch("tasks.views.notify_bulk_assignment.delay") as delay, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/tasks/bulk-assign/", {"template": self.template.id, "department": self.department.id}, format="json")
+        self.assertEqual(response.status_code, 201)
+        assignees = {self.senior.id} | {member.id for member in self.members}
+        tasks = Task.objects.filter(template=self.template)
+        self.assertEqual(set(tasks.values_list("assigned_to_id", flat=True)), assignees)
+        self.assertEqual(set(tasks.values_list("title", flat=True)), {"Policy review"})
+        delay.assert_called_once()
+        self.assertEqual(set(delay.call_args.args[0]), assignees)
+
+
+class OverdueTaskTests(TestCase):
+    def test_overdue_open_tasks_are_claimed_once_per_due_date(self):
+        lead = User.objects.create_user(email="owner@example.com", username="owner", password="pass")
+        dev = User.objects.create_user(email="maker@example.com", username="maker", password="pass")
+        now = timezone.now()
+        with mock.patch("tasks.signals.notify_task_assigned"):
+            late = Task.objects.create(title="Late", created_by=lead, assigned_to=dev, due_at=now - timedelta(hours=1))
+            legacy = Task.objects.create(title="Legacy", created_by=lead, assigned_to=dev, due_at=now - timedelta(hours=1))
+            Task.objects.create(title="Later", created_by=lead, assigned_to=dev, due_at=now + timedelta(hours=1))
+            Task.objects.create(title="Done", created_by=lead, assigned_to=dev, due_at=now - timedelta(hours=1), status="completed")
+        Task.objects.filter(pk=legacy.pk).update(status="In Progress")
+        self.assertEqual(sorted(row[0] for row in Task.objects.claim_overdue(now)), [late.id, legacy.id])
+        self.assertEqual(Task.objects.claim_overdue(now), [])
+        late = Task.objects.get(pk=late.pk)
+        late.due_at = now - timedelta(minutes=30)
+        late.save()
+        self.assertEqual([row[0] for row in Task.objects.claim_overdue(now)], [late.id])
+
+
+class TaskSearchTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(
+            email="chief@example.com", username="chief", password="pass", role=Role.objects.create(name="admin")
+        )
+        dev = User.objects.create_user(email="coder@example.com", username="coder", password="pass")
+        with mock.patch("tasks.signals.notify_task_assigned"):
+            self.tasks = [
+                Task.objects.create(title=f"Migrate invoice export {i}", description="Billing", created_by=admin, assigned_to=dev)
+                for i in range(3)
+            ]
+            Task.objects.create(title="Plan offsite", created_by=admin, assigned_to=dev)
+        Task.objects.filter(pk=self.tasks[0].pk).update(status="In Progress")
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def search(self, **params):
+        response = self.client.get("/api/tasks/search/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_text_matches_page_by_cursor_newest_first(self):
+        first = self.search(q="invoices", limit=2)
+        second = self.search(q="invoices", limit=2, cursor=first["next_cursor"])
+        self.assertEqual([task["id"] for task in first["data"] + second["data"]], [task.id for task in reversed(self.tasks)])
+        self.assertIsNone(second["next_cursor"])
+
+    def test_status_filter_and_facets_include_legacy_labels(self):
+        data = self.search(q="invoice", status="in_progress", facets="status")
+        self.assertEqual([task["id"] for task in data["data"]], [self.tasks[0].id])
+        self.assertEqual(data["facets"]["status"], [{"value": "in_progress", "count": 1}])
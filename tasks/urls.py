@@ -1,5 +1,9 @@
 from django.urls import path
-from tasks.views import TaskListCreateView, TaskDetailView, TaskStatusUpdateView
+from tasks.views import (
+    TaskListCreateView, TaskDetailView, TaskStatusUpdateView, TaskBoardView,
+    TaskTemplateView, TaskBulkAssignView, TaskTimelineView, TaskCycleTimeView,
+    TaskSearchView,
+)
 
 urlpatterns = [
     path("tasks/", TaskListCreateView.as_view(), name="list-tasks"),
@@ -8,4 +12,10 @@ urlpatterns = [
     path("tasks/update/<int:id>/", TaskDetailView.as_view(), name="update-task"),
     path("tasks/delete/<int:id>/", TaskDetailView.as_view(), name="delete-task"),
     path("tasks/status/<int:id>/", TaskStatusUpdateView.as_view(), name="update-task-status"),
+    path("tasks/templates/", TaskTemplateView.as_view(), name="task-templates"),
+    path("tasks/bulk-assign/", TaskBulkAssignView.as_view(), name="bulk-assign-tasks"),
+    path("tasks/<int:id>/timeline/", TaskTimelineView.as_view(), name="task-timeline"),
+    path("tasks/cycle-time/", TaskCycleTimeView.as_view(), name="task-cycle-time"),
+    path("tasks/search/", TaskSearchView.as_view(), name="search-tasks"),
+    path("tasks/board/", TaskBoardView.as_view(), name="task-board"),
 ]
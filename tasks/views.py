@@ -1,30 +1,58 @@
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from tasks.models import Task
-from tasks.serializers import TaskSerializer
+from tasks.activity import cycle_time_metrics, record_events, timeline
+from tasks.board import assignee_board, department_board, record_assignments, STATUSES
+from tasks.models import Task, TaskTemplate
+from tasks.search import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, facet_counts, filter_tasks, page
+from tasks.serializers import TaskSerializer, TaskTemplateSerializer
+from tasks.tasks import notify_bulk_assignment
 from accounts.models import User
-from notifications.utils import notify_task_completed
+from core.utils import status_forms
+from datetime import date, datetime, time, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
+MAX_BULK_ASSIGNEES = 1000
+
+STATUS_VALUES = {
+    key.lower(): value for value, label in Task.STATUS_CHOICES for key in (value, label)
+}
+
 def get_user_role(user):
     return user.role.name if user.role else None
 
 
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def visible_tasks(user):
+    """
+    List queryset of the tasks a user may see: all for admins, those they
+    created for seniors, those assigned to them for juniors and interns.
+    None for other roles.
+    """
+    role = get_user_role(user)
+    if role == "admin":
+        return Task.objects.for_list()
+    elif role == "senior":
+        return Task.objects.for_list().filter(created_by=user)
+    elif role in ["junior", "intern"]:
+        return Task.objects.for_list().filter(assigned_to=user)
+    return None
+
+
 class TaskListCreateView(APIView):
 
     def get(self, request):
         try:
-            role = get_user_role(request.user)
-            if role == "admin":
-                tasks = Task.objects.all()
-            elif role == "senior":
-                tasks = Task.objects.filter(created_by=request.user)
-            elif role in ["junior", "intern"]:
-                tasks = Task.objects.filter(assigned_to=request.user)
-            else:
+            tasks = visible_tasks(request.user)
+            if tasks is None:
                 return Response({"msg": "Unauthorized role"}, status=status.HTTP_403_FORBIDDEN)
             serializer = TaskSerializer(tasks, many=True)
             return Response({"msg": "Tasks fetched successfully", "data": serializer.data}, status=status.HTTP_200_OK)
@@ -65,10 +93,11 @@ class TaskDetailView(APIView):
             role = get_user_role(request.user)
             if role not in ["admin", "senior"]:
                 return Response({"msg": "You cannot edit this task"}, status=status.HTTP_403_FORBIDDEN)
-            if role == "senior" and task.created_by != request.user:
+            if role == "senior" and task.created_by_id != request.user.id:
                 return Response({"msg": "You can only edit tasks you created"}, status=status.HTTP_403_FORBIDDEN)
             serializer = TaskSerializer(task, data=request.data, partial=True)
             if serializer.is_valid():
+                task.changed_by = request.user
                 serializer.save()
                 return Response({"msg": "Task updated successfully"}, status=status.HTTP_200_OK)
             return Response({"msg": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
@@ -84,7 +113,7 @@ class TaskDetailView(APIView):
             if role == "admin":
                 pass
             elif role == "senior":
-                if task.created_by != request.user:
+                if task.created_by_id != request.user.id:
                     return Response({"msg": "You can only delete tasks you created"}, status=status.HTTP_403_FORBIDDEN)
             else:
                 return Response({"msg": "You do not have permission to delete tasks"}, status=status.HTTP_403_FORBIDDEN)
@@ -105,31 +134,291 @@ class TaskStatusUpdateView(APIView):
             new_status = request.data.get("status")
             if not new_status:
                 return Response({"msg": "Status is required"}, status=status.HTTP_400_BAD_REQUEST)
-            allowed_status = ["Pending", "In Progress", "Completed", "Reviewed"]
-            if new_status not in allowed_status:
+            # Accept the stored value or its display label ("In Progress")
+            new_status = STATUS_VALUES.get(str(new_status).lower())
+            if not new_status:
                 return Response({"msg": "Invalid status value"}, status=status.HTTP_400_BAD_REQUEST)
             if role == "admin":
                 pass
             elif role == "senior":
-                if task.created_by != request.user:
+                if task.created_by_id != request.user.id:
                     return Response({"msg": "You can only update status of your created tasks"}, status=status.HTTP_403_FORBIDDEN)
             elif role in ["junior", "intern"]:
-                if task.assigned_to != request.user:
+                if task.assigned_to_id != request.user.id:
                     return Response({"msg": "You can only update status of your assigned tasks"}, status=status.HTTP_403_FORBIDDEN)
-                if new_status not in ["In Progress", "Completed"]:
+                if new_status not in ["in_progress", "completed"]:
                     return Response({"msg": "You cannot set this status"}, status=status.HTTP_400_BAD_REQUEST)
             else:
                 return Response({"msg": "Unauthorized role"}, status=status.HTTP_403_FORBIDDEN)
             task.status = new_status
+            task.changed_by = request.user
+            # post_save logs the event and notifies the creator on completion
             task.save()
-            
-            if new_status == "completed":
-                try:
-                    notify_task_completed(task.created_by, task.title, request.user)
-                    logger.info(f"Task completion notification sent to {task.created_by.username} for task '{task.title}'")
-                except Exception as notif_error:
-                    logger.exception(f"Failed to send task completion notification: {notif_error}")
-            
             return Response({"msg": f"Task status updated to '{new_status}'"}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"msg": f"Error updating status: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class TaskBoardView(APIView):
+    """
+    Task counts per status, grouped by assignee within a department or, for
+    admins, by department across the company (?group_by=department).
+    """
+
+    def get(self, request):
+        try:
+            user = request.user
+            role = get_user_role(user)
+            group_by = request.query_params.get("group_by", "assignee")
+            if group_by not in ["assignee", "department"]:
+                return Response({"msg": "group_by must be 'assignee' or 'department'"}, status=status.HTTP_400_BAD_REQUEST)
+            if group_by == "department":
+                if role != "admin":
+                    return Response({"msg": "Only admin can view the company task board"}, status=status.HTTP_403_FORBIDDEN)
+                rows = [
+                    {"department_id": department_id, "department": name, "counts": counts, "total": sum(counts.values())}
+                    for department_id, name, counts in department_board()
+                ]
+                return Response({"msg": "Task board fetched successfully", "statuses": STATUSES, "data": rows}, status=status.HTTP_200_OK)
+            if role == "admin":
+                department = request.query_params.get("department") or user.department_id
+            elif role in ["senior", "junior", "intern"]:
+                department = user.department_id
+            else:
+                return Response({"msg": "Unauthorized role"}, status=status.HTTP_403_FORBIDDEN)
+            board = assignee_board(int(department) if department else None)
+            if role in ["junior", "intern"]:
+                board = [row for row in board if row[0] == user.id]
+            rows = [
+                {"user_id": user_id, "username": username, "counts": counts, "total": sum(counts.values())}
+                for user_id, username, counts in board
+            ]
+            return Response({"msg": "Task board fetched successfully", "statuses": STATUSES, "data": rows}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"msg": f"Error fetching task board: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class TaskTemplateView(APIView):
+
+    def get(self, request):
+        try:
+            if get_user_role(request.user) not in ["admin", "senior"]:
+                return Response({"msg": "You do not have permission to view task templates"}, status=status.HTTP_403_FORBIDDEN)
+            templates = TaskTemplate.objects.select_related('created_by').order_by('title')
+            serializer = TaskTemplateSerializer(templates, many=True)
+            return Response({"msg": "Task templates fetched successfully", "data": serializer.data}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"msg": f"Error fetching task templates: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    def post(self, request):
+        try:
+            if get_user_role(request.user) not in ["admin", "senior"]:
+                return Response({"msg": "You do not have permission to create task templates"}, status=status.HTTP_403_FORBIDDEN)
+            serializer = TaskTemplateSerializer(data=request.data)
+            if serializer.is_valid():
+                serializer.save(created_by=request.user)
+                return Response({"msg": "Task template created successfully", "data": serializer.data}, status=status.HTTP_201_CREATED)
+            return Response({"msg": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"msg": f"Error creating task template: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def after_bulk_assignment(assignees, title, assigned_by_id):
+    """
+    Count and notify committed bulk assignments. The tasks exist by now, so a
+    cache or broker failure is logged rather than failing the request, which
+    clients would retry into duplicate tasks.
+    """
+    try:
+        record_assignments(assignees)
+    except Exception as e:
+        logger.exception(f"Failed to count bulk-assigned tasks on the board: {e}")
+    try:
+        notify_bulk_assignment.delay([user_id for user_id, _ in assignees], title, assigned_by_id)
+    except Exception as notif_error:
+        logger.exception(f"Failed to queue bulk assignment notification: {notif_error}")
+
+
+class TaskBulkAssignView(APIView):
+    """
+    Assign one task, from a template or a title, to many people: a list of
+    user ids, a department, a role, or a combination of them.
+    """
+
+    def post(self, request):
+        try:
+            user = request.user
+            role = get_user_role(user)
+            if role not in ["admin", "senior"]:
+                return Response({"msg": "You do not have permission to create tasks"}, status=status.HTTP_403_FORBIDDEN)
+
+            template = None
+            if request.data.get("template"):
+                template = TaskTemplate.objects.filter(id=request.data["template"]).first()
+                if not template:
+                    return Response({"msg": "Task template not found"}, status=status.HTTP_404_NOT_FOUND)
+            title = request.data.get("title") or (template.title if template else None)
+            description = request.data.get("description") or (template.description if template else None)
+            if not title:
+                return Response({"msg": "template or title is required"}, status=status.HTTP_400_BAD_REQUEST)
+            due_at = None
+            if request.data.get("due_at"):
+                due_at = parse_datetime(str(request.data["due_at"]))
+                if not due_at:
+                    return Response({"msg": "due_at must be an ISO 8601 datetime"}, status=status.HTTP_400_BAD_REQUEST)
+                if timezone.is_naive(due_at):
+                    due_at = timezone.make_aware(due_at)
+            elif template and template.sla_hours:
+                due_at = timezone.now() + timedelta(hours=template.sla_hours)
+
+            user_ids = request.data.get("user_ids")
+            department = request.data.get("department")
+            role_name = request.data.get("role")
+            if not (user_ids or department or role_name):
+                return Response({"msg": "user_ids, department or role is required"}, status=status.HTTP_400_BAD_REQUEST)
+            if role == "senior":
+                if not user.department_id or (department and str(department) != str(user.department_id)):
+                    return Response({"msg": "You can only assign tasks in your department"}, status=status.HTTP_403_FORBIDDEN)
+                department = user.department_id
+
+            # One query resolves every selector to the assignees' ids and departments
+            assignees = User.objects.filter(is_active=True)
+            if user_ids:
+                if not isinstance(user_ids, list):
+                    return Response({"msg": "user_ids must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+                try:
+                    user_ids = {int(user_id) for user_id in user_ids}
+                except (TypeError, ValueError):
+                    return Response({"msg": "user_ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+                assignees = assignees.filter(id__in=user_ids)
+            if department:
+                assignees = assignees.filter(department_id=department)
+            if role_name:
+                assignees = assignees.filter(role__name=role_name)
+            assignees = list(assignees.values_list('id', 'department_id')[:MAX_BULK_ASSIGNEES + 1])
+            if len(assignees) > MAX_BULK_ASSIGNEES:
+                return Response({"msg": f"At most {MAX_BULK_ASSIGNEES} people can be assigned at once"}, status=status.HTTP_400_BAD_REQUEST)
+            if user_ids:
+                missing = user_ids - {user_id for user_id, _ in assignees}
+                if missing:
+                    return Response({"msg": "Users not found or outside the selection", "ids": sorted(missing)}, status=status.HTTP_404_NOT_FOUND)
+            if not assignees:
+                return Response({"msg": "No users match the selection"}, status=status.HTTP_400_BAD_REQUEST)
+
+            with transaction.atomic():
+                tasks = Task.objects.bulk_create([
+                    Task(title=title, description=description, created_by=user, assigned_to_id=user_id, template=template, due_at=due_at)
+                    for user_id, _ in assignees
+                ])
+                # bulk_create skips post_save, so log, count and notify here in one batch each
+                record_events([(task.id, user.id, None, task.status) for task in tasks])
+                transaction.on_commit(lambda: after_bulk_assignment(assignees, title, user.id))
+            logger.info(f"{user.username} assigned '{title}' to {len(tasks)} people")
+            return Response({
+                "msg": f"Task assigned to {len(tasks)} people",
+                "data": {"task_ids": [task.id for task in tasks]},
+            }, status=status.HTTP_201_CREATED)
+        except Exception as e:
+            return Response({"msg": f"Error assigning tasks: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class TaskTimelineView(APIView):
+
+    def get(self, request, id):
+        try:
+            task = Task.objects.filter(id=id).only('id', 'created_by_id', 'assigned_to_id').first()
+            if not task:
+                return Response({"msg": "Task not found"}, status=status.HTTP_404_NOT_FOUND)
+            role = get_user_role(request.user)
+            if role == "senior" and task.created_by_id != request.user.id:
+                return Response({"msg": "You can only view history of your created tasks"}, status=status.HTTP_403_FORBIDDEN)
+            if role in ["junior", "intern"] and task.assigned_to_id != request.user.id:
+                return Response({"msg": "You can only view history of your assigned tasks"}, status=status.HTTP_403_FORBIDDEN)
+            if role not in ["admin", "senior", "junior", "intern"]:
+                return Response({"msg": "Unauthorized role"}, status=status.HTTP_403_FORBIDDEN)
+            return Response({"msg": "Task timeline fetched successfully", "data": timeline(task.id)}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"msg": f"Error fetching task timeline: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class TaskCycleTimeView(APIView):
+    """
+    Time from creation to completion for tasks completed in [start, end],
+    plus the average time spent in each status.
+    """
+
+    def get(self, request):
+        try:
+            user = request.user
+            role = get_user_role(user)
+            if role == "admin":
+                department = request.query_params.get("department")
+            elif role == "senior":
+                department = user.department_id
+                if not department:
+                    return Response({"msg": "You are not assigned to a department"}, status=status.HTTP_403_FORBIDDEN)
+            else:
+                return Response({"msg": "Only admin or senior can view cycle times"}, status=status.HTTP_403_FORBIDDEN)
+            try:
+                today = timezone.now().date()
+                start = date.fromisoformat(request.query_params["start"]) if request.query_params.get("start") else today - timedelta(days=30)
+                end = date.fromisoformat(request.query_params["end"]) if request.query_params.get("end") else today
+            except ValueError:
+                return Response({"msg": "start and end must be in YYYY-MM-DD format"}, status=status.HTTP_400_BAD_REQUEST)
+            data = cycle_time_metrics(int(department) if department else None, start, end + timedelta(days=1))
+            return Response({"msg": "Task cycle times fetched successfully", "data": data}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"msg": f"Error fetching cycle times: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class TaskSearchView(APIView):
+    """
+    Full-text search over task titles and descriptions with status, assignee,
+    creator and creation-date facets, newest first in keyset pages. Pass
+    ?facets=status,assignee,creator for counts per facet value; over many
+    matches they count only the newest ones and facets_approximate is true.
+    """
+
+    def get(self, request):
+        try:
+            tasks = visible_tasks(request.user)
+            if tasks is None:
+                return Response({"msg": "Unauthorized role"}, status=status.HTTP_403_FORBIDDEN)
+            params = request.query_params
+            statuses = None
+            if params.get("status"):
+                values = [STATUS_VALUES.get(value.lower()) for value in params["status"].split(",")]
+                if None in values:
+                    return Response({"msg": "Invalid status value"}, status=status.HTTP_400_BAD_REQUEST)
+                statuses = status_forms(*values)
+            facets = [facet for facet in params.get("facets", "").split(",") if facet]
+            if set(facets) - {"status", "assignee", "creator"}:
+                return Response({"msg": "facets must be among status, assignee and creator"}, status=status.HTTP_400_BAD_REQUEST)
+            try:
+                created_from = start_of_day(date.fromisoformat(params["created_from"])) if params.get("created_from") else None
+                created_to = start_of_day(date.fromisoformat(params["created_to"]) + timedelta(days=1)) if params.get("created_to") else None
+                assigned_to = int(params["assigned_to"]) if params.get("assigned_to") else None
+                created_by = int(params["created_by"]) if params.get("created_by") else None
+                limit = min(int(params.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+            except ValueError:
+                return Response({"msg": "Invalid filter: dates must be YYYY-MM-DD and ids and limit integers"}, status=status.HTTP_400_BAD_REQUEST)
+            if limit < 1:
+                return Response({"msg": "limit must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+            tasks = filter_tasks(
+                tasks, q=params.get("q"), statuses=statuses, assigned_to=assigned_to, created_by=created_by,
+                created_from=created_from, created_to=created_to, per_user=get_user_role(request.user) != "admin",
+            )
+            try:
+                rows, next_cursor = page(tasks, params.get("cursor"), limit)
+            except ValueError:
+                return Response({"msg": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+            response = {
+                "msg": "Tasks fetched successfully",
+                "data": TaskSerializer(rows, many=True).data,
+                "next_cursor": next_cursor,
+            }
+            if facets:
+                response["facets"], response["facets_approximate"] = facet_counts(tasks, facets)
+            return Response(response, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"msg": f"Error searching tasks: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)